@@ -1,13 +1,27 @@
+import html
 import json
 import time
+import uuid
 import streamlit as st
 
-from core.config import get_experience_text, get_openai_client
-from core.parsers import extract_text_from_upload, parse_skill_buckets, coerce_json
-from core.llm import call_gpt
-from core.prompts import SYSTEM_PROMPT, build_user_prompt
+from core.config import get_experience_text, get_model_cascade, get_openai_client, read_file_cached
+from core.parsers import extract_text_from_upload, parse_skill_buckets
+from core.cache import get_llm_cache
+from core.prompts import build_user_prompt
 from core.modify import json_convert
-from core.docx_render import render_docx_bytes, timestamped_filename
+from core.skills import match_skills
+from core.jdclean import compress_jd
+from core.relevance import rank_preset_bullets
+from core.metrics import RunMetrics, emit_run
+from core.experience import get_experience_model
+from core.jobs import JobQueueFull, get_job_manager
+from core.blobs import get_blob_store
+from core.history import REUSE_SIMILARITY, context_key, get_run_store
+from core.pipeline import generation_job, generation_key, regenerate_section
+from core.layout import get_template_layout, estimate_pages, auto_wrap, fit_to_pages
+from core.docx_render import (
+    render_docx_incremental, timestamped_filename, template_variables, required_preset_keys, SKILL_ARRAY_KEYS
+)
 
 # ---------------- Page Config ----------------
 st.set_page_config(
@@ -18,31 +32,51 @@ st.set_page_config(
 
 # ---------------- Session State ----------------
 ss = st.session_state
-if "template_bytes" not in ss:
-    ss.template_bytes = None
+if "template" not in ss:
+    ss.template = None  # BlobRef into the shared blob store; sessions hold no template bytes
+if "template_upload" not in ss:
+    ss.template_upload = None  # file_id of the upload already stored
 if "last_json" not in ss:
     ss.last_json = None
 if "last_preset" not in ss:
     ss.last_preset = None
+if "last_run" not in ss:
+    ss.last_run = None
+if "last_jd" not in ss:
+    ss.last_jd = None
+if "last_render" not in ss:
+    ss.last_render = None  # previous DOCX render, patched in place by the next one
+if "last_docx" not in ss:
+    ss.last_docx = None  # BlobRef of the last rendered DOCX
+if "warm_match" not in ss:
+    ss.warm_match = None  # similar past run offered as a starting point
+if "pending" not in ss:
+    ss.pending = None  # generation job this session is waiting on
+if "session_token" not in ss:
+    ss.session_token = uuid.uuid4().hex
 
 # ---------------- Load Styles ----------------
 def load_local_css(path: str = "styles.css"):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-    except FileNotFoundError:
-        pass
+    css = read_file_cached(path)  # read once per process, re-read when the file changes
+    if css is not None:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 load_local_css()
 
 # ---------------- Data & Client ----------------
 EXPERIENCE = get_experience_text()
+EXPERIENCE_MODEL = get_experience_model(EXPERIENCE)  # parsed once; re-parsed incrementally on change
 client = get_openai_client()
+JOBS = get_job_manager()  # shared by all sessions; LLM work runs here, not on the script thread
+HISTORY = get_run_store()  # past runs, searchable by JD similarity
+BLOBS = get_blob_store()  # templates / rendered files, one copy per content across sessions
+MODEL_CASCADE = get_model_cascade()  # cheapest first; escalates only on invalid output
 BUCKETS = ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
+RUN_DEADLINE_S = 180  # LLM time budget per generation, retries included
 SKILL_INVENTORY = parse_skill_buckets(EXPERIENCE, BUCKETS=BUCKETS)
 
 # ---------------- Header / Hero ----------------
-st.markdown("""
+st.markdown(f"""
 <div class="hero">
   <div class="hero-left">
     <div class="badge">Data Engineering • ATS-Ready</div>
@@ -52,7 +86,7 @@ st.markdown("""
   <div class="hero-right">
     <div class="stat-card">
       <div class="stat-label">Model</div>
-      <div class="stat-value">GPT-4o-mini</div>
+      <div class="stat-value">{html.escape(" → ".join(MODEL_CASCADE))}</div>
     </div>
     <div class="stat-card">
       <div class="stat-label">Cost / run</div>
@@ -85,6 +119,50 @@ with st.form(key="gen_form", clear_on_submit=False):
             "Creativity (temperature)", 0.0, 1.0, 0.25, 0.05,
             help="Lower = crisper JSON. 0.2–0.3 recommended."
         )
+        use_cache = st.checkbox(
+            "Reuse cached result", value=True,
+            help="Serve identical JD/experience/settings from the local LLM cache. Untick to force a fresh generation."
+        )
+        reuse_similar = st.checkbox(
+            "Reuse results for near-identical JDs", value=True,
+            help=f"A JD at least {REUSE_SIMILARITY:.0%} similar to a past one (reposts, small edits) reuses that run "
+                 "without calling the model; a less similar match is offered as a starting point."
+        )
+        stream_output = st.checkbox(
+            "Stream results", value=True,
+            help="Show keywords, missing skills and bullets as soon as the model produces them."
+        )
+        local_skills = st.checkbox(
+            "Match skills locally", value=True,
+            help="Compute JD keywords and missing skills on this machine (instant, deterministic); the model only writes bullets."
+        )
+        trim_jd = st.checkbox(
+            "Trim JD boilerplate", value=True,
+            help="Before prompting, drop repeated lines, EEO/benefits/about-us text and PDF extraction junk from the JD. "
+                 "Requirement lines and lines naming known skills are always kept."
+        )
+        fan_out = st.checkbox(
+            "Parallel per-section generation", value=False,
+            help="One smaller request per [Job]/[Project] section, sent concurrently. Faster on long experience files and avoids truncation."
+        )
+        n_candidates = st.slider(
+            "Candidates", 1, 5, 1,
+            help="Generate several versions in one request and keep the one that best covers the JD "
+                 "(scored locally: JD keyword coverage, bullet length, duplication). Not streamed."
+        )
+        order_by_relevance = st.checkbox(
+            "Order bullets by JD relevance", value=True,
+            help="Rank each section's bullets against the JD locally (BM25) and put the most relevant first."
+        )
+        max_bullets = st.number_input(
+            "Max bullets per section (0 = all)", 0, 20, 0,
+            help="Keep only the most JD-relevant bullets in each job/project section."
+        )
+        hedge = st.checkbox(
+            "Hedge slow requests", value=False,
+            help="If a request is slower than 95% of recent ones, send a duplicate and keep whichever answers first. "
+                 "Cuts tail latency at the cost of extra tokens."
+        )
     with settings[1]:
         st.info("Output is JSON-only. Your core experience & architecture remain unchanged.", icon="✅")
 
@@ -96,30 +174,63 @@ tpl_cols = st.columns([1, 1, 1])
 with tpl_cols[0]:
     tpl_file = st.file_uploader("Upload DOCX template", type=["docx"], key="tpl_uploader")
     if tpl_file is not None:
-        ss.template_bytes = tpl_file.read()
+        if ss.template_upload != tpl_file.file_id:  # store each upload once, not on every rerun
+            ss.template = BLOBS.put(tpl_file.getvalue())
+            ss.template_upload = tpl_file.file_id
         st.success(f"Template loaded: {tpl_file.name}")
 
 # Try default template if none uploaded yet
-if ss.template_bytes is None:
-    try:
-        with open("templates/resume_template.docx", "rb") as f:
-            ss.template_bytes = f.read()
+if ss.template is None:
+    default_tpl = read_file_cached("templates/resume_template.docx", binary=True)
+    if default_tpl is not None:
+        ss.template = BLOBS.put(default_tpl)  # every session shares the process's single copy
         st.caption("Using default template: templates/resume_template.docx")
-    except FileNotFoundError:
+    else:
         st.warning("Upload a DOCX template or place one at templates/resume_template.docx.")
+template_bytes = ss.template.data if ss.template is not None else None
 
 with tpl_cols[1]:
     wrap_width = st.number_input("Wrap width", 60, 140, 100, key="wrap_width")
 with tpl_cols[2]:
     wrap_trigger = st.number_input("Wrap trigger", 60, 160, 105, key="wrap_trigger")
+fit_cols = st.columns([1, 1, 1])
+with fit_cols[0]:
+    auto_wrap_on = st.checkbox(
+        "Auto wrap width", value=False, key="auto_wrap",
+        help="Derive the wrap width from the template's font, size and margins, so soft breaks never leave orphan lines."
+    )
+with fit_cols[1]:
+    fit_pages = st.number_input(
+        "Fit to pages (0 = off)", 0, 5, 0, key="fit_pages",
+        help="Drop the least JD-relevant bullets until the estimated length fits."
+    )
 
 # ---------------- Run (Generate) ----------------
+STREAM_LABELS = {
+    "keywords": "JD keywords",
+    "missing_skills": "Missing skills",
+    "experience_bullets": "Experience",
+    "project_bullets": "Project",
+}
+
+def render_stream_event(container, section: str, name, value):
+    """Render one completed piece of the streamed JSON as soon as it arrives."""
+    label = STREAM_LABELS.get(section, section)
+    if section in ("keywords", "missing_skills"):
+        items = ", ".join(str(v) for v in value) if isinstance(value, list) else str(value)
+        container.markdown(f"**{label} · {name}:** {items or '—'}")
+    else:
+        bullets = value if isinstance(value, list) else [value]
+        container.markdown(f"**{label} · {name}**\n" + "\n".join(f"- {b}" for b in bullets))
+
 if run_btn:
-    with st.spinner("Analyzing JD and generating JSON..."):
+    with st.spinner("Analyzing JD..."):
         start = time.time()
+        run = RunMetrics("generate")
         extracted = ""
         if jd_file is not None:
-            extracted = extract_text_from_upload(jd_file)
+            with run.span("extract"):
+                extracted = extract_text_from_upload(jd_file)
         jd_final = (jd_text or "").strip() or (extracted or "").strip()
 
         if not jd_final:
@@ -129,79 +240,344 @@ if run_btn:
         elif client is None:
             st.error("OPENAI_API_KEY not set. Configure env or Streamlit Secrets.")
         else:
-            user_prompt = build_user_prompt(
-                job_description=jd_final,
-                experience_text=EXPERIENCE,
-                skill_inventory=SKILL_INVENTORY,
-                buckets=BUCKETS
-            )
-            raw = call_gpt(
+            with run.span("skill_match"):
+                local = match_skills(jd_final, SKILL_INVENTORY, buckets=BUCKETS) if local_skills else None
+            jd_prompt = jd_final  # what the model sees; matching, ranking and history use the full JD
+            if trim_jd:
+                jd_report = {}
+                with run.span("jd_compress"):
+                    jd_prompt = compress_jd(jd_final, SKILL_INVENTORY, buckets=BUCKETS, report=jd_report) or jd_final
+                run.set("jd_tokens_before", jd_report["jd_compression"]["tokens_before"])
+                run.set("jd_tokens_after", jd_report["jd_compression"]["tokens_after"])
+            with run.span("prompt_build"):
+                # Only ask for what the loaded template actually shows.
+                try:
+                    used_keys = required_preset_keys(template_variables(template_bytes)) if template_bytes else None
+                except Exception:
+                    used_keys = None  # unreadable template: generate everything, the render step will report it
+                wanted = EXPERIENCE_MODEL.select(used_keys)
+                want_skills = used_keys is None or bool(used_keys & SKILL_ARRAY_KEYS)
+                prompt_experience = (EXPERIENCE if len(wanted) == len(EXPERIENCE_MODEL.sections)
+                                     else EXPERIENCE_MODEL.source_text(wanted))
+                run.set("sections_requested", len(wanted))
+                user_prompt = build_user_prompt(
+                    job_description=jd_prompt,
+                    experience_text=prompt_experience,
+                    skill_inventory=SKILL_INVENTORY,
+                    buckets=BUCKETS,
+                    include_skills=want_skills and not local_skills
+                )
+            params = dict(
                 client=client,
-                system_prompt=SYSTEM_PROMPT,
+                jd_text=jd_prompt,
                 user_prompt=user_prompt,
-                model="gpt-4o-mini",
+                experience_text=EXPERIENCE,
+                skill_inventory=SKILL_INVENTORY,
+                buckets=BUCKETS,
+                local=local,
+                sections=wanted,
+                experience=EXPERIENCE_MODEL,
+                include_skills=want_skills,
+                fan_out=fan_out,
+                n_candidates=n_candidates,
+                stream=stream_output,
+                model=MODEL_CASCADE[0],
+                models=MODEL_CASCADE,
                 temperature=temperature,
-                max_tokens=2800  # more room for longer bullets
+                max_tokens=2800,  # more room for longer bullets
+                use_cache=use_cache,
+                metrics=run,
+                deadline_s=RUN_DEADLINE_S,
+                hedge=hedge
             )
-
-            data = coerce_json(raw)
-            if data is None:
-                st.error("Could not parse JSON (model may have returned markdown or truncated JSON). Try lowering temperature.")
-                with st.expander("Show raw model output"):
-                    st.code(raw)
+            if ss.pending:  # a new Generate replaces the one still running for this session
+                JOBS.cancel(ss.pending["job_id"], subscriber=ss.session_token)
+                ss.pending = None
+            # same experience/model/sections: only then can a past run stand in for this one
+            run_context = context_key(EXPERIENCE_MODEL.source_hash, params["model"],
+                                      [s.id for s in wanted], want_skills)
+            match, ss.warm_match = None, None
+            if reuse_similar and use_cache:
+                try:
+                    with run.span("history_lookup"):
+                        match = HISTORY.lookup(jd_final, context=run_context)
+                except Exception:
+                    match = None  # a broken history file must not block generation
+            pending = {"job_id": None, "run": run, "start": start, "jd": jd_final, "local": local,
+                       "order_by_relevance": order_by_relevance, "max_bullets": max_bullets,
+                       "context": run_context, "reused": None}
+            if match and match["similarity"] >= REUSE_SIMILARITY:
+                run.set("history_reuse", match["similarity"])
+                ss.pending = {**pending, "reused": match}
             else:
-                elapsed = time.time() - start
-                st.success(f"Done in {elapsed:.1f}s")
+                if match:
+                    ss.warm_match = {**match, "jd": jd_final, "local": local}
+                try:
+                    job = JOBS.submit(generation_job, key=generation_key(params),
+                                      subscriber=ss.session_token, **params)
+                except JobQueueFull:
+                    st.error("The server is busy with other generations. Try again in a moment.")
+                else:
+                    run.set("job_id", job.id)
+                    run.set("job_coalesced", job.coalesced > 0)
+                    ss.pending = {**pending, "job_id": job.id}
 
-                st.subheader("🧩 Tailored Output (JSON)")
-                st.json(data)
 
-                # Persist results
-                ss.last_json = data
+@st.fragment(run_every=0.5)
+def job_progress():
+    """Poll the background job; the full script reruns once it has finished."""
+    pending = ss.pending
+    job = JOBS.get(pending["job_id"]) if pending else None
+    if job is None or job.done:
+        st.rerun()
+    info = job.snapshot()
+    note = " (shared with an identical request)" if info["coalesced"] else ""
+    cols = st.columns([4, 1])
+    if info["state"] == "queued":
+        cols[0].caption(f"Waiting for a free worker... {info['queued_s']:.0f}s{note}")
+    else:
+        cols[0].caption(f"Generating... {info['elapsed_s']:.0f}s{note}")
+    if cols[1].button("Cancel", key="cancel_job", use_container_width=True):
+        JOBS.cancel(job.id, subscriber=ss.session_token)
+        pending["run"].status = "cancelled"
+        emit_run(pending["run"])
+        ss.pending = None
+        st.rerun()
+    for section, name, value in job.events_since(0):
+        render_stream_event(st, section, name, value)
+
+
+if ss.pending:
+    pending = ss.pending
+    reused = pending["reused"]
+    job = None if reused else JOBS.get(pending["job_id"])
+    if reused is None and job is None:
+        ss.pending = None
+        st.error("The generation job expired before its result was collected. Please generate again.")
+    elif reused is None and not job.done:
+        job_progress()
+    else:
+        ss.pending = ss.warm_match = None
+        run, local, jd_final = pending["run"], pending["local"], pending["jd"]
+        if reused:
+            data, raw = reused["data"], reused["raw"]
+            if local is not None:  # skills are matched against this JD, not the stored one
+                data = {**data, **local}
+            result = {"data": data, "raw": raw}
+        else:
+            result = job.result or {}
+            data, raw = result.get("data"), result.get("raw", "")
+        if job is not None and job.state == "cancelled":
+            run.status = "cancelled"
+            emit_run(run)
+            st.info("Generation cancelled.")
+        elif job is not None and job.state == "error":
+            run.status = "llm_error"
+            emit_run(run)
+            st.error(f"Generation failed: {job.error}")
+        elif data is None and result.get("validation") and result["validation"][0]["section"] != "output":
+            run.status = "invalid_output"
+            emit_run(run)
+            st.error("The model output is missing required parts, even after retrying with a stronger model.")
+            with st.expander("Show validation issues and raw output"):
+                for issue in result["validation"]:
+                    st.markdown(f"- {issue['header'] or issue['section']}: {issue['message']}")
+                st.code(raw)
+        elif data is None:
+            run.status = "parse_error"
+            emit_run(run)
+            st.error("Could not parse JSON (model may have returned markdown or truncated JSON). Try lowering temperature.")
+            with st.expander("Show raw model output"):
+                st.code(raw)
+        else:
+            ranked = result.get("ranked")
+            if ranked and result.get("chosen") is not None:
+                picked = next(c for c in ranked if c["index"] == result["chosen"])
+                others = ", ".join(f"{c['score']:.2f}" for c in ranked if c is not picked) or "—"
+                note = "" if picked is ranked[0] else "; higher-scoring ones failed validation"
+                st.caption(f"Picked candidate {picked['index'] + 1} of {len(ranked)} "
+                           f"(score {picked['score']:.2f}; others: {others}{note})")
+            if result.get("repair", {}).get("truncated"):
+                st.warning("Model output was cut off; kept every complete section and bullet it produced.")
+            errors = result.get("section_errors") or {}
+            missing = [i["header"] for i in result.get("validation") or () if i["message"] == "section missing"]
+            if missing or errors:
+                st.warning("No bullets came back for: "
+                           + "; ".join(h + (f" ({errors[h]})" if h in errors else "")
+                                       for h in dict.fromkeys(missing + list(errors)))
+                           + ". Regenerate those sections below or run again.")
+            if result.get("model") and result["model"] != MODEL_CASCADE[0]:
+                st.caption(f"The {MODEL_CASCADE[0]} output failed validation; finished with {result['model']}.")
+            elapsed = time.time() - pending["start"]
+            st.success(f"Done in {elapsed:.1f}s")
+            if run.flags.get("jd_tokens_after") and not reused:
+                before, after = run.flags["jd_tokens_before"], run.flags["jd_tokens_after"]
+                st.caption(f"JD trimmed for the prompt: ~{before:,} → ~{after:,} tokens ({1 - after / before:.0%} fewer).")
+            if reused:
+                st.caption(f"Reused the run of a past JD ({reused['similarity']:.0%} similar, "
+                           f"served {reused['hits']}x); no model call. Untick 'Reuse results' to regenerate.")
+            cstats = get_llm_cache().stats()
+            st.caption(
+                f"LLM cache: {cstats['hits']} hits / {cstats['misses']} misses "
+                f"({cstats['hit_rate']:.0%}), ~{cstats['saved_seconds']:.0f}s of generation saved"
+            )
+
+            st.subheader("🧩 Tailored Output (JSON)")
+            st.json(data)
+
+            # Persist results
+            ss.last_json = data
+            ss.last_jd = jd_final
+
+            # Download JSON
+            st.download_button(
+                "Download JSON",
+                data=json.dumps(data, indent=2).encode("utf-8"),
+                file_name="tailored_output.json",
+                mime="application/json",
+                use_container_width=True
+            )
 
-                # Download JSON
+            # Convert to preset
+            convert_report = {}
+            try:
+                with run.span("json_convert"):
+                    ss.last_preset = json_convert(
+                        data, missing_skills=local["missing_skills"] if local else None,
+                        experience=EXPERIENCE_MODEL, report=convert_report
+                    )
+            except Exception as e:
+                ss.last_preset = None
+                run.status = "convert_error"
+                st.error(f"Preset conversion failed: {e}")
+            else:
+                if not reused:
+                    try:
+                        with run.span("history_put"):
+                            HISTORY.put(jd_final, raw, data, ss.last_preset, context=pending["context"])
+                    except Exception:
+                        pass  # history is best-effort
+                if pending["order_by_relevance"] or pending["max_bullets"]:
+                    with run.span("relevance"):
+                        ss.last_preset = rank_preset_bullets(ss.last_preset, jd_final,
+                                                             top_k=pending["max_bullets"] or None,
+                                                             report=convert_report)
+                    run.set("dropped_by_top_k", convert_report.get("dropped_by_top_k", 0))
+                near_dups = convert_report.get("near_duplicates") or []
+                run.set("near_duplicates_removed", len(near_dups))
+                if near_dups:
+                    with st.expander(f"Removed {len(near_dups)} near-duplicate bullet(s)"):
+                        for d in near_dups:
+                            st.markdown(f"- ~~{d['text']}~~  \n  kept: {d['kept']}")
                 st.download_button(
-                    "Download JSON",
-                    data=json.dumps(data, indent=2).encode("utf-8"),
-                    file_name="tailored_output.json",
+                    "Download Preset JSON",
+                    data=json.dumps(ss.last_preset, indent=2).encode("utf-8"),
+                    file_name="tailored_preset.json",
                     mime="application/json",
                     use_container_width=True
                 )
+            ss.last_run = emit_run(run)
 
-                # Convert to preset
-                try:
-                    ss.last_preset = json_convert(data)
-                except Exception as e:
-                    ss.last_preset = None
-                    st.error(f"Preset conversion failed: {e}")
-                else:
-                    st.download_button(
-                        "Download Preset JSON",
-                        data=json.dumps(ss.last_preset, indent=2).encode("utf-8"),
-                        file_name="tailored_preset.json",
-                        mime="application/json",
-                        use_container_width=True
+# ---------------- Similar past JD (warm start) ----------------
+if ss.warm_match is not None:
+    wm = ss.warm_match
+    warm_cols = st.columns([4, 1])
+    warm_cols[0].info(f"A past JD is {wm['similarity']:.0%} similar to this one. Use its result as a starting "
+                      "point instead of waiting, then regenerate the sections that need it.", icon="♻️")
+    if warm_cols[1].button("Use past result", key="warm_load", use_container_width=True):
+        if ss.pending:
+            JOBS.cancel(ss.pending["job_id"], subscriber=ss.session_token)
+            ss.pending = None
+        warm_data = {**wm["data"], **wm["local"]} if wm["local"] else wm["data"]
+        warm_preset = json_convert(warm_data, missing_skills=wm["local"]["missing_skills"] if wm["local"] else None,
+                                   experience=EXPERIENCE_MODEL)
+        if order_by_relevance or max_bullets:
+            warm_preset = rank_preset_bullets(warm_preset, wm["jd"], top_k=max_bullets or None)
+        ss.last_json, ss.last_preset, ss.last_jd = warm_data, warm_preset, wm["jd"]
+        ss.warm_match = None
+        st.rerun()
+
+# ---------------- Regenerate one section ----------------
+if ss.last_json is not None and ss.last_jd and client is not None and EXPERIENCE_MODEL.sections:
+    with st.expander("Regenerate one section"):
+        regen_cols = st.columns([4, 1])
+        regen_id = regen_cols[0].selectbox(
+            "Section", [s.id for s in EXPERIENCE_MODEL.sections], key="regen_section",
+            format_func=lambda sid: EXPERIENCE_MODEL.get(sid).header, label_visibility="collapsed"
+        )
+        if regen_cols[1].button("Regenerate", key="regen_btn", use_container_width=True):
+            section = EXPERIENCE_MODEL.get(regen_id)
+            run = RunMetrics("regenerate")
+            regen_report = {}
+            try:
+                with st.spinner(f"Regenerating {section.role}..."):
+                    ss.last_json, ss.last_preset = regenerate_section(
+                        client, ss.last_jd, section, ss.last_json, ss.last_preset, EXPERIENCE_MODEL,
+                        temperature=temperature, order_by_relevance=order_by_relevance,
+                        top_k=max_bullets or None, metrics=run, deadline_s=RUN_DEADLINE_S,
+                        hedge=hedge, report=regen_report
                     )
+            except Exception as e:
+                run.status = "llm_error"
+                st.error(f"Regeneration failed: {e}")
+            else:
+                slot = section.bullets_key
+                st.success(f"Regenerated {section.header}" + ("" if slot else " (not shown by the template)"))
+                for b in (ss.last_preset or {}).get(slot) or []:
+                    st.markdown(f"- {b}")
+            emit_run(run)
 
 # ---------------- 3) Render DOCX (FORM; uses persisted state) ----------------
 st.markdown('<div class="section-title">3) Generate Resume DOCX</div>', unsafe_allow_html=True)
+# Layout estimate (a few ms, no rendering): page count, auto wrap and fit-to-pages trimming.
+render_preset, render_wrap = ss.last_preset, (wrap_width, wrap_trigger)
+if template_bytes is not None and ss.last_preset is not None:
+    try:
+        layout = get_template_layout(template_bytes)
+        if auto_wrap_on:
+            render_wrap = auto_wrap(layout, ss.last_preset)
+        fit_report = {}
+        if fit_pages:
+            render_preset = fit_to_pages(layout, ss.last_preset, fit_pages, jd_text=ss.last_jd,
+                                         wrap_width=render_wrap[0], wrap_trigger=render_wrap[1], report=fit_report)
+        est = estimate_pages(layout, render_preset, *render_wrap)
+        st.caption(f"Estimated length: {est['pages']} page(s), last page ~{est['fill']:.0%} full "
+                   f"(wrap {render_wrap[0]}/{render_wrap[1]}).")
+        trimmed = fit_report.get("fit", {}).get("trimmed") or []
+        if trimmed:
+            with st.expander(f"Trimmed {len(trimmed)} bullet(s) to fit {fit_pages} page(s)"):
+                for t in trimmed:
+                    st.markdown(f"- ~~{t['text']}~~")
+    except Exception as e:
+        render_preset, render_wrap = ss.last_preset, (wrap_width, wrap_trigger)
+        st.caption(f"Page estimate unavailable: {e}")
 with st.form(key="render_form", clear_on_submit=False):
-    disabled = (ss.template_bytes is None or ss.last_preset is None)
+    disabled = (template_bytes is None or ss.last_preset is None)
     render_btn = st.form_submit_button("Make DOCX", type="primary", use_container_width=True, disabled=disabled)
 
 if "render_btn" in locals() and render_btn:
-    if ss.template_bytes is None:
+    if template_bytes is None:
         st.error("No template loaded.")
     elif ss.last_preset is None:
         st.error("No tailored preset available. Generate JSON first.")
     else:
+        run = RunMetrics("render")
         try:
-            docx_bytes = render_docx_bytes(
-                template_bytes=ss.template_bytes,
-                data=ss.last_preset,
-                wrap_width=ss.wrap_width if "wrap_width" in ss else 100,
-                wrap_trigger=ss.wrap_trigger if "wrap_trigger" in ss else 105
-            )
+            with run.span("docx_render"):
+                # only the blocks whose inputs changed since the last render are re-rendered
+                rendered = render_docx_incremental(
+                    template_bytes=template_bytes,
+                    data=render_preset,
+                    wrap_width=render_wrap[0],
+                    wrap_trigger=render_wrap[1],
+                    previous=ss.last_render
+                )
+            if rendered is not ss.last_render:  # unchanged input returns the previous render as-is
+                run.set("docx_parts_rendered", rendered.rerendered)
+                ss.last_docx = BLOBS.put(rendered.docx)
+                rendered.docx = b""  # the bytes live in the blob store; the session keeps the ref
+                ss.last_render = rendered
+            docx_bytes = ss.last_docx.data
             fname = timestamped_filename(
                 role=ss.last_preset.get("TITLE_MAIN") or "Role",
                 prefix="Resume"
@@ -215,4 +591,17 @@ if "render_btn" in locals() and render_btn:
             )
             st.success("DOCX generated.")
         except Exception as e:
-            st.error(f"Failed to render DOCX: {e}")
\ No newline at end of file
+            run.status = "render_error"
+            st.error(f"Failed to render DOCX: {e}")
+        emit_run(run)
+
+# ---------------- Run metrics (optional panel) ----------------
+if ss.last_run:
+    with st.expander("Run metrics (last generation)"):
+        m = ss.last_run
+        mcols = st.columns(4)
+        mcols[0].metric("LLM total", f"{m['spans_s'].get('llm', 0):.1f}s")
+        mcols[1].metric("Time to first token", f"{m['spans_s'].get('llm_ttft', 0):.1f}s")
+        mcols[2].metric("Prompt / completion tokens", f"{m['tokens']['prompt']} / {m['tokens']['completion']}")
+        mcols[3].metric("Cached prompt tokens", f"{m['tokens']['cached']}")
+        st.json(m)
\ No newline at end of file
@@ -0,0 +1,180 @@
+# benchmarks/bench_core.py
+"""
+Micro-benchmarks for the core text / parse / render hot paths.
+
+    python -m benchmarks.bench_core                       # run and print
+    python -m benchmarks.bench_core --save baseline.json  # record a baseline
+    python -m benchmarks.bench_core --compare baseline.json --threshold 0.25
+
+Each case records min/median wall time over several repeats and the peak
+traced memory of one extra run. --compare exits non-zero when a case's
+median is slower than the baseline by more than --threshold (fraction).
+Everything runs offline; the end-to-end case uses core.fakes.FakeOpenAIClient.
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks import generators as gen
+
+
+def _cases() -> List[Tuple[str, Callable[[], object]]]:
+    from core.docx_render import (
+        smart_break_positions, soft_wrap_multiline, bullets_to_richtext,
+        build_context_from_json, render_docx_bytes, render_docx_bytes_uncached, render_docx_incremental,
+    )
+    from core.modify import json_convert
+    from core.parsers import coerce_json, parse_skill_buckets
+    from core.experience import parse_experience
+    from core.prompts import SYSTEM_PROMPT, build_user_prompt
+    from core.llm import call_gpt
+    from core.skills import match_skills
+    from core.dedupe import near_duplicate_pairs
+    from core.relevance import score_jds
+    from core.layout import estimate_pages, get_template_layout
+    from core.history import RunStore
+    from core.schema import get_schema
+    from core.jdclean import compress_jd
+    from core.experience import get_experience_model
+    from core.fakes import FakeOpenAIClient
+
+    bullets = gen.make_bullets(500, words=40)
+    many_bullets = gen.make_bullets(3000, seed=1)
+    many_jds = [gen.make_jd(2, seed=i) for i in range(200)]
+    long_text = " ".join(gen.make_bullets(2000))
+    preset = gen.make_preset(200)
+    small_preset = gen.make_preset(8)
+    model_json = json.loads(gen.make_model_output())
+    malformed = gen.make_malformed_outputs()
+    experience = gen.make_experience()
+    jd = gen.make_jd(50)
+    template = gen.make_template()
+    inventory = parse_skill_buckets(experience)
+    client = FakeOpenAIClient()
+    layout = get_template_layout(template)
+    first_render = render_docx_incremental(template, small_preset)
+    history = RunStore(os.path.join(tempfile.mkdtemp(), "history.sqlite3"))
+    for i, text in enumerate(many_jds):
+        history.put(text, "", {"i": i}, None, context="bench")
+    unseen_jd = gen.make_jd(2, seed=10_000)
+    schema = get_schema(get_experience_model(experience).sections, list(inventory))
+    tailored = json.loads(client.responder([{"content": build_user_prompt(jd, experience, inventory, list(inventory))}]))
+    one_section = {**small_preset, "EXTRA_BULLETS_TEK": small_preset["EXTRA_BULLETS_TEK"][::-1]}
+
+    def end_to_end():
+        prompt = build_user_prompt(jd, experience, inventory, list(inventory))
+        raw = call_gpt(client, SYSTEM_PROMPT, prompt, use_cache=False)
+        data = coerce_json(raw)
+        return render_docx_bytes(template, json_convert(data))
+
+    cases = [
+        ("smart_break_positions.50k", lambda: list(smart_break_positions(long_text, 100))),
+        ("soft_wrap_multiline.500", lambda: [soft_wrap_multiline(b) for b in bullets]),
+        ("bullets_to_richtext.500", lambda: bullets_to_richtext(bullets)),
+        ("build_context_from_json.1000", lambda: build_context_from_json(preset)),
+        ("json_convert.20x30", lambda: json_convert(model_json)),
+        ("experience_model.parse", lambda: parse_experience(experience)),
+        ("match_skills.jd50p", lambda: match_skills(jd, inventory)),
+        ("compress_jd.jd50p", lambda: compress_jd(jd, inventory)),
+        ("near_duplicate_pairs.3000", lambda: near_duplicate_pairs(many_bullets)),
+        ("score_jds.1000x200", lambda: score_jds(many_bullets[:1000], many_jds)),
+        ("estimate_pages.40", lambda: estimate_pages(layout, small_preset)),
+        ("estimate_pages.1000", lambda: estimate_pages(layout, preset)),
+        ("schema_validate.20_sections", lambda: schema.validate(tailored)),
+        ("history_lookup.200", lambda: history.lookup(unseen_jd, context="bench")),
+    ]
+    for name, text in malformed.items():
+        cases.append((f"coerce_json.{name}", lambda text=text: coerce_json(text)))
+    cases += [
+        ("render_docx_bytes.cached", lambda: render_docx_bytes(template, small_preset)),
+        ("render_docx_bytes.uncached", lambda: render_docx_bytes_uncached(template, small_preset)),
+        ("render_docx_bytes.1000_bullets", lambda: render_docx_bytes(template, preset)),
+        ("render_docx_incremental.one_section",
+         lambda: render_docx_incremental(template, one_section, previous=first_render)),
+        ("end_to_end.fake_llm", end_to_end),
+    ]
+    return cases
+
+
+def run_case(fn: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    fn()  # warm-up (also fills per-process caches, as in a long-running app)
+    times = []
+    t_end = time.perf_counter() + min_time
+    while len(times) < repeat or time.perf_counter() < t_end:
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+        if len(times) >= repeat * 20:
+            break
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs": len(times),
+        "min_ms": round(min(times), 4),
+        "median_ms": round(statistics.median(times), 4),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        ratio = r["median_ms"] / b["median_ms"] if b["median_ms"] else 1.0
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  <-- REGRESSION"
+            regressions.append(name)
+        print(f"{name:38s} {b['median_ms']:10.3f} -> {r['median_ms']:10.3f} ms  x{ratio:5.2f}"
+              f"  peak {b['peak_kb']:9.1f} -> {r['peak_kb']:9.1f} KB{mark}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--save", help="Write results to this JSON baseline")
+    ap.add_argument("--compare", help="Compare against this JSON baseline")
+    ap.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown fraction (default 0.25)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.2, help="Min seconds of timing per case")
+    ap.add_argument("-k", dest="only", help="Only run cases whose name contains this substring")
+    args = ap.parse_args(argv)
+
+    results: Dict[str, dict] = {}
+    for name, fn in _cases():
+        if args.only and args.only not in name:
+            continue
+        results[name] = r = run_case(fn, args.repeat, args.min_time)
+        if not args.compare:
+            print(f"{name:38s} median {r['median_ms']:10.3f} ms  min {r['min_ms']:10.3f} ms  "
+                  f"peak {r['peak_kb']:9.1f} KB  ({r['runs']} runs)")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
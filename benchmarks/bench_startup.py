@@ -0,0 +1,92 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start and warm-rerun cost of the Streamlit app.
+
+    python -m benchmarks.bench_startup                         # print
+    python -m benchmarks.bench_startup --save startup.json     # record a baseline
+    python -m benchmarks.bench_startup --compare startup.json
+
+Each sample runs in a fresh interpreter (so module imports are cold) and
+drives app.py with streamlit.testing.v1.AppTest: the first run is the cold
+start, the following runs are warm reruns like a widget interaction.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.bench_core import compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+warm = []
+for _ in range(int(sys.argv[1])):
+    s = time.perf_counter()
+    at.run()
+    warm.append(time.perf_counter() - s)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+heavy = [m for m in ("docxtpl", "docx", "openai", "PyPDF2") if m in sys.modules]
+print(json.dumps({"framework_import_s": t1 - t0, "cold_run_s": t2 - t1, "warm_runs_s": warm,
+                  "peak_kb": peak, "heavy_modules_loaded": heavy,
+                  "exception": [str(e.value) for e in at.exception]}))
+"""
+
+
+def sample(warm_runs: int) -> dict:
+    env = dict(os.environ, OPENAI_API_KEY="", PYTHONWARNINGS="ignore")
+    proc = subprocess.run([sys.executable, "-c", _CHILD, str(warm_runs)], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--samples", type=int, default=3, help="Fresh interpreters to start")
+    ap.add_argument("--warm-runs", type=int, default=10, help="Reruns per interpreter")
+    ap.add_argument("--save")
+    ap.add_argument("--compare")
+    ap.add_argument("--threshold", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    samples = [sample(args.warm_runs) for _ in range(args.samples)]
+    for s in samples:
+        if s["exception"]:
+            print(f"app raised: {s['exception']}")
+            return 1
+    cold = [s["cold_run_s"] * 1000 for s in samples]
+    warm = [w * 1000 for s in samples for w in s["warm_runs_s"]]
+    peak = max(s["peak_kb"] for s in samples)
+    results = {
+        "app.cold_start": {"runs": len(cold), "min_ms": round(min(cold), 3),
+                           "median_ms": round(statistics.median(cold), 3), "peak_kb": round(peak, 1)},
+        "app.warm_rerun": {"runs": len(warm), "min_ms": round(min(warm), 3),
+                           "median_ms": round(statistics.median(warm), 3), "peak_kb": round(peak, 1)},
+    }
+    if not args.compare:
+        for name, r in results.items():
+            print(f"{name:20s} median {r['median_ms']:9.1f} ms  min {r['min_ms']:9.1f} ms  ({r['runs']} runs)")
+        print(f"heavy modules loaded at startup: {samples[0]['heavy_modules_loaded'] or 'none'}")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
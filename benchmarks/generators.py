@@ -0,0 +1,119 @@
+# benchmarks/generators.py
+"""Deterministic synthetic inputs for the benchmarks (no network, no files)."""
+
+import json
+import random
+from io import BytesIO
+from typing import Dict, List
+
+from core.fakes import fake_tailored_output
+
+_WORDS = (
+    "build scalable data pipelines spark kafka airflow aws glue redshift snowflake python sql "
+    "orchestrate streaming batch ingestion warehouse lakehouse quality governance latency "
+    "throughput optimize partition schema dimensional model dashboard stakeholder reliability "
+    "monitoring alerting terraform docker kubernetes ci cd testing migrate legacy cost savings"
+).split()
+
+_BOILERPLATE = (
+    "We are an equal opportunity employer and value diversity at our company. "
+    "Benefits include medical, dental and vision insurance, 401k matching and paid time off. "
+)
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words)).capitalize()
+
+
+def make_bullets(n: int, words: int = 24, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [_sentence(rng, words + rng.randint(-6, 10)) for _ in range(n)]
+
+
+def make_jd(pages: int = 50, seed: int = 0) -> str:
+    """Roughly `pages` pages (~3000 chars each) of JD-like text with boilerplate."""
+    rng = random.Random(seed)
+    out = []
+    for p in range(pages):
+        out.append(f"Responsibilities (page {p + 1})")
+        out.extend(f"- {_sentence(rng, rng.randint(10, 30))}." for _ in range(12))
+        out.append(_BOILERPLATE * 3)
+    return "\n".join(out)
+
+
+def make_experience(n_jobs: int = 12, n_projects: int = 8, bullets: int = 15, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = [
+        "[Programming]\nPython, SQL, Scala, Bash",
+        "[Data Engineering]\nApache Spark, Kafka, Airflow, dbt, ETL, Data Modeling",
+        "[Cloud]\nAWS, GCP, Docker, Terraform",
+        "[Database]\nPostgres, MySQL, Snowflake, Redshift",
+        "[ML/AI]\nscikit-learn, MLflow",
+        "[Misc]\nGit, CI/CD, Agile, Tableau",
+    ]
+    for j in range(n_jobs):
+        parts.append(f"[Job: Data Engineer {j} – Company {j} (Jan 20{10 + j % 10} – Dec 20{11 + j % 10})]")
+        parts.extend(f"- {_sentence(rng, 22)}" for _ in range(bullets))
+    for p in range(n_projects):
+        parts.append(f"[Project: Project {p} (20{15 + p % 8})]")
+        parts.extend(f"- {_sentence(rng, 20)}" for _ in range(bullets))
+    return "\n".join(parts)
+
+
+def make_model_output(n_jobs: int = 20, n_projects: int = 10, bullets: int = 30) -> str:
+    return json.dumps(fake_tailored_output(n_jobs=n_jobs, n_projects=n_projects, bullets_per_section=bullets))
+
+
+def make_malformed_outputs(seed: int = 0) -> Dict[str, str]:
+    """Model outputs in the shapes coerce_json has to recover from."""
+    good = make_model_output(n_jobs=5, n_projects=3, bullets=9)
+    rng = random.Random(seed)
+    cut = rng.randint(len(good) // 2, len(good) - 10)
+    return {
+        "clean": good,
+        "fenced": f"Here you go:\n```json\n{good}\n```\nLet me know!",
+        "trailing_commas": good.replace("]", ",]").replace("}", ",}", 3),
+        "truncated": good[:cut],
+        "prose_only": "I'm sorry, I can't help with that. " * 200,
+    }
+
+
+def make_preset(bullets_per_section: int = 200, seed: int = 0) -> dict:
+    rng_b = lambda s: make_bullets(bullets_per_section, seed=seed + s)  # noqa: E731
+    return {
+        "TITLE_MAIN": "Data Engineer", "TITLE_SUB": "Associate Data Engineer", "TITLE_INTERN": "Intern",
+        "EXTRA_COURSEWORK": ["Distributed Systems", "Databases"],
+        "EXTRA_PROGRAMMING": ["Scala"], "EXTRA_DE": ["dbt"], "EXTRA_CLOUD": ["Azure"],
+        "EXTRA_DB": ["Snowflake"], "EXTRA_AI": [], "EXTRA_MISC": ["Jira"],
+        "EXTRA_BULLETS_TEK": rng_b(1), "EXTRA_BULLETS_ASSOCIATE": rng_b(2), "EXTRA_BULLETS_INTERN": rng_b(3),
+        "EXTRA_ECOMMERCE": rng_b(4), "EXTRA_HOSPITAL": rng_b(5),
+    }
+
+
+def make_template(static_paragraphs: int = 300) -> bytes:
+    """A DOCX template referencing every preset key, padded with static text."""
+    import docx
+
+    d = docx.Document()
+    d.add_heading("{{ TITLE_MAIN }}", 1)
+    for key, sub in (("TEK", "TITLE_MAIN"), ("ASSOCIATE", "TITLE_SUB"), ("INTERN", "TITLE_INTERN")):
+        d.add_heading("{{ " + sub + " }}", 2)
+        d.add_paragraph("{%p for b in RICH_BULLETS_" + key + " %}")
+        d.add_paragraph("{{r b }}", style="List Bullet")
+        d.add_paragraph("{%p endfor %}")
+    for key in ("ECOMMERCE", "HOSPITAL"):
+        d.add_heading(key.title(), 2)
+        d.add_paragraph("{%p for b in RICH_" + key + " %}")
+        d.add_paragraph("{{r b }}", style="List Bullet")
+        d.add_paragraph("{%p endfor %}")
+    for key in ("EXTRA_PROGRAMMING", "EXTRA_DE", "EXTRA_CLOUD", "EXTRA_DB", "EXTRA_AI", "EXTRA_MISC",
+                "EXTRA_COURSEWORK"):
+        p = d.add_paragraph()
+        p.add_run(key.replace("EXTRA_", "").title() + ": ").bold = True
+        p.add_run("Python, SQL, {{ " + key + "|join(', ') }}")
+    rng = random.Random(0)
+    for _ in range(static_paragraphs):
+        d.add_paragraph(_sentence(rng, 18))
+    buf = BytesIO()
+    d.save(buf)
+    return buf.getvalue()
@@ -0,0 +1,469 @@
+# core/api.py
+"""
+Local HTTP API for the tailoring pipeline, for tools that would otherwise
+have to drive the Streamlit UI.
+
+    python -m core.api --port 8000           # OPENAI_API_KEY / OPENAI_BASE_URL as for the app
+    python -m core.api --port 8000 --fake    # offline: core.fakes.FakeOpenAIClient
+
+    GET  /health                     capacity, queue depth, upstream breaker state
+    POST /extract?filename=jd.pdf    raw file body -> {"text"}
+    POST /templates                  raw DOCX body -> {"template": <sha256>, "variables"}
+    POST /tailor                     {"jd_text", ...options} -> {"data", "preset", ...}
+                                     (boilerplate is trimmed from the JD first; "trim_jd": false to skip)
+                                     with "stream": true: NDJSON, one line per section as
+                                     it is generated, then {"event": "result", ...}
+    POST /render                     {"template", "preset", ...} -> the DOCX file
+
+- One OpenAI client, i.e. one pooled keep-alive HTTP connection pool, serves
+  every request; timeouts/retries/breaker come from core.resilience.
+- LLM work (tailor) and CPU work (extract/templates/render) each run at most
+  `*_concurrency` at a time with a short queue behind; past that a request
+  gets 429 + Retry-After right away instead of piling up.
+- The blocking core functions run on worker threads; the event loop only
+  moves bytes. A client that disconnects mid-stream cancels its generation.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from core.blobs import get_blob_store
+from core.config import get_experience_text, get_model_cascade, get_openai_client, read_file_cached
+from core.docx_render import (
+    get_compiled_template, render_docx_bytes, required_preset_keys, timestamped_filename, SKILL_ARRAY_KEYS
+)
+from core.experience import get_experience_model
+from core.jdclean import compress_jd
+from core.jobs import JobCancelled
+from core.layout import auto_wrap, fit_to_pages, get_template_layout
+from core.metrics import RunMetrics, emit_run
+from core.modify import json_convert
+from core.parsers import MAX_UPLOAD_BYTES, extract_text_from_bytes, parse_skill_buckets
+from core.pipeline import generate
+from core.prompts import build_user_prompt
+from core.relevance import rank_preset_bullets
+from core.resilience import CircuitOpen, DeadlineExceeded, get_breaker
+from core.skills import match_skills
+
+BUCKETS = ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DEFAULT_TEMPLATE = "templates/resume_template.docx"
+MAX_JSON_BYTES = 2 * 1024 * 1024
+MAX_TEMPLATES = 64  # uploaded templates kept referenced (LRU); blobs are shared with the app
+
+
+class Busy(Exception):
+    """No free slot and the wait queue is full."""
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": message, **extra}
+
+
+class Admission:
+    """At most `limit` requests running and `queue` waiting; anything beyond is refused (Busy)."""
+
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self._sem = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> None:
+        if self.active + self.waiting >= self.limit + self.queue:
+            raise Busy()
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._sem.release()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"active": self.active, "waiting": self.waiting, "limit": self.limit, "queue": self.queue}
+
+
+def _bool(v: Any, default: bool) -> bool:
+    if v is None:
+        return default
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "yes", "on")
+    return bool(v)
+
+
+def _int(body: dict, key: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int(body.get(key, default))
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{key} must be an integer")
+    return max(lo, min(hi, v))
+
+
+def _upstream_error(e: BaseException) -> HTTPError:
+    if isinstance(e, CircuitOpen):
+        return HTTPError(503, str(e))
+    if isinstance(e, DeadlineExceeded):
+        return HTTPError(504, str(e))
+    return HTTPError(502, f"upstream error: {type(e).__name__}: {e}")
+
+
+def create_app(client=None, experience: Optional[str] = None, models: Optional[Sequence[str]] = None,
+               llm_concurrency: int = 8, llm_queue: int = 16,
+               cpu_concurrency: int = 4, cpu_queue: int = 32,
+               max_deadline_s: float = 180.0):
+    """
+    Starlette app over the core pipeline; `client` defaults to the app's
+    shared OpenAI client, `models` to the configured cascade.
+    """
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+
+    client = client if client is not None else get_openai_client()
+    experience = experience if experience is not None else get_experience_text()
+    exp_model = get_experience_model(experience)
+    models = tuple(models or get_model_cascade())
+    inventory = parse_skill_buckets(experience, BUCKETS=BUCKETS)
+    blobs = get_blob_store()
+    templates: "OrderedDict[str, Any]" = OrderedDict()  # hash -> BlobRef
+    state: Dict[str, Admission] = {}
+
+    def admission(kind: str) -> Admission:
+        # created inside the running loop
+        if kind not in state:
+            state["llm"] = Admission(llm_concurrency, llm_queue)
+            state["cpu"] = Admission(cpu_concurrency, cpu_queue)
+        return state[kind]
+
+    async def read_body(request: Request, limit: int) -> bytes:
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            raise HTTPError(413, f"body larger than {limit} bytes")
+        chunks, size = [], 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > limit:
+                raise HTTPError(413, f"body larger than {limit} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def read_json(request: Request) -> dict:
+        try:
+            body = json.loads(await read_body(request, MAX_JSON_BYTES) or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return body
+
+    async def on_cpu(fn, *args):
+        cpu = admission("cpu")
+        await cpu.acquire()
+        try:
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            cpu.release()
+
+    def template_ref(key: Optional[str]):
+        if key:
+            ref = templates.get(key)
+            if ref is None:
+                raise HTTPError(404, f"unknown template {key}; upload it to /templates first")
+            templates.move_to_end(key)
+            return ref
+        default = read_file_cached(DEFAULT_TEMPLATE, binary=True)
+        if default is None:
+            raise HTTPError(400, f"no template given and {DEFAULT_TEMPLATE} does not exist")
+        return blobs.put(default)
+
+    def handler(fn):
+        async def endpoint(request: Request):
+            try:
+                return await fn(request)
+            except HTTPError as e:
+                return JSONResponse(e.body, status_code=e.status)
+            except Busy:
+                return JSONResponse({"error": "server is saturated, retry shortly"}, status_code=429,
+                                    headers={"Retry-After": "1"})
+        return endpoint
+
+    # ---------------- endpoints ----------------
+
+    async def health(request: Request):
+        return JSONResponse({
+            "status": "ok",
+            "llm": admission("llm").snapshot(),
+            "cpu": admission("cpu").snapshot(),
+            "breaker": {m: get_breaker(m).state for m in models},
+            "templates": len(templates),
+            "llm_configured": client is not None,
+        })
+
+    async def extract(request: Request):
+        name = request.query_params.get("filename") or "jd.txt"
+        data = await read_body(request, MAX_UPLOAD_BYTES)
+        text = (await on_cpu(extract_text_from_bytes, name, data)).strip()
+        if not text:
+            raise HTTPError(422, "no text could be extracted")
+        return JSONResponse({"text": text, "chars": len(text)})
+
+    async def upload_template(request: Request):
+        data = await read_body(request, MAX_UPLOAD_BYTES)
+        if not data:
+            raise HTTPError(400, "empty body; send the DOCX bytes")
+        def work():
+            ref = blobs.put(data)  # hashes the body; off the loop like the compile
+            try:
+                return ref, get_compiled_template(ref.data)
+            except Exception as e:
+                raise HTTPError(400, f"not a usable DOCX template: {type(e).__name__}: {e}")
+
+        ref, ct = await on_cpu(work)
+        templates[ref.key] = ref
+        templates.move_to_end(ref.key)
+        while len(templates) > MAX_TEMPLATES:
+            templates.popitem(last=False)
+        return JSONResponse({"template": ref.key, "size": ref.size, "variables": sorted(ct.variables)})
+
+    def plan(body: dict, template) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Validate /tailor options; returns the generate() parameters and the
+        core.jdclean report (None when trimming is off). Skill matching, JD
+        trimming and a first-time template compile take tens of milliseconds,
+        so this runs on a worker thread inside the request's LLM slot.
+        """
+        jd_text = body["jd_text"].strip()
+        template_keys = None
+        if template is not None:
+            template_keys = required_preset_keys(get_compiled_template(template.data).variables)
+        local_skills = _bool(body.get("local_skills"), True)
+        local = match_skills(jd_text, inventory, buckets=BUCKETS) if local_skills else None
+        jd_prompt, jd_report = jd_text, {}
+        if _bool(body.get("trim_jd"), True):
+            jd_prompt = compress_jd(jd_text, inventory, buckets=BUCKETS, report=jd_report) or jd_text
+        wanted = exp_model.select(template_keys)
+        want_skills = template_keys is None or bool(template_keys & SKILL_ARRAY_KEYS)
+        try:
+            temperature = float(body.get("temperature", 0.25))
+            deadline_s = min(float(body.get("deadline_s") or max_deadline_s), max_deadline_s)
+        except (TypeError, ValueError):
+            raise HTTPError(400, "temperature and deadline_s must be numbers")
+        user_prompt = build_user_prompt(
+            job_description=jd_prompt,
+            experience_text=(experience if len(wanted) == len(exp_model.sections)
+                             else exp_model.source_text(wanted)),
+            skill_inventory=inventory,
+            buckets=BUCKETS,
+            include_skills=want_skills and not local_skills
+        )
+        return dict(
+            client=client, jd_text=jd_prompt, user_prompt=user_prompt, experience_text=experience,
+            skill_inventory=inventory, buckets=BUCKETS, local=local, sections=wanted,
+            experience=exp_model, include_skills=want_skills,
+            fan_out=_bool(body.get("fan_out"), False),
+            n_candidates=_int(body, "n_candidates", 1, 1, 5),
+            stream=_bool(body.get("stream"), False),
+            model=models[0], models=models, temperature=max(0.0, min(1.0, temperature)), max_tokens=2800,
+            use_cache=_bool(body.get("use_cache"), True),
+            deadline_s=deadline_s, hedge=_bool(body.get("hedge"), False),
+        ), jd_report.get("jd_compression")
+
+    def finish(result: Dict[str, Any], params: Dict[str, Any], body: dict, run: RunMetrics,
+               jd_compression: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """coerce_json result -> preset, as in the app (runs on a worker thread)."""
+        data = result["data"]
+        if data is None:
+            issues = result.get("validation") or []
+            if issues and issues[0]["section"] != "output":
+                raise HTTPError(502, "model output failed validation", validation=issues, raw=result.get("raw", ""))
+            raise HTTPError(502, "could not parse JSON from model output", raw=result.get("raw", ""))
+        local = params["local"]
+        report: Dict[str, Any] = {}
+        with run.span("json_convert"):
+            preset = json_convert(data, missing_skills=local["missing_skills"] if local else None,
+                                  experience=exp_model, report=report)
+        max_bullets = _int(body, "max_bullets", 0, 0, 50)
+        if _bool(body.get("order_by_relevance"), True) or max_bullets:
+            with run.span("relevance"):
+                preset = rank_preset_bullets(preset, body["jd_text"].strip(), top_k=max_bullets or None, report=report)
+        run.set("near_duplicates_removed", len(report.get("near_duplicates") or []))
+        return {
+            "data": data, "preset": preset,
+            "repair": result.get("repair") or {}, "ranked": result.get("ranked"),
+            "chosen": result.get("chosen"), "model": result.get("model"),
+            "validation": result.get("validation") or [], "section_errors": result.get("section_errors") or {},
+            "near_duplicates": report.get("near_duplicates") or [],
+            "jd_compression": jd_compression,
+            "metrics": run.to_dict(),
+        }
+
+    async def tailor(request: Request):
+        if client is None:
+            raise HTTPError(503, "OPENAI_API_KEY not set")
+        body = await read_json(request)
+        jd_text = body.get("jd_text")
+        if not isinstance(jd_text, str) or not jd_text.strip():
+            raise HTTPError(400, "jd_text is required")
+        template = template_ref(body["template"]) if body.get("template") else None  # LRU touched on the loop only
+        llm = admission("llm")
+        await llm.acquire()  # 429 from here when saturated, before any response has started
+        try:
+            params, jd_compression = await asyncio.to_thread(plan, body, template)
+        except BaseException:
+            llm.release()
+            raise
+        run = RunMetrics("api_tailor")
+        if jd_compression:
+            run.set("jd_tokens_before", jd_compression["tokens_before"])
+            run.set("jd_tokens_after", jd_compression["tokens_after"])
+
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        cancel = threading.Event()
+
+        def check_cancelled():
+            if cancel.is_set():
+                raise JobCancelled()
+
+        def work():
+            try:
+                result = generate(metrics=run, check_cancelled=check_cancelled,
+                                  on_event=lambda *e: loop.call_soon_threadsafe(events.put_nowait, ("event", e)),
+                                  **params)
+                out = ("result", finish(result, params, body, run, jd_compression))
+            except BaseException as e:  # reported to the client, not raised on the worker
+                out = ("error", e)
+            loop.call_soon_threadsafe(events.put_nowait, out)
+
+        task = asyncio.ensure_future(asyncio.to_thread(work))
+        task.add_done_callback(lambda _: llm.release())  # the slot is held by the work, not the response
+
+        def outcome(kind: str, payload: Any):
+            run.status = "ok" if kind == "result" else "error"
+            emit_run(run)
+            if kind == "result":
+                return payload
+            err = payload if isinstance(payload, HTTPError) else _upstream_error(payload)
+            raise err
+
+        if not params["stream"]:
+            try:
+                while True:
+                    kind, payload = await events.get()
+                    if kind != "event":
+                        return JSONResponse(outcome(kind, payload))
+            finally:
+                cancel.set()  # no-op when finished; stops the worker if the request was dropped
+
+        async def lines():
+            try:
+                while True:
+                    kind, payload = await events.get()
+                    if kind == "event":
+                        section, name, value = payload
+                        yield json.dumps({"event": "section", "section": section, "name": name,
+                                          "value": value}, ensure_ascii=False) + "\n"
+                        continue
+                    try:
+                        yield json.dumps({"event": "result", **outcome(kind, payload)}, ensure_ascii=False) + "\n"
+                    except HTTPError as e:
+                        yield json.dumps({"event": "error", "status": e.status, **e.body}, ensure_ascii=False) + "\n"
+                    return
+            finally:
+                cancel.set()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def render(request: Request):
+        body = await read_json(request)
+        preset = body.get("preset")
+        if not isinstance(preset, dict):
+            raise HTTPError(400, "preset (json_convert output) is required")
+        ref = template_ref(body.get("template"))
+        wrap = (_int(body, "wrap_width", 100, 20, 400), _int(body, "wrap_trigger", 105, 20, 400))
+        fit_pages = _int(body, "fit_pages", 0, 0, 10)
+        auto = _bool(body.get("auto_wrap"), False)
+        jd_text = str(body.get("jd_text") or "")
+
+        def work():
+            run = RunMetrics("api_render")
+            data, w = preset, wrap
+            if auto or fit_pages:
+                with run.span("layout"):
+                    layout = get_template_layout(ref.data)
+                    if auto:
+                        w = auto_wrap(layout, data)
+                    if fit_pages:
+                        data = fit_to_pages(layout, data, fit_pages, jd_text=jd_text,
+                                            wrap_width=w[0], wrap_trigger=w[1])
+            with run.span("docx_render"):
+                docx = render_docx_bytes(ref.data, data, wrap_width=w[0], wrap_trigger=w[1])
+            emit_run(run)
+            return docx
+
+        try:
+            docx = await on_cpu(work)
+        except (Busy, HTTPError):
+            raise
+        except Exception as e:
+            raise HTTPError(422, f"render failed: {type(e).__name__}: {e}")
+        fname = body.get("filename") or timestamped_filename(role=preset.get("TITLE_MAIN") or "Role")
+        return Response(docx, media_type=DOCX_MIME,
+                        headers={"Content-Disposition": f'attachment; filename="{fname}"'})
+
+    return Starlette(routes=[
+        Route("/health", handler(health), methods=["GET"]),
+        Route("/extract", handler(extract), methods=["POST"]),
+        Route("/templates", handler(upload_template), methods=["POST"]),
+        Route("/tailor", handler(tailor), methods=["POST"]),
+        Route("/render", handler(render), methods=["POST"]),
+    ])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Serve the tailoring pipeline over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--models", default=None,
+                    help="Comma-separated model cascade, cheapest first (default: RESUME_TAILOR_MODELS or gpt-4o-mini,gpt-4o)")
+    ap.add_argument("--fake", action="store_true", help="Use the offline fake LLM (core.fakes)")
+    ap.add_argument("--fake-latency", type=float, default=0.5, help="Seconds per fake LLM request")
+    ap.add_argument("--llm-concurrency", type=int, default=8, help="Tailor requests running at once")
+    ap.add_argument("--llm-queue", type=int, default=16, help="Tailor requests allowed to wait (then 429)")
+    ap.add_argument("--cpu-concurrency", type=int, default=4, help="Extract/render requests running at once")
+    ap.add_argument("--cpu-queue", type=int, default=32, help="Extract/render requests allowed to wait")
+    ap.add_argument("--deadline", type=float, default=180.0, help="Max LLM seconds per tailor request")
+    args = ap.parse_args(argv)
+
+    import uvicorn
+
+    client = None
+    if args.fake:
+        from core.fakes import FakeOpenAIClient
+        client = FakeOpenAIClient(latency=args.fake_latency)
+    elif get_openai_client() is None:
+        print("OPENAI_API_KEY not set; /tailor will answer 503 (use --fake to run offline).", file=sys.stderr)
+    app = create_app(client=client, models=[m.strip() for m in (args.models or "").split(",") if m.strip()] or None,
+                     llm_concurrency=args.llm_concurrency, llm_queue=args.llm_queue,
+                     cpu_concurrency=args.cpu_concurrency, cpu_queue=args.cpu_queue,
+                     max_deadline_s=args.deadline)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+# core/batch.py
+"""
+Headless batch pipeline: tailor a whole folder of JDs in one go.
+
+    python -m core.batch jds/ --out out/ --template templates/resume_template.docx
+
+For every JD file (PDF/DOCX/TXT) it runs the same flow as the Streamlit app
+(build_user_prompt -> core.pipeline.generate -> json_convert ->
+render_docx_bytes) and writes <name>.json and <name>.docx to the output dir.
+
+LLM calls run with bounded asyncio concurrency behind a requests/tokens per
+minute limiter; the CPU steps around them run on worker threads so the event
+loop stays free, and DOCX rendering goes to a process pool.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import get_experience_text, get_model_cascade, get_openai_client
+from core.parsers import extract_text_from_bytes, parse_skill_buckets
+from core.prompts import SYSTEM_PROMPT, build_user_prompt
+from core.modify import json_convert
+from core.docx_render import render_docx_bytes, template_variables, required_preset_keys, SKILL_ARRAY_KEYS
+from core.layout import get_template_layout, auto_wrap, fit_to_pages
+from core.skills import match_skills
+from core.jdclean import compress_jd, estimate_tokens
+from core.relevance import rank_preset_bullets
+from core.metrics import RunMetrics, emit_run
+from core.experience import get_experience_model
+from core.pipeline import generate
+
+BUCKETS = ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
+JD_SUFFIXES = (".pdf", ".docx", ".txt")
+
+
+class RateLimiter:
+    """
+    Sliding 60s window limiter for requests-per-minute and tokens-per-minute.
+    A limit of 0/None disables that dimension.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._events: deque = deque()  # (timestamp, tokens)
+        self._tokens = 0
+        self._lock = asyncio.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= self.window:
+            _, t = self._events.popleft()
+            self._tokens -= t
+
+    async def acquire(self, tokens: int, requests: int = 1) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                req_ok = not self.rpm or not self._events or len(self._events) + requests <= self.rpm
+                # A single request larger than the whole TPM budget is let through alone.
+                tok_ok = not self.tpm or not self._events or self._tokens + tokens <= self.tpm
+                if req_ok and tok_ok:
+                    per_request = tokens // requests
+                    for _ in range(requests):
+                        self._events.append((now, per_request))
+                    self._tokens += per_request * requests
+                    return
+                await asyncio.sleep(max(0.01, self.window - (now - self._events[0][0])))
+
+
+def _iter_jd_files(jd_dir: Path) -> List[Path]:
+    return sorted(p for p in jd_dir.iterdir() if p.is_file() and p.suffix.lower() in JD_SUFFIXES)
+
+
+def _plan(jd_text: str, *, client, experience: str, skill_inventory: dict, local_skills: bool, fanout: bool,
+          template_keys: Optional[frozenset], candidates: int, model: str, models: List[str],
+          temperature: float, max_tokens: int, use_cache: bool, deadline_s: Optional[float], hedge: bool,
+          trim_jd: bool, run: RunMetrics) -> Tuple[Dict[str, Any], int, int]:
+    """
+    Skill matching, JD trimming and the prompt for one JD (CPU work, run on a
+    worker thread). Returns (generate() parameters, requests, tokens) where
+    the last two are what the rate limiter is asked for.
+    """
+    local = match_skills(jd_text, skill_inventory, buckets=BUCKETS) if local_skills else None
+    jd_prompt = jd_text  # what the model sees; matching and relevance use the full JD
+    if trim_jd:
+        jd_report = {}
+        with run.span("jd_compress"):
+            jd_prompt = compress_jd(jd_text, skill_inventory, buckets=BUCKETS, report=jd_report) or jd_text
+        run.set("jd_tokens_before", jd_report["jd_compression"]["tokens_before"])
+        run.set("jd_tokens_after", jd_report["jd_compression"]["tokens_after"])
+    exp_model = get_experience_model(experience)
+    wanted = exp_model.select(template_keys)
+    want_skills = template_keys is None or bool(template_keys & SKILL_ARRAY_KEYS)
+    user_prompt = build_user_prompt(
+        job_description=jd_prompt,
+        experience_text=experience if len(wanted) == len(exp_model.sections) else exp_model.source_text(wanted),
+        skill_inventory=skill_inventory,
+        buckets=BUCKETS,
+        include_skills=want_skills and not local_skills
+    )
+    fan_out = fanout and bool(wanted)
+    if fan_out:
+        n_req = len(wanted) + (0 if local or not want_skills else 1)
+        tokens = (estimate_tokens(SYSTEM_PROMPT) * n_req + estimate_tokens(experience)
+                  + estimate_tokens(jd_prompt) * n_req + 700 * n_req)
+    else:
+        n_req = 1
+        tokens = estimate_tokens(SYSTEM_PROMPT + user_prompt) + max_tokens * max(1, candidates)
+    params = dict(
+        client=client, jd_text=jd_prompt, user_prompt=user_prompt, experience_text=experience,
+        skill_inventory=skill_inventory, buckets=BUCKETS, local=local, sections=wanted,
+        experience=exp_model, include_skills=want_skills, fan_out=fan_out, n_candidates=candidates,
+        model=model, models=models, temperature=temperature, max_tokens=max_tokens,
+        use_cache=use_cache, metrics=run, deadline_s=deadline_s, hedge=hedge
+    )
+    return params, n_req, tokens
+
+
+def _convert(result: Dict[str, Any], params: Dict[str, Any], path: Path, out_dir: Path, jd_text: str,
+             template_bytes: Optional[bytes], reorder: bool, top_k: Optional[int], fit_pages: Optional[int],
+             auto_wrap_width: bool, wrap_width: int, wrap_trigger: int,
+             run: RunMetrics) -> Tuple[Dict[str, Any], int, int]:
+    """json_convert, relevance ordering, <stem>.json and page fitting (CPU work, run on a worker thread)."""
+    tailored, local = result["data"], params["local"]
+    with run.span("json_convert"):
+        convert_report = {}
+        preset = json_convert(tailored, missing_skills=local["missing_skills"] if local else None,
+                              experience=params["experience"], report=convert_report)
+    run.set("near_duplicates_removed", len(convert_report.get("near_duplicates") or []))
+    if reorder or top_k:
+        with run.span("relevance"):
+            preset = rank_preset_bullets(preset, jd_text, top_k=top_k)
+
+    (out_dir / f"{path.stem}.json").write_text(
+        json.dumps({"jd_file": path.name, "tailored": tailored, "preset": preset}, indent=2),
+        encoding="utf-8"
+    )
+    if template_bytes is not None and (fit_pages or auto_wrap_width):
+        with run.span("layout"):
+            layout = get_template_layout(template_bytes)
+            if auto_wrap_width:
+                wrap_width, wrap_trigger = auto_wrap(layout, preset)
+            if fit_pages:
+                fit_report = {}
+                preset = fit_to_pages(layout, preset, fit_pages, jd_text=jd_text, wrap_width=wrap_width,
+                                      wrap_trigger=wrap_trigger, report=fit_report)
+                run.set("trimmed_to_fit", len(fit_report["fit"]["trimmed"]))
+                run.set("fits_pages", fit_report["fit"]["fits"])
+    return preset, wrap_width, wrap_trigger
+
+
+async def _tailor_one(path: Path, out_dir: Path, *, client, experience: str, skill_inventory: dict,
+                      template_bytes: Optional[bytes], limiter: RateLimiter, llm_slots: asyncio.Semaphore,
+                      render_pool: Executor, model: str, temperature: float, max_tokens: int,
+                      wrap_width: int, wrap_trigger: int, use_cache: bool,
+                      local_skills: bool, fanout: bool,
+                      template_keys: Optional[frozenset] = None,
+                      candidates: int = 1, reorder: bool = True,
+                      top_k: Optional[int] = None,
+                      deadline_s: Optional[float] = None,
+                      fit_pages: Optional[int] = None, auto_wrap_width: bool = False,
+                      models: Optional[List[str]] = None, trim_jd: bool = True,
+                      hedge: bool = False) -> Dict[str, Any]:
+    """
+    One JD through core.pipeline.generate (fan-out / candidates / single call,
+    validation and the model cascade), then json_convert and rendering. Only
+    awaiting happens on the event loop: extraction, planning, generation and
+    conversion run on worker threads, rendering in `render_pool`.
+    """
+    loop = asyncio.get_running_loop()
+    result: Dict[str, Any] = {"jd": str(path), "ok": False}
+    start = time.time()
+    run = RunMetrics("batch")
+    run.set("jd_file", path.name)
+    try:
+        data = path.read_bytes()
+        with run.span("extract"):
+            jd_text = (await asyncio.to_thread(extract_text_from_bytes, path.name, data)).strip()
+        if not jd_text:
+            raise ValueError("no text could be extracted")
+
+        async with llm_slots:  # the deadline inside generate() starts once a slot is ours
+            params, n_req, tokens = await asyncio.to_thread(
+                _plan, jd_text, client=client, experience=experience, skill_inventory=skill_inventory,
+                local_skills=local_skills, fanout=fanout, template_keys=template_keys, candidates=candidates,
+                model=model, models=models or [model], temperature=temperature, max_tokens=max_tokens,
+                use_cache=use_cache, deadline_s=deadline_s, hedge=hedge, trim_jd=trim_jd, run=run
+            )
+            await limiter.acquire(tokens, requests=n_req)
+            generated = await asyncio.to_thread(generate, **params)
+        if generated.get("section_errors"):
+            result["section_errors"] = generated["section_errors"]
+        if generated["data"] is None:
+            issues = generated.get("validation") or []
+            (out_dir / f"{path.stem}.raw.txt").write_text(generated.get("raw") or "", encoding="utf-8")
+            raise ValueError("; ".join(f"{i['header'] or i['section']}: {i['message']}" for i in issues[:3])
+                             if issues and issues[0]["section"] != "output"
+                             else "could not parse JSON from model output")
+        preset, wrap_width, wrap_trigger = await asyncio.to_thread(
+            _convert, generated, params, path, out_dir, jd_text, template_bytes, reorder, top_k,
+            fit_pages, auto_wrap_width, wrap_width, wrap_trigger, run
+        )
+        result["json"] = str(out_dir / f"{path.stem}.json")
+
+        if template_bytes is not None:
+            with run.span("docx_render"):
+                docx_bytes = await loop.run_in_executor(
+                    render_pool, render_docx_bytes, template_bytes, preset, wrap_width, wrap_trigger
+                )
+            docx_path = out_dir / f"{path.stem}.docx"
+            docx_path.write_bytes(docx_bytes)
+            result["docx"] = str(docx_path)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        run.status = "error"
+    result["elapsed"] = time.time() - start
+    emit_run(run)
+    return result
+
+
+async def tailor_directory(jd_dir, out_dir, *, client=None, experience: Optional[str] = None,
+                           template_bytes: Optional[bytes] = None,
+                           concurrency: int = 4, rpm: Optional[int] = 60, tpm: Optional[int] = 200_000,
+                           render_workers: Optional[int] = None,
+                           model: str = "gpt-4o-mini", temperature: float = 0.25, max_tokens: int = 2800,
+                           wrap_width: int = 100, wrap_trigger: int = 105,
+                           use_cache: bool = True, local_skills: bool = True,
+                           fanout: bool = False, candidates: int = 1,
+                           reorder: bool = True, top_k: Optional[int] = None,
+                           deadline_s: Optional[float] = 300.0,
+                           fit_pages: Optional[int] = None,
+                           auto_wrap_width: bool = False,
+                           models: Optional[List[str]] = None,
+                           trim_jd: bool = True, hedge: bool = False) -> List[Dict[str, Any]]:
+    """
+    Tailor every JD file in `jd_dir`, writing <stem>.json (+ <stem>.docx when a
+    template is given) into `out_dir`. Returns one result dict per JD; failures
+    are reported in the result instead of aborting the batch. `deadline_s`
+    caps each JD's LLM time, retries included. `fit_pages` trims the least
+    relevant bullets until the layout estimate fits (core.layout). `models`
+    is the cascade (cheapest first) tried when output fails core.schema;
+    it defaults to just `model`. `trim_jd` removes JD boilerplate before
+    prompting (core.jdclean). `hedge` sends a duplicate of requests slower
+    than the recent p95 (core.resilience).
+    """
+    models = list(models or [model])
+    model = models[0]
+    jd_dir, out_dir = Path(jd_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    client = client if client is not None else get_openai_client()
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY not set. Configure env or Streamlit Secrets.")
+    experience = experience if experience is not None else get_experience_text()
+    skill_inventory = parse_skill_buckets(experience, BUCKETS=BUCKETS)
+    template_keys = required_preset_keys(template_variables(template_bytes)) if template_bytes is not None else None
+
+    limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    llm_slots = asyncio.Semaphore(max(1, concurrency))
+    with ProcessPoolExecutor(max_workers=render_workers) as render_pool:
+        tasks = [
+            _tailor_one(p, out_dir, client=client, experience=experience, skill_inventory=skill_inventory,
+                        template_bytes=template_bytes, limiter=limiter, llm_slots=llm_slots,
+                        render_pool=render_pool, model=model, temperature=temperature,
+                        max_tokens=max_tokens, wrap_width=wrap_width, wrap_trigger=wrap_trigger,
+                        use_cache=use_cache, local_skills=local_skills, fanout=fanout,
+                        template_keys=template_keys, candidates=candidates,
+                        reorder=reorder, top_k=top_k, deadline_s=deadline_s,
+                        fit_pages=fit_pages, auto_wrap_width=auto_wrap_width, models=models,
+                        trim_jd=trim_jd, hedge=hedge)
+            for p in _iter_jd_files(jd_dir)
+        ]
+        return await asyncio.gather(*tasks)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Tailor a folder of JDs (PDF/DOCX/TXT) into JSON + DOCX resumes.")
+    ap.add_argument("jd_dir", help="Folder containing JD files")
+    ap.add_argument("--out", default="out", help="Output folder (default: out)")
+    ap.add_argument("--template", default="templates/resume_template.docx",
+                    help="DOCX template; pass '' to skip DOCX rendering")
+    ap.add_argument("--concurrency", type=int, default=4, help="Max in-flight LLM requests")
+    ap.add_argument("--rpm", type=int, default=60, help="Requests per minute limit (0 = off)")
+    ap.add_argument("--tpm", type=int, default=200_000, help="Tokens per minute limit (0 = off)")
+    ap.add_argument("--render-workers", type=int, default=None, help="DOCX render processes")
+    ap.add_argument("--model", default=None, help="Use only this model (no escalation)")
+    ap.add_argument("--models", default=None,
+                    help="Comma-separated cascade, cheapest first; the next model is used only when output "
+                         "fails validation (default: RESUME_TAILOR_MODELS or gpt-4o-mini,gpt-4o)")
+    ap.add_argument("--temperature", type=float, default=0.25)
+    ap.add_argument("--max-tokens", type=int, default=2800)
+    ap.add_argument("--wrap-width", type=int, default=100)
+    ap.add_argument("--wrap-trigger", type=int, default=105)
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    ap.add_argument("--no-trim-jd", action="store_true",
+                    help="Send the JD as extracted instead of dropping boilerplate/duplicate lines first")
+    ap.add_argument("--llm-skills", action="store_true",
+                    help="Let the model compute keywords/missing skills instead of the local matcher")
+    ap.add_argument("--fanout", action="store_true",
+                    help="One concurrent request per [Job]/[Project] section instead of one big prompt")
+    ap.add_argument("--candidates", type=int, default=1,
+                    help="Generate N candidates per JD in one request and keep the best-scoring one")
+    ap.add_argument("--no-reorder", action="store_true",
+                    help="Keep the model's bullet order instead of ordering by JD relevance")
+    ap.add_argument("--top-k", type=int, default=0, help="Keep only the K most JD-relevant bullets per section")
+    ap.add_argument("--deadline", type=float, default=300.0,
+                    help="Seconds of LLM time per JD, retries included (0 = none)")
+    ap.add_argument("--fit-pages", type=int, default=0,
+                    help="Drop the least JD-relevant bullets until the resume fits N pages (estimated)")
+    ap.add_argument("--auto-wrap", action="store_true",
+                    help="Derive wrap width from the template's font and margins (overrides --wrap-width)")
+    ap.add_argument("--hedge", action="store_true",
+                    help="Send a duplicate of any request slower than the recent p95 (costs tokens)")
+    args = ap.parse_args(argv)
+
+    template_bytes = None
+    if args.template:
+        try:
+            template_bytes = Path(args.template).read_bytes()
+        except FileNotFoundError:
+            print(f"Template not found: {args.template} (JSON only)", file=sys.stderr)
+
+    models = ([args.model] if args.model else
+              [m.strip() for m in (args.models or "").split(",") if m.strip()] or list(get_model_cascade()))
+    start = time.time()
+    results = asyncio.run(tailor_directory(
+        args.jd_dir, args.out,
+        template_bytes=template_bytes,
+        concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm,
+        render_workers=args.render_workers,
+        models=models, temperature=args.temperature, max_tokens=args.max_tokens,
+        wrap_width=args.wrap_width, wrap_trigger=args.wrap_trigger,
+        use_cache=not args.no_cache,
+        local_skills=not args.llm_skills,
+        fanout=args.fanout,
+        candidates=args.candidates,
+        reorder=not args.no_reorder,
+        top_k=args.top_k or None,
+        deadline_s=args.deadline or None,
+        fit_pages=args.fit_pages or None,
+        auto_wrap_width=args.auto_wrap,
+        trim_jd=not args.no_trim_jd,
+        hedge=args.hedge
+    ))
+    failed = [r for r in results if not r["ok"]]
+    for r in results:
+        status = "ok " if r["ok"] else "ERR"
+        print(f"[{status}] {r['jd']} ({r['elapsed']:.1f}s) {r.get('error', '')}".rstrip())
+        for header, error in (r.get("section_errors") or {}).items():
+            print(f"      no bullets for {header}: {error}")
+    print(f"{len(results) - len(failed)}/{len(results)} tailored in {time.time() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
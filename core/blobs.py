@@ -0,0 +1,171 @@
+# core/blobs.py
+"""
+Process-wide, content-addressed store for large byte blobs (templates,
+rendered DOCX files), so sessions hold a hash instead of their own copy.
+
+    ref = get_blob_store().put(uploaded_bytes)   # BlobRef; identical bytes are stored once
+    ss.template = ref                            # the session keeps only the handle
+    render(ref.data)                             # the shared bytes object, no copy
+
+- Reference counted: every BlobRef is one reference, dropped when the ref is
+  garbage-collected (e.g. with its Streamlit session) or release()d. A blob
+  with no references left is deleted from memory and disk.
+- Memory-capped: past `max_memory` bytes, the least recently used blobs are
+  spilled to `spill_dir` and read back (and promoted again) on next access.
+"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+DEFAULT_SPILL_DIR = os.path.join(".cache", "blobs")
+
+
+class BlobRef:
+    """One counted reference to a stored blob."""
+
+    __slots__ = ("key", "size", "_store", "_finalizer", "__weakref__")
+
+    def __init__(self, store: "BlobStore", key: str, size: int):
+        self.key = key
+        self.size = size
+        self._store = store
+        self._finalizer = weakref.finalize(self, store.release, key)
+
+    @property
+    def data(self) -> bytes:
+        return self._store.get(self.key)
+
+    def release(self) -> None:
+        """Drop this reference now instead of at garbage collection."""
+        self._finalizer()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BlobRef) and other.key == self.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"BlobRef({self.key[:12]}, {self.size} bytes)"
+
+
+class BlobStore:
+    def __init__(self, max_memory: int = 128 * 1024 * 1024, spill_dir: str = DEFAULT_SPILL_DIR):
+        self.max_memory = max_memory
+        # per-process directory: another process releasing a blob must not delete ours
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=spill_dir)
+        atexit.register(shutil.rmtree, self.spill_dir, True)
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()  # LRU order
+        self._mem_bytes = 0
+        self._refs: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        self._on_disk: set = set()
+        self._lock = threading.RLock()  # release() may run from a GC finalizer while it is held
+        self.spills = 0
+        self.loads = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, key)
+
+    def put(self, data: Union[bytes, bytearray, memoryview]) -> BlobRef:
+        """Store `data` (deduplicated by content) and return a new reference to it."""
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if key not in self._refs:
+                self._refs[key] = 0
+                self._sizes[key] = len(data)
+                self._remember(key, data)
+            self._refs[key] += 1
+        return BlobRef(self, key, len(data))
+
+    def ref(self, key: str) -> Optional[BlobRef]:
+        """Another reference to an already stored blob (None if it is gone)."""
+        with self._lock:
+            if key not in self._refs:
+                return None
+            self._refs[key] += 1
+            return BlobRef(self, key, self._sizes[key])
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                return data
+            if key not in self._on_disk:
+                raise KeyError(key)
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            self.loads += 1
+            self._remember(key, data)
+            return data
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            n = self._refs.get(key)
+            if n is None:
+                return
+            if n > 1:
+                self._refs[key] = n - 1
+                return
+            del self._refs[key], self._sizes[key]
+            data = self._mem.pop(key, None)
+            if data is not None:
+                self._mem_bytes -= len(data)
+            if key in self._on_disk:
+                self._on_disk.discard(key)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Put `data` in memory, spilling least recently used blobs past the cap (lock held)."""
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        while self._mem_bytes > self.max_memory and len(self._mem) > 1:
+            old, blob = self._mem.popitem(last=False)
+            self._mem_bytes -= len(blob)
+            if old not in self._on_disk:
+                tmp = self._path(old) + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp, self._path(old))
+                self._on_disk.add(old)
+                self.spills += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "blobs": len(self._refs),
+                "refs": sum(self._refs.values()),
+                "bytes": sum(self._sizes.values()),
+                "memory_bytes": self._mem_bytes,
+                "on_disk": len(self._on_disk),
+                "spills": self.spills,
+                "loads": self.loads,
+            }
+
+
+_STORE: Optional[BlobStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide store; the memory cap can be set with RESUME_TAILOR_BLOB_MAX_MB."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = BlobStore(max_memory=int(float(os.getenv("RESUME_TAILOR_BLOB_MAX_MB", "128")) * 1024 * 1024),
+                               spill_dir=os.getenv("RESUME_TAILOR_BLOB_DIR", DEFAULT_SPILL_DIR))
+        return _STORE
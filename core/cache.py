@@ -0,0 +1,177 @@
+# core/cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+
+
+class LLMCache:
+    """
+    Disk-backed, content-addressed cache for LLM completions.
+
+    - Backed by SQLite (WAL mode), so it survives restarts and is safe when
+      several Streamlit sessions / processes read and write it at once.
+    - Entries are evicted least-recently-used once `max_entries` or
+      `max_bytes` is exceeded, and dropped once older than `max_age_s`.
+    - Hit/miss counters (and the LLM seconds saved by hits) are persisted
+      alongside the entries.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 max_entries: int = 2000,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 max_age_s: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._local = threading.local()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._conn() as c:
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key         TEXT PRIMARY KEY,
+                    value       TEXT NOT NULL,
+                    size        INTEGER NOT NULL,
+                    elapsed     REAL NOT NULL DEFAULT 0,
+                    created     REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            c.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS stats (
+                    id            INTEGER PRIMARY KEY CHECK (id = 1),
+                    hits          INTEGER NOT NULL DEFAULT 0,
+                    misses        INTEGER NOT NULL DEFAULT 0,
+                    saved_seconds REAL    NOT NULL DEFAULT 0
+                )""")
+            c.execute("INSERT OR IGNORE INTO stats (id) VALUES (1)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread: Streamlit runs each session in its own thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int,
+                 system_prompt: str, user_prompt: str) -> str:
+        """Stable hash of everything that determines the completion."""
+        payload = json.dumps(
+            [model, round(float(temperature), 4), int(max_tokens), system_prompt, user_prompt],
+            ensure_ascii=False, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        c = self._conn()
+        row = c.execute(
+            "SELECT value, elapsed, created FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and now - row[2] > self.max_age_s:
+            c.execute("DELETE FROM entries WHERE key = ?", (key,))
+            row = None
+        if row is None:
+            c.execute("UPDATE stats SET misses = misses + 1 WHERE id = 1")
+            return None
+        c.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        c.execute(
+            "UPDATE stats SET hits = hits + 1, saved_seconds = saved_seconds + ? WHERE id = 1",
+            (row[1],),
+        )
+        return row[0]
+
+    def put(self, key: str, value: str, elapsed: float = 0.0) -> None:
+        now = time.time()
+        c = self._conn()
+        c.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, elapsed, created, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), float(elapsed), now, now),
+        )
+        self.evict(now)
+
+    def evict(self, now: Optional[float] = None) -> None:
+        """Drop expired entries, then least-recently-used ones until within limits."""
+        now = time.time() if now is None else now
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.execute("DELETE FROM entries WHERE created < ?", (now - self.max_age_s,))
+            count, total = c.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                drop_n = 0
+                for (size,) in c.execute("SELECT size FROM entries ORDER BY last_access ASC"):
+                    if count - drop_n <= self.max_entries and total <= self.max_bytes:
+                        break
+                    drop_n += 1
+                    total -= size
+                c.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY last_access ASC LIMIT ?)",
+                    (drop_n,),
+                )
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        c = self._conn()
+        hits, misses, saved = c.execute(
+            "SELECT hits, misses, saved_seconds FROM stats WHERE id = 1"
+        ).fetchone()
+        count, total = c.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "saved_seconds": saved,
+            "entries": count,
+            "bytes": total,
+        }
+
+    def clear(self) -> None:
+        c = self._conn()
+        c.execute("DELETE FROM entries")
+        c.execute("UPDATE stats SET hits = 0, misses = 0, saved_seconds = 0 WHERE id = 1")
+
+
+_DEFAULT_CACHE: Optional[LLMCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    Process-wide cache instance. Location/limits can be overridden with
+    RESUME_TAILOR_CACHE_PATH, RESUME_TAILOR_CACHE_MAX_ENTRIES,
+    RESUME_TAILOR_CACHE_MAX_MB and RESUME_TAILOR_CACHE_MAX_AGE_DAYS.
+    """
+    global _DEFAULT_CACHE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = LLMCache(
+                path=os.getenv("RESUME_TAILOR_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(os.getenv("RESUME_TAILOR_CACHE_MAX_ENTRIES", "2000")),
+                max_bytes=int(float(os.getenv("RESUME_TAILOR_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                max_age_s=float(os.getenv("RESUME_TAILOR_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+            )
+        return _DEFAULT_CACHE
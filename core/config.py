@@ -1,5 +1,6 @@
 # core/config.py
 import os
+import threading
 from dotenv import load_dotenv
 import streamlit as st
 
@@ -13,31 +14,90 @@ def _safe_secret(key: str):
     except Exception:
         return None
 
+_FILE_CACHE = {}
+_FILE_CACHE_LOCK = threading.Lock()
+
+def _file_stamp(path: str):
+    """(mtime_ns, size) of a file, or None when it does not exist."""
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    return (st_.st_mtime_ns, st_.st_size)
+
+def read_file_cached(path: str, binary: bool = False):
+    """
+    Read a file once per process and serve it from memory until its
+    mtime/size changes. Returns None when the file does not exist.
+    """
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return None
+    key = (os.path.abspath(path), binary)
+    with _FILE_CACHE_LOCK:
+        hit = _FILE_CACHE.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+    if binary:
+        with open(path, "rb") as f:
+            data = f.read()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = f.read()
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE[key] = (stamp, data)
+    return data
+
+_EXPERIENCE_CACHE = {"key": None, "value": None}
+
 def get_experience_text() -> str:
     """
     Load fixed experience from (in order):
       1) ENV var RESUME_EXPERIENCE (via .env or exported)
       2) Streamlit secrets (RESUME_EXPERIENCE) if present
       3) local 'experience.txt'
+    Memoized per process; re-read only when the env/secret value or the
+    file's mtime/size changes.
     """
-    exp = os.getenv("RESUME_EXPERIENCE")
-    if not exp:
-        exp = _safe_secret("RESUME_EXPERIENCE")
-    if exp:
-        return exp.strip()
-
-    if os.path.exists("experience.txt"):
-        return open("experience.txt", "r", encoding="utf-8").read().strip()
+    env = os.getenv("RESUME_EXPERIENCE")
+    secret = None if env else _safe_secret("RESUME_EXPERIENCE")
+    key = (env, secret, _file_stamp("experience.txt"))
+    if _EXPERIENCE_CACHE["key"] == key:
+        return _EXPERIENCE_CACHE["value"]
 
-    return "YOUR EXPERIENCE TEXT NOT FOUND. Please set RESUME_EXPERIENCE env var or create experience.txt."
+    exp = env or secret
+    if exp:
+        value = exp.strip()
+    else:
+        text = read_file_cached("experience.txt")
+        if text is not None:
+            value = text.strip()
+        else:
+            value = "YOUR EXPERIENCE TEXT NOT FOUND. Please set RESUME_EXPERIENCE env var or create experience.txt."
+    _EXPERIENCE_CACHE["key"], _EXPERIENCE_CACHE["value"] = key, value
+    return value
 
 @st.cache_resource
 def get_openai_client():
-    from openai import OpenAI
     key = os.getenv("OPENAI_API_KEY")
     try:
         if not key:
             key = st.secrets.get("OPENAI_API_KEY")  # guarded by try/except in your setup
     except Exception:
         pass
-    return OpenAI(api_key=key) if key else None
\ No newline at end of file
+    if not key:
+        return None
+    from openai import OpenAI  # heavy import; only when a client is actually created
+    return OpenAI(api_key=key, max_retries=0)  # retries/timeouts are handled in core.resilience
+
+DEFAULT_MODEL_CASCADE = ("gpt-4o-mini", "gpt-4o")
+
+def get_model_cascade() -> tuple:
+    """
+    Models to try in order, cheapest first; a run only moves to the next one
+    when the output fails core.schema validation. Override with
+    RESUME_TAILOR_MODELS="model-a,model-b" (a single model disables escalation).
+    """
+    env = os.getenv("RESUME_TAILOR_MODELS", "")
+    models = tuple(m.strip() for m in env.split(",") if m.strip())
+    return models or DEFAULT_MODEL_CASCADE
@@ -0,0 +1,236 @@
+# core/dedupe.py
+"""
+Near-duplicate detection for bullets (MinHash + LSH banding, NumPy).
+
+Each bullet becomes a set of word k-shingles; MinHash signatures are
+computed for all bullets at once, LSH bands propose candidate pairs, and
+candidates are confirmed by comparing signatures (estimated Jaccard).
+
+    clusters = near_duplicate_clusters(bullets, threshold=0.4)
+    kept, removed = drop_near_duplicates({"EXTRA_BULLETS_TEK": [...], ...})
+"""
+
+import re
+import zlib
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # numpy is imported on first use, keeping it off the app's startup path
+    import numpy as np
+
+NEAR_DUP_THRESHOLD = 0.4   # estimated Jaccard of word-bigram sets
+NUM_PERM = 128
+SHINGLE = 2
+KEEP_POLICIES = ("first", "longest", "balanced")
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#%.]*")
+_MAX_CHUNK = 1 << 13  # shingles hashed per vectorized block (bounds temp memory)
+
+
+def shingle_hashes(text: str, k: int = SHINGLE) -> "np.ndarray":
+    """Distinct 32-bit hashes of the word k-shingles of `text` (stable across processes)."""
+    import numpy as np
+
+    toks = _TOKEN_RE.findall((text or "").lower())
+    if len(toks) < k:
+        grams = {" ".join(toks)} if toks else set()
+    else:
+        grams = {" ".join(toks[i:i + k]) for i in range(len(toks) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """Multiply-shift MinHash over `num_perm` hash functions, fixed by `seed`."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: "np.ndarray") -> "np.ndarray":
+        """(num_perm,) signature of one set; same values as signatures(), without the batching overhead."""
+        import numpy as np
+
+        if not len(shingles):
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        with np.errstate(over="ignore"):
+            return ((shingles[:, None] * self.a + self.b) >> np.uint64(32)).astype(np.uint32).min(axis=0)
+
+    def signatures(self, shingle_sets: Sequence["np.ndarray"]) -> "np.ndarray":
+        """(n, num_perm) uint32 signatures; an empty set gets all-0xFFFFFFFF."""
+        import numpy as np
+
+        n = len(shingle_sets)
+        sig = np.full((n, self.num_perm), 0xFFFFFFFF, dtype=np.uint32)
+        idx = [i for i, s in enumerate(shingle_sets) if len(s)]
+        start = 0
+        while start < len(idx):
+            # group whole bullets into blocks of ~_MAX_CHUNK shingles
+            stop, total = start, 0
+            while stop < len(idx) and (total == 0 or total + len(shingle_sets[idx[stop]]) <= _MAX_CHUNK):
+                total += len(shingle_sets[idx[stop]])
+                stop += 1
+            block = idx[start:stop]
+            flat = np.concatenate([shingle_sets[i] for i in block])
+            offsets = np.cumsum([0] + [len(shingle_sets[i]) for i in block[:-1]])
+            with np.errstate(over="ignore"):  # uint64 wrap-around is the hash
+                h = ((flat[:, None] * self.a + self.b) >> np.uint64(32)).astype(np.uint32)
+            sig[block] = np.minimum.reduceat(h, offsets, axis=0)
+            start = stop
+        return sig
+
+
+def _bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) whose LSH S-curve midpoint (1/b)^(1/r) sits just under `threshold`."""
+    best = (num_perm, 1)
+    best_err = float("inf")
+    for r in range(1, num_perm + 1):
+        if num_perm % r:
+            continue
+        b = num_perm // r
+        mid = (1.0 / b) ** (1.0 / r)
+        err = threshold - mid if mid <= threshold else 2 * (mid - threshold)  # prefer recall
+        if err < best_err:
+            best, best_err = (b, r), err
+    return best
+
+
+def near_duplicate_pairs(texts: Sequence[str], threshold: float = NEAR_DUP_THRESHOLD,
+                         num_perm: int = NUM_PERM, k: int = SHINGLE,
+                         hasher: Optional[MinHasher] = None) -> List[Tuple[int, int, float]]:
+    """[(i, j, estimated_jaccard)] with i < j for every pair at or above `threshold`."""
+    import numpy as np
+
+    n = len(texts)
+    if n < 2:
+        return []
+    hasher = hasher or _hasher(num_perm)
+    sets = [shingle_hashes(t, k) for t in texts]
+    sig = hasher.signatures(sets)
+    empty = np.array([len(s) == 0 for s in sets])
+
+    b, r = _bands(threshold, hasher.num_perm)
+    cand = set()
+    for band in range(b):
+        rows = np.ascontiguousarray(sig[:, band * r:(band + 1) * r])
+        keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * r))).ravel()
+        _, inv, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inv = inv.ravel()
+        for g in np.flatnonzero(counts > 1):
+            members = np.flatnonzero(inv == g)
+            members = members[~empty[members]]
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    cand.add((int(members[x]), int(members[y])))
+    if not cand:
+        return []
+    pairs = np.array(sorted(cand), dtype=np.int64)
+    est = (sig[pairs[:, 0]] == sig[pairs[:, 1]]).mean(axis=1)
+    hit = est >= threshold
+    return [(int(i), int(j), float(e)) for (i, j), e in zip(pairs[hit], est[hit])]
+
+
+def _cluster(n: int, pairs: Sequence[Tuple[int, int, float]],
+             pick: Callable[[List[int]], int]) -> List[Tuple[int, List[int]]]:
+    """
+    [(representative, [its near-duplicates])]. Pairs are only linked into
+    connected groups to bound the work; inside a group, pick() chooses a
+    representative among the remaining bullets and takes exactly the ones
+    similar to *it*, then repeats on the rest. So A~B, B~C with A, C
+    unrelated gives {A, B} and C on its own, never one A-B-C cluster.
+    """
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    linked: Dict[int, set] = {}
+    for i, j, _ in pairs:
+        linked.setdefault(i, set()).add(j)
+        linked.setdefault(j, set()).add(i)
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    groups: Dict[int, List[int]] = {}
+    for i in linked:
+        groups.setdefault(find(i), []).append(i)
+
+    out = []
+    for group in sorted(groups.values(), key=min):
+        remaining = sorted(group)
+        while len(remaining) > 1:
+            rep = pick(remaining)
+            dups = [x for x in remaining if x in linked[rep]]
+            if dups:
+                out.append((rep, dups))
+            remaining = [x for x in remaining if x != rep and x not in linked[rep]]
+    return out
+
+
+def near_duplicate_clusters(texts: Sequence[str], threshold: float = NEAR_DUP_THRESHOLD,
+                            **kwargs) -> List[List[int]]:
+    """
+    Groups (size >= 2) of near-duplicates: the first index is the group's
+    representative (the earliest bullet) and every other one is similar to
+    it directly, not merely through a chain of similar bullets.
+    """
+    pairs = near_duplicate_pairs(texts, threshold=threshold, **kwargs)
+    return [[rep] + dups for rep, dups in _cluster(len(texts), pairs, min)]
+
+
+def drop_near_duplicates(sections: Dict[str, List[str]], threshold: float = NEAR_DUP_THRESHOLD,
+                         keep: str = "first", **kwargs) -> Tuple[Dict[str, List[str]], List[dict]]:
+    """
+    Remove near-duplicate bullets across all `sections` (dict order = priority).
+    A bullet is dropped only when it is similar to the bullet that is kept in
+    its place; which one is kept is chosen by `keep`:
+      first     earliest section / position
+      longest   the longest wording
+      balanced  the copy in the section with the most bullets left is dropped first,
+                so no section is emptied to keep another one full
+    Returns (sections without the dropped bullets, [{"section", "text", "kept"}]).
+    """
+    if keep not in KEEP_POLICIES:
+        raise ValueError(f"keep must be one of {KEEP_POLICIES}, got {keep!r}")
+    flat = [(name, i, b) for name, bullets in sections.items() for i, b in enumerate(bullets)]
+    pairs = near_duplicate_pairs([b for _, _, b in flat], threshold=threshold, **kwargs)
+    if not pairs:
+        return {name: list(bullets) for name, bullets in sections.items()}, []
+
+    sizes = {name: len(bullets) for name, bullets in sections.items()}
+    if keep == "longest":
+        def pick(xs: List[int]) -> int:
+            return max(xs, key=lambda x: (len(flat[x][2]), -x))
+    elif keep == "balanced":
+        def pick(xs: List[int]) -> int:
+            return min(xs, key=lambda x: (sizes[flat[x][0]], x))
+    else:
+        pick = min
+
+    drop = set()
+    removed = []
+    for winner, dups in _cluster(len(flat), pairs, pick):
+        for x in dups:
+            drop.add(x)
+            sizes[flat[x][0]] -= 1
+            removed.append({"section": flat[x][0], "text": flat[x][2], "kept": flat[winner][2]})
+    out: Dict[str, List[str]] = {name: [] for name in sections}
+    for x, (name, _, b) in enumerate(flat):
+        if x not in drop:
+            out[name].append(b)
+    return out, removed
+
+
+_HASHERS: Dict[int, MinHasher] = {}
+
+
+def _hasher(num_perm: int) -> MinHasher:
+    h = _HASHERS.get(num_perm)
+    if h is None:
+        h = _HASHERS[num_perm] = MinHasher(num_perm)
+    return h
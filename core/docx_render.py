@@ -1,10 +1,18 @@
+import copy
+import hashlib
 import json
+import re
+import threading
+import zipfile
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Iterable, Any, Tuple
-from docxtpl import DocxTemplate, RichText
+from typing import TYPE_CHECKING, Dict, List, Iterable, Any, Optional, Tuple
+
+if TYPE_CHECKING:  # docxtpl (and python-docx/lxml/jinja2 behind it) is imported on first render
+    from docxtpl import RichText
 
 # ----------------------------
 # Text & bullet processing
@@ -65,11 +73,13 @@ def soft_wrap_multiline(text: str, width: int = 100, trigger: int = 105) -> List
     return lines
 
 
-def bullets_to_richtext(bullets: Iterable[str], width: int = 100, trigger: int = 105) -> List[RichText]:
+def bullets_to_richtext(bullets: Iterable[str], width: int = 100, trigger: int = 105) -> List["RichText"]:
     """
     Convert plain bullet strings to RichText, inserting soft line breaks
     so the continuation stays in the same bullet paragraph.
     """
+    from docxtpl import RichText
+
     rts: List[RichText] = []
     for b in bullets:
         b = b.strip()
@@ -111,21 +121,54 @@ EXPECTED_SCALAR_KEYS = [
     "TITLE_INTERN",
 ]
 
+# RichText context key -> the preset list it is built from
+RICH_KEYS = {
+    "RICH_BULLETS_TEK": "EXTRA_BULLETS_TEK",
+    "RICH_BULLETS_ASSOCIATE": "EXTRA_BULLETS_ASSOCIATE",
+    "RICH_BULLETS_INTERN": "EXTRA_BULLETS_INTERN",
+    "RICH_ECOMMERCE": "EXTRA_ECOMMERCE",
+    "RICH_HOSPITAL": "EXTRA_HOSPITAL",
+}
+
+# Preset lists filled from missing_skills
+SKILL_ARRAY_KEYS = frozenset(["EXTRA_PROGRAMMING", "EXTRA_DE", "EXTRA_CLOUD", "EXTRA_DB", "EXTRA_AI", "EXTRA_MISC"])
+
+def required_preset_keys(variables: Optional[Iterable[str]]) -> Optional[frozenset]:
+    """
+    Preset keys (json_convert output) a template with these Jinja variables
+    consumes; RICH_* variables pull in the list they are built from.
+    None (unknown template) means everything.
+    """
+    if variables is None:
+        return None
+    variables = set(variables)
+    keys = {k for k in EXPECTED_SCALAR_KEYS + EXPECTED_ARRAY_KEYS if k in variables}
+    keys.update(src for rich, src in RICH_KEYS.items() if rich in variables)
+    return frozenset(keys)
+
 def build_context_from_json(data: Dict[str, Any],
                             wrap_width: int = 100,
-                            wrap_trigger: int = 105) -> Dict[str, Any]:
+                            wrap_trigger: int = 105,
+                            variables: Optional[Iterable[str]] = None) -> Dict[str, Any]:
     """
     Build the docxtpl context from a JSON-like dict.
     Creates RichText lists for bullets so long items soft-wrap inside one bullet.
+    With `variables` (the template's Jinja variables), only keys the template
+    references are built.
     """
     ctx: Dict[str, Any] = {}
+    needed = required_preset_keys(variables)
+    wanted = (lambda k: True) if needed is None else needed.__contains__
 
     # Scalars
     for k in EXPECTED_SCALAR_KEYS:
-        ctx[k] = str(data.get(k, "") or "")
+        if wanted(k):
+            ctx[k] = str(data.get(k, "") or "")
 
     # Arrays
     for k in EXPECTED_ARRAY_KEYS:
+        if not wanted(k):
+            continue
         val = data.get(k, [])
         if isinstance(val, str):
             # If someone stored bullets as a single '$'-joined string, split it.
@@ -139,22 +182,386 @@ def build_context_from_json(data: Dict[str, Any],
         ctx[k] = [collapse_ws(str(x)) for x in val]
 
     # Rich bullets (use these in the Word template)
-    ctx["RICH_BULLETS_TEK"]       = bullets_to_richtext(ctx["EXTRA_BULLETS_TEK"],       width=wrap_width, trigger=wrap_trigger)
-    ctx["RICH_BULLETS_ASSOCIATE"] = bullets_to_richtext(ctx["EXTRA_BULLETS_ASSOCIATE"], width=wrap_width, trigger=wrap_trigger)
-    ctx["RICH_BULLETS_INTERN"]    = bullets_to_richtext(ctx["EXTRA_BULLETS_INTERN"],    width=wrap_width, trigger=wrap_trigger)
-    ctx["RICH_ECOMMERCE"]         = bullets_to_richtext(ctx["EXTRA_ECOMMERCE"],         width=wrap_width, trigger=wrap_trigger)
-    ctx["RICH_HOSPITAL"]          = bullets_to_richtext(ctx["EXTRA_HOSPITAL"],          width=wrap_width, trigger=wrap_trigger)
+    for rich, src in RICH_KEYS.items():
+        if variables is None or rich in variables:
+            ctx[rich] = bullets_to_richtext(ctx[src], width=wrap_width, trigger=wrap_trigger)
 
     return ctx
 
 
+# ----------------------------
+# Compiled template cache
+# ----------------------------
+
+_JINJA_TAG_RE = re.compile(r"\{[{%#]")
+_XML_TAG_RE = re.compile(r"<(/?)[\w:.-]+(?:\s[^>]*?)?(/?)>")
+_JINJA_OPEN_RE = re.compile(r"\{%-?\s*(?:for|if|with|filter|call|raw|block|autoescape)\b")
+_JINJA_CLOSE_RE = re.compile(r"\{%-?\s*end(?:for|if|with|filter|call|raw|block|autoescape)\b")
+_JINJA_SCOPED_RE = re.compile(r"\{%-?\s*(?:set|macro|extends|include|import|from)\b")
+_XML_DECL = "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+_FOOTNOTES_CT = "application/vnd.openxmlformats-officedocument.wordprocessingml.footnotes+xml"
+_CORE_PROPS = ("author", "comments", "identifier", "language", "subject", "title")
+
+
+def _split_blocks(xml: str) -> Optional[List[str]]:
+    """
+    Cut a patched <w:body> into consecutive pieces that are each valid Jinja
+    on their own: top-level elements, grouped so every {% for/if %} is closed
+    in the piece that opens it. None when the template shares state across
+    the body ({% set %}, macros, includes) and must be rendered whole.
+    """
+    if _JINJA_SCOPED_RE.search(xml):
+        return None
+    cuts, depth = [0], 0
+    for m in _XML_TAG_RE.finditer(xml):
+        if m.group(1):
+            depth -= 1
+        elif not m.group(2):
+            depth += 1
+            if depth == 1:  # the <w:body> tag itself
+                cuts.append(m.end())
+            continue
+        if depth == 1:
+            cuts.append(m.end())
+    cuts.append(len(xml))
+
+    blocks, current, open_tags = [], "", 0
+    for start, end in zip(cuts, cuts[1:]):
+        piece = xml[start:end]
+        current += piece
+        open_tags += len(_JINJA_OPEN_RE.findall(piece)) - len(_JINJA_CLOSE_RE.findall(piece))
+        if open_tags < 0:
+            return None
+        if open_tags == 0 and current:
+            blocks.append(current)
+            current = ""
+    if open_tags or current:
+        return None
+    return blocks
+
+
+@dataclass
+class RenderedDocx:
+    """
+    A rendered package plus what is needed to patch it: the preset and wrap
+    it was rendered from and the rendered XML of every body block / header /
+    footer, so render_docx_incremental() only re-renders what changed.
+    Patching never reads `docx`; callers that keep the bytes elsewhere
+    (core.blobs) may drop it.
+    """
+    docx: bytes
+    template_key: str
+    data: Dict[str, Any]
+    wrap: Tuple[int, int]
+    blocks: Optional[List[str]] = None
+    parts: Optional[Dict[str, bytes]] = None
+    rerendered: int = 0  # blocks + parts rendered for this result (the rest reused)
+
+
+class CompiledTemplate:
+    """
+    A DOCX template parsed and compiled once, rendered many times.
+
+    At build time the package is unzipped once, the body (and any header /
+    footer containing Jinja tags) is run through docxtpl's XML patching and
+    compiled to a Jinja template, and every other zip entry is packed into a
+    pre-built base archive. render() then only does the context
+    substitution, docxtpl's post-processing of the rendered XML, and appends
+    the rendered parts to a copy of the base archive.
+
+    Templates using features the fast path does not replicate (templated
+    core properties or footnotes) fall back to a plain DocxTemplate render.
+
+    `variables` holds the Jinja variables the template references (body,
+    headers, footers), so callers can skip generating and building the rest.
+
+    The body is also split into independent blocks (see _split_blocks):
+    blocks without tags are rendered once here, and render_blocks() re-renders
+    only the blocks whose variables changed since a previous render.
+    """
+
+    def __init__(self, template_bytes: bytes, key: Optional[str] = None):
+        from docxtpl import DocxTemplate
+        from jinja2 import Environment, Template, meta
+
+        self.template_bytes = template_bytes
+        self.key = key or template_hash(template_bytes)
+        self._helper = DocxTemplate(None)  # used only for its stateless XML helpers
+
+        tpl = DocxTemplate(BytesIO(template_bytes))
+        tpl.init_docx()
+        doc = tpl.docx
+
+        self.variables = frozenset(tpl.get_undeclared_template_variables())
+        self.fast = not self._needs_fallback(doc)
+        self._parts: Dict[str, Tuple[Any, str]] = {}  # zip name -> (compiled template, encoding)
+        self._part_vars: Dict[str, frozenset] = {}
+        # body blocks: (compiled template, its variables) or (None, pre-rendered static XML)
+        self._blocks: Optional[List[Tuple[Any, Any]]] = None
+        self._base_zip = b""
+        self._doc_name = doc.part.partname.lstrip("/")
+        self._prefix = self._suffix = ""
+        if not self.fast:
+            self.size = len(template_bytes)
+            return
+
+        # Body: patched + compiled once
+        body_xml = tpl.patch_xml(tpl.get_xml())
+        body_src = re.sub(r"<w:p([ >])", r"\n<w:p\1", body_xml)
+        self._body = Template(body_src)
+        env = Environment()
+        pieces = _split_blocks(body_src)
+        if pieces is not None:
+            self._blocks = []
+            for src in pieces:
+                names = frozenset(meta.find_undeclared_variables(env.parse(src)))
+                if names or _JINJA_TAG_RE.search(src):
+                    self._blocks.append((Template(src), names))
+                elif self._blocks and self._blocks[-1][0] is None:  # merge runs of static XML
+                    self._blocks[-1] = (None, self._blocks[-1][1] + self._post_process(src))
+                else:
+                    self._blocks.append((None, self._post_process(src)))
+
+        # Document envelope around <w:body>
+        root = copy.deepcopy(doc.element)
+        root.body.clear()
+        envelope = tpl.xml_to_string(root)
+        self._prefix, self._suffix = re.split(r"<w:body\s*/>", envelope, maxsplit=1)
+
+        # Headers / footers that actually contain template tags
+        for uri in (DocxTemplate.HEADER_URI, DocxTemplate.FOOTER_URI):
+            for _, part in tpl.get_headers_footers(uri):
+                xml = tpl.get_part_xml(part)
+                if not _JINJA_TAG_RE.search(xml):
+                    continue
+                enc = tpl.get_headers_footers_encoding(xml)
+                xml = re.sub(r"<w:p([ >])", r"\n<w:p\1", tpl.patch_xml(xml))
+                self._parts[part.partname.lstrip("/")] = (Template(xml), enc)
+                self._part_vars[part.partname.lstrip("/")] = frozenset(meta.find_undeclared_variables(env.parse(xml)))
+
+        # Base archive: every entry we never re-render, compressed once
+        skip = {self._doc_name, *self._parts}
+        buf = BytesIO()
+        with zipfile.ZipFile(BytesIO(template_bytes)) as src, \
+                zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                if info.filename not in skip:
+                    dst.writestr(info, src.read(info.filename))
+        self._base_zip = buf.getvalue()
+        self.size = len(template_bytes) + len(self._base_zip) + 4 * (len(body_xml) + len(envelope))
+
+    @staticmethod
+    def _needs_fallback(doc) -> bool:
+        props = doc.core_properties
+        if any(_JINJA_TAG_RE.search(getattr(props, p) or "") for p in _CORE_PROPS):
+            return True
+        for part in doc.part.package.parts:
+            if part.content_type == _FOOTNOTES_CT:
+                blob = part.blob.decode("utf-8", errors="ignore") if isinstance(part.blob, bytes) else part.blob
+                if _JINJA_TAG_RE.search(blob or ""):
+                    return True
+        return False
+
+    def _post_process(self, xml: str) -> str:
+        # Mirrors DocxTemplate.render_xml_part's post-processing.
+        xml = re.sub(r"\n<w:p([ >])", r"<w:p\1", xml)
+        xml = xml.replace("{_{", "{{").replace("}_}", "}}").replace("{_%", "{%").replace("%_}", "%}")
+        return self._helper.resolve_listing(xml)
+
+    def _render_xml(self, template, ctx: Dict[str, Any]) -> str:
+        return self._post_process(template.render(ctx))
+
+    @property
+    def incremental(self) -> bool:
+        return self.fast and self._blocks is not None
+
+    def dirty(self, changed: Optional[Iterable[str]]) -> Tuple[List[int], List[str]]:
+        """Indexes of body blocks and names of header/footer parts that use any `changed` variable (all if None)."""
+        if changed is None:
+            return ([i for i, (t, _) in enumerate(self._blocks or ()) if t is not None], list(self._parts))
+        changed = set(changed)
+        blocks = [i for i, (t, names) in enumerate(self._blocks or ()) if t is not None and names & changed]
+        return blocks, [n for n, names in self._part_vars.items() if names & changed]
+
+    def dirty_variables(self, changed: Optional[Iterable[str]]) -> frozenset:
+        """Variables a context needs for render_blocks(ctx, changed=changed)."""
+        blocks, parts = self.dirty(changed)
+        names = set()
+        for i in blocks:
+            names |= self._blocks[i][1]
+        for n in parts:
+            names |= self._part_vars[n]
+        return frozenset(names)
+
+    def render_blocks(self, ctx: Dict[str, Any], changed: Optional[Iterable[str]] = None,
+                      blocks: Optional[List[str]] = None,
+                      parts: Optional[Dict[str, bytes]] = None) -> Tuple[bytes, List[str], Dict[str, bytes], int]:
+        """
+        Render with the block split: only blocks / parts that use a `changed`
+        variable are rendered from `ctx`; the rest come from `blocks` / `parts`
+        of the previous result. changed=None (or no previous output) renders
+        every dynamic block. Returns (docx, blocks, parts, n_rendered).
+        """
+        if blocks is None or parts is None:
+            changed = None
+        dirty_blocks, dirty_parts = self.dirty(changed)
+        out = list(blocks) if changed is not None else [xml for _, xml in self._blocks]
+        for i in dirty_blocks:
+            out[i] = self._render_xml(self._blocks[i][0], ctx)
+        rendered_parts = dict(parts) if changed is not None else {}
+        for name in dirty_parts:
+            template, enc = self._parts[name]
+            rendered_parts[name] = self._render_xml(template, ctx).encode(enc)
+        return self._package("".join(out), rendered_parts), out, rendered_parts, len(dirty_blocks) + len(dirty_parts)
+
+    def _package(self, body_xml: str, parts: Dict[str, bytes]) -> bytes:
+        from lxml import etree
+        import docx.oxml.ns
+
+        tree = self._helper.fix_tables(body_xml)
+        for i, elt in enumerate(tree.xpath("//wp:docPr", namespaces=docx.oxml.ns.nsmap), start=1001):
+            elt.attrib["id"] = str(i)
+        body = etree.tostring(tree, encoding="unicode")
+        document_xml = _XML_DECL + self._prefix + body + self._suffix
+
+        buf = BytesIO(self._base_zip)
+        buf.seek(0, 2)
+        with zipfile.ZipFile(buf, "a", zipfile.ZIP_DEFLATED) as z:
+            z.writestr(self._doc_name, document_xml.encode("utf-8"))
+            for name in self._parts:
+                z.writestr(name, parts[name])
+        return buf.getvalue()
+
+    def render(self, ctx: Dict[str, Any]) -> bytes:
+        from docxtpl import DocxTemplate
+
+        if not self.fast:
+            tpl = DocxTemplate(BytesIO(self.template_bytes))
+            tpl.render(ctx)
+            buf = BytesIO()
+            tpl.save(buf)
+            return buf.getvalue()
+        if self._blocks is not None:
+            return self.render_blocks(ctx)[0]
+        parts = {name: self._render_xml(template, ctx).encode(enc) for name, (template, enc) in self._parts.items()}
+        return self._package(self._render_xml(self._body, ctx), parts)
+
+
+def template_hash(template_bytes: bytes) -> str:
+    return hashlib.sha256(template_bytes).hexdigest()
+
+
+class TemplateCache:
+    """Process-wide LRU of CompiledTemplate objects, bounded by approximate memory."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_bytes: bytes) -> CompiledTemplate:
+        key = template_hash(template_bytes)
+        with self._lock:
+            ct = self._items.get(key)
+            if ct is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return ct
+            self.misses += 1
+        # Compile outside the lock; a concurrent duplicate compile is harmless.
+        ct = CompiledTemplate(template_bytes, key=key)
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = ct
+                self._bytes += ct.size
+                while self._bytes > self.max_bytes and len(self._items) > 1:
+                    _, old = self._items.popitem(last=False)
+                    self._bytes -= old.size
+            return self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+TEMPLATE_CACHE = TemplateCache()
+
+
+def get_compiled_template(template_bytes: bytes) -> CompiledTemplate:
+    return TEMPLATE_CACHE.get(template_bytes)
+
+
+def template_variables(template_bytes: bytes) -> frozenset:
+    """Jinja variables the template references, discovered once per template hash."""
+    return get_compiled_template(template_bytes).variables
+
+
 def render_docx_bytes(template_bytes: bytes,
                       data: Dict[str, Any],
                       wrap_width: int = 100,
                       wrap_trigger: int = 105) -> bytes:
     """
     Render a DOCX in-memory and return its bytes.
+    The template is compiled once per content hash (see TemplateCache).
+    """
+    ct = get_compiled_template(template_bytes)
+    ctx = build_context_from_json(data, wrap_width=wrap_width, wrap_trigger=wrap_trigger, variables=ct.variables)
+    return ct.render(ctx)
+
+
+def changed_variables(old: Dict[str, Any], new: Dict[str, Any]) -> frozenset:
+    """Context variables whose value differs between two presets (RICH_* follow their source list)."""
+    keys = {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+    keys.update(rich for rich, src in RICH_KEYS.items() if src in keys)
+    return frozenset(keys)
+
+
+def render_docx_incremental(template_bytes: bytes,
+                            data: Dict[str, Any],
+                            wrap_width: int = 100,
+                            wrap_trigger: int = 105,
+                            previous: Optional[RenderedDocx] = None) -> RenderedDocx:
+    """
+    Like render_docx_bytes, but patches `previous` (an earlier result for
+    the same template and wrap settings): only the body blocks and
+    headers/footers whose variables changed are re-rendered, and the
+    context is built only for those. The document is equivalent to a full
+    render (same elements, attributes and text), though not necessarily
+    byte-identical: serialization details such as repeated xmlns
+    declarations or <dc:title/> vs <dc:title></dc:title> can differ.
     """
+    ct = get_compiled_template(template_bytes)
+    wrap = (wrap_width, wrap_trigger)
+    snapshot = copy.deepcopy(data)
+    if not ct.incremental:
+        docx = render_docx_bytes(template_bytes, data, wrap_width=wrap_width, wrap_trigger=wrap_trigger)
+        return RenderedDocx(docx, ct.key, snapshot, wrap)
+
+    changed = None
+    if previous is not None and previous.blocks is not None and previous.template_key == ct.key \
+            and previous.wrap == wrap:
+        changed = changed_variables(previous.data, data)
+        if not changed:
+            return previous
+    ctx = build_context_from_json(data, wrap_width=wrap_width, wrap_trigger=wrap_trigger,
+                                  variables=ct.dirty_variables(changed))
+    docx, blocks, parts, n = ct.render_blocks(ctx, changed,
+                                              previous.blocks if changed is not None else None,
+                                              previous.parts if changed is not None else None)
+    return RenderedDocx(docx, ct.key, snapshot, wrap, blocks, parts, n)
+
+
+def render_docx_bytes_uncached(template_bytes: bytes,
+                               data: Dict[str, Any],
+                               wrap_width: int = 100,
+                               wrap_trigger: int = 105) -> bytes:
+    """Reference render through a fresh DocxTemplate (no compiled-template cache)."""
+    from docxtpl import DocxTemplate
+
     ctx = build_context_from_json(data, wrap_width=wrap_width, wrap_trigger=wrap_trigger)
     tpl = DocxTemplate(BytesIO(template_bytes))
     tpl.render(ctx)
@@ -0,0 +1,248 @@
+# core/experience.py
+"""
+Structured view of experience.txt, parsed once and shared by the prompt,
+skill-matching, fan-out and preset-conversion layers.
+
+    [Programming]                      -> skill bucket
+    Python, SQL
+    [Job: Title – Company (Dates)]     -> Section(kind="job")
+    - bullet
+    [Project: Name (Dates)]            -> Section(kind="project")
+    - bullet
+
+Every job/project gets a stable id (derived from its header without the
+dates) and the preset keys it fills, so nothing downstream has to guess
+from header substrings again.
+"""
+
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+HEADER_LINE_RE = re.compile(r"^[ \t]*\[(?P<h>[^\]\n]+)\][ \t]*$", re.MULTILINE)
+SECTION_RE = re.compile(r"^(?P<kind>Job|Project)\s*:\s*(?P<rest>.*)$", re.IGNORECASE)
+DASH_RE = re.compile(r"\s*[–—-]\s*")
+DATES_RE = re.compile(r"\s*\(([^()]*)\)\s*$")
+BULLET_RE = re.compile(r"^\s*(?:[-•*▪·]|\d+[.)])\s+")
+_NORM_RE = re.compile(r"[^a-z0-9]+")
+
+# Job slot -> (title key, bullets key) in the preset json_convert produces.
+JOB_SLOTS: Dict[str, Tuple[str, str]] = {
+    "TEK": ("TITLE_MAIN", "EXTRA_BULLETS_TEK"),
+    "ASSOCIATE": ("TITLE_SUB", "EXTRA_BULLETS_ASSOCIATE"),
+    "INTERN": ("TITLE_INTERN", "EXTRA_BULLETS_INTERN"),
+}
+# Project slot -> bullets key.
+PROJECT_SLOTS: Dict[str, str] = {
+    "ECOMMERCE": "EXTRA_ECOMMERCE",
+    "HOSPITAL": "EXTRA_HOSPITAL",
+}
+
+
+def classify_job(header: str) -> str:
+    """Template slot for a job header: INTERN, ASSOCIATE, or TEK (the main role)."""
+    h = (header or "").lower()
+    if "intern" in h:
+        return "INTERN"
+    if "junior" in h or "associate" in h:
+        return "ASSOCIATE"
+    return "TEK"
+
+
+def classify_project(header: str) -> Optional[str]:
+    """Template slot for a project header, or None when the template has no place for it."""
+    h = (header or "").lower()
+    if "e-commerce" in h or "ecommerce" in h:
+        return "ECOMMERCE"
+    if "hospital" in h:
+        return "HOSPITAL"
+    return None
+
+
+def normalize_header(header: str) -> str:
+    """
+    Lookup key for a header as the model may echo it back: case, dash style,
+    brackets/angle brackets, spacing and the 'Job:'/'Project:' prefix are ignored.
+    """
+    h = (header or "").strip().strip("[]<>").strip()
+    m = SECTION_RE.match(h)
+    if m:
+        h = m.group("rest")
+    return _NORM_RE.sub(" ", h.lower()).strip()
+
+
+def _slug(s: str) -> str:
+    return _NORM_RE.sub("-", s.lower()).strip("-") or "section"
+
+
+class Section:
+    """One [Job: ...] or [Project: ...] block."""
+
+    __slots__ = ("id", "kind", "header", "role", "company", "dates", "body", "bullets", "slot")
+
+    def __init__(self, id: str, kind: str, header: str, role: str, company: str, dates: str,
+                 body: str, bullets: Tuple[str, ...], slot: Optional[str]):
+        self.id = id
+        self.kind = kind          # "job" | "project"
+        self.header = header      # exactly as written, without brackets
+        self.role = role          # job title, or project name
+        self.company = company    # "" for projects / company-less jobs
+        self.dates = dates
+        self.body = body
+        self.bullets = bullets
+        self.slot = slot          # key of JOB_SLOTS / PROJECT_SLOTS, or None
+
+    @property
+    def title_key(self) -> Optional[str]:
+        return JOB_SLOTS[self.slot][0] if self.kind == "job" and self.slot in JOB_SLOTS else None
+
+    @property
+    def bullets_key(self) -> Optional[str]:
+        if self.kind == "job":
+            return JOB_SLOTS[self.slot][1] if self.slot in JOB_SLOTS else None
+        return PROJECT_SLOTS.get(self.slot)
+
+    def __repr__(self) -> str:
+        return f"Section({self.id!r}, slot={self.slot!r}, bullets={len(self.bullets)})"
+
+
+def _parse_section(kind: str, header: str, body: str) -> Section:
+    rest = SECTION_RE.match(header).group("rest").strip()
+    dates = ""
+    m = DATES_RE.search(rest)
+    if m:
+        dates = m.group(1).strip()
+        rest = rest[:m.start()]
+    parts = DASH_RE.split(rest, maxsplit=1) if kind == "job" else [rest]
+    role = re.sub(r"\s+", " ", parts[0]).strip(" :")
+    company = re.sub(r"\s+", " ", parts[1]).strip() if len(parts) > 1 else ""
+    bullets = tuple(BULLET_RE.sub("", ln).strip() for ln in body.splitlines() if BULLET_RE.match(ln))
+    slot = classify_job(header) if kind == "job" else classify_project(header)
+    base = _slug(f"{role} {company}")
+    return Section(f"{kind}/{base}", kind, header, role, company, dates, body, bullets, slot)
+
+
+def _parse_skills(body: str) -> Tuple[str, ...]:
+    items = (i.strip(" •\t,-") for i in re.split(r"[,\n]", body) if i.strip())
+    return tuple(i for i in items if i)
+
+
+class ExperienceModel:
+    """
+    Parsed experience: skill buckets plus jobs/projects in file order.
+    Instances are immutable once built; build them with parse_experience().
+    """
+
+    __slots__ = ("source_hash", "skills", "sections", "_blocks", "_by_id", "_by_norm")
+
+    def __init__(self, source_hash: str, skills: Dict[str, Tuple[str, ...]], sections: Tuple[Section, ...],
+                 blocks: Dict[Tuple[str, str], object]):
+        self.source_hash = source_hash
+        self.skills = skills
+        self.sections = sections
+        self._blocks = blocks  # (header, body) -> Section | skills tuple, reused on reparse
+        self._by_id = {s.id: s for s in sections}
+        self._by_norm = {normalize_header(s.header): s for s in sections}
+
+    @property
+    def jobs(self) -> Tuple[Section, ...]:
+        return tuple(s for s in self.sections if s.kind == "job")
+
+    @property
+    def projects(self) -> Tuple[Section, ...]:
+        return tuple(s for s in self.sections if s.kind == "project")
+
+    def get(self, section_id: str) -> Optional[Section]:
+        return self._by_id.get(section_id)
+
+    def resolve(self, header: str) -> Optional[Section]:
+        """Section for a header as echoed in model output (tolerant of dash/case/spacing changes)."""
+        return self._by_norm.get(normalize_header(header))
+
+    def select(self, preset_keys=None) -> Tuple[Section, ...]:
+        """Sections whose bullets fill one of `preset_keys` (all sections when None)."""
+        if preset_keys is None:
+            return self.sections
+        return tuple(s for s in self.sections if s.bullets_key in preset_keys)
+
+    def source_text(self, sections: Optional[Tuple[Section, ...]] = None) -> str:
+        """
+        Experience text limited to `sections` (plus every skill bucket), in
+        file order, for prompts that should only cover part of the resume.
+        """
+        keep = None if sections is None else {s.header for s in sections}
+        out = []
+        for (header, body), parsed in self._blocks.items():
+            if isinstance(parsed, Section) and keep is not None and header not in keep:
+                continue
+            out.append(f"[{header}]\n{body}")
+        return "\n\n".join(out)
+
+    def skill_buckets(self, buckets) -> Dict[str, List[str]]:
+        return {b: list(self.skills.get(b, ())) for b in buckets}
+
+    def __repr__(self) -> str:
+        return (f"ExperienceModel({self.source_hash[:10]}, skills={len(self.skills)}, "
+                f"jobs={len(self.jobs)}, projects={len(self.projects)})")
+
+
+def _split_blocks(text: str) -> List[Tuple[str, str]]:
+    heads = list(HEADER_LINE_RE.finditer(text))
+    out = []
+    for i, m in enumerate(heads):
+        end = heads[i + 1].start() if i + 1 < len(heads) else len(text)
+        out.append((m.group("h").strip(), text[m.end():end].strip()))
+    return out
+
+
+def parse_experience(text: str, previous: Optional[ExperienceModel] = None) -> ExperienceModel:
+    """
+    Parse experience text. Blocks whose header and body are unchanged since
+    `previous` are reused as-is, so an edit to one job only re-parses that job.
+    """
+    text = text or ""
+    source_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    if previous is not None and previous.source_hash == source_hash:
+        return previous
+    old = previous._blocks if previous is not None else {}
+
+    skills: Dict[str, Tuple[str, ...]] = {}
+    sections: List[Section] = []
+    blocks: Dict[Tuple[str, str], object] = {}
+    seen_ids: Dict[str, int] = {}
+    for header, body in _split_blocks(text):
+        key = (header, body)
+        parsed = old.get(key)
+        m = SECTION_RE.match(header)
+        if m:
+            if parsed is None:
+                parsed = _parse_section(m.group("kind").lower(), header, body)
+            blocks[key] = parsed
+            n = seen_ids.get(parsed.id, 0)
+            seen_ids[parsed.id] = n + 1
+            if n:  # same role/company twice: keep ids unique and still stable by order
+                parsed = Section(f"{parsed.id}-{n + 1}", parsed.kind, parsed.header, parsed.role,
+                                 parsed.company, parsed.dates, parsed.body, parsed.bullets, parsed.slot)
+            sections.append(parsed)
+        elif body:
+            if parsed is None:
+                parsed = _parse_skills(body)
+            skills[header] = parsed
+            blocks[key] = parsed
+    return ExperienceModel(source_hash, skills, tuple(sections), blocks)
+
+
+_CURRENT: Dict[str, Optional[ExperienceModel]] = {"model": None}
+_CURRENT_LOCK = threading.Lock()
+
+
+def get_experience_model(text: str) -> ExperienceModel:
+    """
+    Process-wide model for `text`. The last model is kept, so repeated calls
+    with the same text are free and a changed text is re-parsed incrementally.
+    """
+    with _CURRENT_LOCK:
+        model = parse_experience(text, previous=_CURRENT["model"])
+        _CURRENT["model"] = model
+        return model
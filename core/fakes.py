@@ -0,0 +1,319 @@
+# core/fakes.py
+"""
+Offline stand-ins for the OpenAI client, used by the benchmarks and for
+running the pipeline without network access or an API key.
+
+FakeLLMServer is an OpenAI-compatible HTTP endpoint on localhost that can
+inject latency, slow tails and errors, for exercising core.resilience with
+the real SDK:
+
+    python -m core.fakes --port 8011 --latency 0.5 --error-rate 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=fake streamlit run app.py
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+
+_FAKE_VERBS = ("Engineered", "Built", "Designed", "Automated", "Migrated", "Optimized", "Led", "Delivered")
+_FAKE_WORDS = (
+    "spark kafka airflow aws glue redshift snowflake python sql streaming batch ingestion warehouse "
+    "lakehouse quality governance latency partitioned schemas dimensional models dashboards stakeholders "
+    "monitoring alerting terraform docker kubernetes cicd testing legacy cost pipelines events s3 emr "
+    "dbt lineage contracts backfills orchestration sla observability cdc replication"
+).split()
+
+
+def _fake_bullets(tag: str, n: int):
+    # distinct wording per bullet, so near-duplicate removal keeps them all
+    rng = random.Random(tag)
+    out = []
+    for i in range(n):
+        words = rng.sample(_FAKE_WORDS, 14)
+        out.append(f"{_FAKE_VERBS[i % len(_FAKE_VERBS)]} {tag} {' '.join(words)}, "
+                   f"improving throughput {10 + i}% across {i + 3} domains")
+    return out
+
+
+def fake_tailored_output(n_jobs: int = 3, n_projects: int = 2, bullets_per_section: int = 7) -> dict:
+    """A plausible model response in the shape build_user_prompt asks for."""
+    jobs = [
+        "Job: Data Engineer – TEKsystems Global Services (Sep 2022 – Dec 2023)",
+        "Job: Associate Data Engineer – Acme Analytics (Jan 2021 – Aug 2022)",
+        "Job: Data Engineering Intern – Initech (May 2020 – Dec 2020)",
+    ]
+    projects = [
+        "Project: E-Commerce Clickstream Pipeline (2023)",
+        "Project: Hospital Readmission Analytics (2022)",
+    ]
+    while len(jobs) < n_jobs:
+        jobs.append(f"Job: Data Engineer {len(jobs)} – Company {len(jobs)} (2019 – 2020)")
+    while len(projects) < n_projects:
+        projects.append(f"Project: Side Project {len(projects)} (2021)")
+
+    def bullets(tag: str):
+        return _fake_bullets(tag, bullets_per_section)
+
+    return {
+        "keywords": {"Programming": ["Python", "SQL"], "Data Engineering": ["Apache Spark", "Airflow"],
+                     "Cloud": ["AWS"], "Database": ["PostgreSQL"], "ML/AI": [], "Misc": ["CI/CD"]},
+        "missing_skills": {"Programming": ["Scala"], "Data Engineering": ["dbt"], "Cloud": ["Azure"],
+                           "Database": ["Snowflake"], "ML/AI": [], "Misc": []},
+        "experience_bullets": {h: bullets(h.split("–")[0][5:].strip()) for h in jobs[:n_jobs]},
+        "project_bullets": {h: bullets(h.split("(")[0][9:].strip()) for h in projects[:n_projects]},
+    }
+
+
+_SECTION_PROMPT_RE = re.compile(r"ONE section of the candidate's experience: \[([^\]\n]+)\]")
+
+
+_EXPERIENCE_HEADER_RE = re.compile(r"^\[((Job|Project):[^\]\n]+)\][ \t]*$", re.MULTILINE)
+
+
+def fake_response(messages: list) -> str:
+    """
+    Default responder: {"bullets"} for one-section (fan-out) prompts, else
+    fake_tailored_output, with bullets for the [Job]/[Project] headers the
+    prompt's experience text contains (when it has any).
+    """
+    prompt = (messages[-1].get("content") or "") if messages else ""
+    m = _SECTION_PROMPT_RE.search(prompt)
+    if m:
+        return json.dumps({"bullets": _fake_bullets(m.group(1).split("(")[0].split(":", 1)[-1].strip(), 7)})
+    out = fake_tailored_output()
+    headers = _EXPERIENCE_HEADER_RE.findall(prompt)
+    if headers:
+        out["experience_bullets"] = {h: _fake_bullets(h.split("–")[0][5:].strip(), 7)
+                                     for h, kind in headers if kind == "Job"}
+        out["project_bullets"] = {h: _fake_bullets(h.split("(")[0][9:].strip(), 5)
+                                  for h, kind in headers if kind == "Project"}
+    return json.dumps(out)
+
+
+class FakeOpenAIClient:
+    """
+    Mimics the subset of `openai.OpenAI` used here:
+    client.chat.completions.create(model=..., messages=..., stream=..., n=...).
+
+    `responder(messages) -> str` produces the completion text (defaults to
+    fake_response). `latency` seconds are slept per request;
+    streamed responses are split into `chunk_size`-char deltas.
+    """
+
+    def __init__(self, responder: Optional[Callable[[list], str]] = None,
+                 latency: float = 0.0, chunk_size: int = 24):
+        self.responder = responder or fake_response
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str = "", messages=None, stream: bool = False, n: int = 1, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        texts = [self.responder(messages or []) for _ in range(max(1, n))]
+        prompt_tokens = sum(len(m.get("content") or "") for m in (messages or [])) // 4
+        completion_tokens = sum(len(t) for t in texts) // 4
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+        )
+        if stream:
+            return self._stream(texts[0], usage)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(index=i, message=SimpleNamespace(content=t), finish_reason="stop")
+                     for i, t in enumerate(texts)],
+            usage=usage,
+            model=model,
+        )
+
+    def _stream(self, text: str, usage):
+        for i in range(0, len(text), self.chunk_size):
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=text[i:i + self.chunk_size]))],
+                usage=None,
+            )
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+class FakeLLMServer:
+    """
+    Serves POST /v1/chat/completions (plain and SSE streaming) in a
+    background thread.
+
+        with FakeLLMServer(latency=0.2, fail_first=2, error_status=429) as server:
+            client = OpenAI(base_url=server.url, api_key="fake", max_retries=0)
+
+    Per request, in order: the first `fail_first` requests, then a random
+    `error_rate` share, get `error_status` (with Retry-After when
+    `retry_after` is set); the rest sleep `latency` seconds (`slow_latency`
+    for a random `slow_rate` share) and answer with `responder(messages)`.
+    """
+
+    def __init__(self, responder: Optional[Callable[[list], str]] = None,
+                 latency: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 fail_first: int = 0, retry_after: Optional[float] = None,
+                 slow_rate: float = 0.0, slow_latency: float = 5.0, chunk_size: int = 24,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.responder = responder or fake_response
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted (CLI use)."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _plan(self):
+        """(error status or None, delay) for the next request."""
+        with self._lock:
+            n = self.requests
+            self.requests += 1
+            fail = n < self.fail_first or self._rng.random() < self.error_rate
+            slow = self._rng.random() < self.slow_rate
+            if fail:
+                self.errors += 1
+        return (self.error_status if fail else None), (self.slow_latency if slow else self.latency)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout / hedge loser), as it is meant to
+
+            def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"no route {self.path}", "type": "invalid_request_error"}})
+                    return
+                status, delay = server._plan()
+                if status is not None:
+                    headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else None
+                    self._send(status, {"error": {"message": f"injected {status}", "type": "server_error"}}, headers)
+                    return
+                time.sleep(delay)
+                messages = body.get("messages") or []
+                model = body.get("model", "")
+                texts = [server.responder(messages) for _ in range(max(1, int(body.get("n") or 1)))]
+                prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+                completion_tokens = sum(len(t) for t in texts) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens,
+                         "prompt_tokens_details": {"cached_tokens": 0}}
+                base = {"id": f"fake-{server.requests}", "created": int(time.time()), "model": model}
+                if body.get("stream"):
+                    self._stream(base, texts[0], usage)
+                    return
+                self._send(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                    {"index": i, "message": {"role": "assistant", "content": t}, "finish_reason": "stop"}
+                    for i, t in enumerate(texts)
+                ]})
+
+            def _stream(self, base: dict, text: str, usage: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                size = server.chunk_size
+                events = [{**base, "object": "chat.completion.chunk", "choices": [
+                    {"index": 0, "delta": {"content": text[i:i + size]}, "finish_reason": None}
+                ]} for i in range(0, len(text), size)]
+                events.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+                for e in events:
+                    self.wfile.write(f"data: {json.dumps(e)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run an OpenAI-compatible fake LLM server with injected faults.")
+    ap.add_argument("--port", type=int, default=8011)
+    ap.add_argument("--latency", type=float, default=0.5, help="Seconds per request")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--fail-first", type=int, default=0, help="Fail this many requests first")
+    ap.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on errors")
+    ap.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests that take --slow-latency")
+    ap.add_argument("--slow-latency", type=float, default=5.0)
+    args = ap.parse_args(argv)
+
+    server = FakeLLMServer(latency=args.latency, error_rate=args.error_rate, error_status=args.error_status,
+                           fail_first=args.fail_first, retry_after=args.retry_after,
+                           slow_rate=args.slow_rate, slow_latency=args.slow_latency, port=args.port)
+    print(f"Fake LLM server on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# core/fanout.py
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.experience import get_experience_model
+from core.jobs import JobCancelled
+from core.llm import call_gpt
+from core.metrics import RunMetrics
+from core.parsers import coerce_json
+from core.prompts import SYSTEM_PROMPT, build_section_prompt, build_skills_prompt
+from core.resilience import CircuitOpen, Deadline, DeadlineExceeded
+
+Section = Tuple[str, str, str]  # (kind "job"|"project", header, body)
+
+
+def split_experience_sections(experience_text: str) -> List[Section]:
+    """
+    The experience's [Job: ...] / [Project: ...] sections, from the shared
+    ExperienceModel. A section runs until the next bracketed header of any kind.
+    """
+    return [(s.kind, s.header, s.body) for s in get_experience_model(experience_text).sections]
+
+
+def generate_fanout(client, job_description: str, experience_text: str,
+                    skill_inventory: dict, buckets: list,
+                    local_skills: Optional[dict] = None,
+                    sections: Optional[Sequence[Section]] = None,
+                    include_skills: bool = True,
+                    model: str = "gpt-4o-mini", temperature: float = 0.25,
+                    max_tokens_per_section: int = 700, max_workers: int = 8,
+                    use_cache: bool = True, metrics: RunMetrics = None,
+                    deadline: Optional[Deadline] = None, hedge: bool = False,
+                    on_section: Optional[Callable[[str, str, object], None]] = None,
+                    report: Optional[dict] = None) -> Tuple[dict, Dict[str, str]]:
+    """
+    One small completion per [Job]/[Project] section (plus one for skills
+    unless `local_skills` is given), issued concurrently and merged into the
+    same shape the monolithic prompt returns:
+      {"keywords", "missing_skills", "experience_bullets", "project_bullets"}
+
+    `sections` limits generation to those (kind, header, body) tuples, e.g.
+    the ones the template actually shows; include_skills=False skips the
+    skills request when the template has no skill lists.
+
+    Returns (data, raw_by_section). `on_section(section, name, value)` is
+    called on the caller's thread as each piece completes (same event shape
+    as IncrementalJSONParser, so the UI can render progressively).
+
+    A deadline, open breaker or cancellation stops the whole run right away
+    (the exception propagates, queued sections are dropped and requests
+    already in flight are not waited for). Any other failure
+    loses only its section: it is left out of `data`, counted in metrics
+    ("fanout_errors") and listed in report["section_errors"] as
+    {header or "skills": "ErrorType: message"}.
+    """
+    if sections is None:
+        sections = split_experience_sections(experience_text)
+    data = {"experience_bullets": {}, "project_bullets": {}}
+    if local_skills is not None:
+        data.update(local_skills)
+    raws: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+
+    def run(prompt: str, max_tokens: int) -> str:
+        return call_gpt(
+            client=client,
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=prompt,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=use_cache,
+            metrics=metrics,
+            deadline=deadline,
+            hedge=hedge
+        )
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sections) + 1)))
+    futures = {}
+    try:
+        if local_skills is None and include_skills:
+            f = pool.submit(run, build_skills_prompt(job_description, skill_inventory, buckets), 600)
+            futures[f] = ("skills", "skills")
+        for kind, header, body in sections:
+            f = pool.submit(run, build_section_prompt(job_description, header, body, kind=kind), max_tokens_per_section)
+            futures[f] = (kind, header)
+
+        for f in as_completed(futures):
+            kind, header = futures[f]
+            try:
+                raw = f.result()
+            except (DeadlineExceeded, CircuitOpen, JobCancelled):
+                raise
+            except Exception as e:
+                errors[header] = f"{type(e).__name__}: {e}"
+                raws[header] = f"ERROR: {errors[header]}"
+                continue
+            raws[header] = raw or ""
+            parsed = coerce_json(raw or "") or {}
+            if kind == "skills":
+                for key in ("keywords", "missing_skills"):
+                    groups = parsed.get(key) if isinstance(parsed.get(key), dict) else {}
+                    data[key] = groups
+                    if on_section:
+                        for name, value in groups.items():
+                            on_section(key, name, value)
+                continue
+            bullets = parsed.get("bullets", [])
+            if not isinstance(bullets, list):
+                bullets = []
+            target = "experience_bullets" if kind == "job" else "project_bullets"
+            data[target][header] = bullets
+            if on_section:
+                on_section(target, header, bullets)
+    except BaseException:
+        # return now: queued sections never start and in-flight ones finish
+        # (bounded by their own timeouts) without anyone waiting for them
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    # keep the experience file's order regardless of completion order
+    for target, kind in (("experience_bullets", "job"), ("project_bullets", "project")):
+        data[target] = {h: data[target][h] for k, h, _ in sections if k == kind and h in data[target]}
+    if errors and metrics is not None:
+        metrics.incr("fanout_errors", len(errors))
+    if report is not None:
+        report["section_errors"] = errors
+    return data, raws
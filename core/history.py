@@ -0,0 +1,280 @@
+# core/history.py
+"""
+Persistent store of past tailoring runs, searchable by JD similarity, so a
+reposted or lightly reworded JD can reuse an earlier result instead of a
+full LLM run.
+
+    store = get_run_store()
+    match = store.lookup(jd_text, context=ctx, threshold=0.6)
+    if match and match["similarity"] >= 0.9: ...      # serve match["data"] / ["preset"]
+    store.put(jd_text, raw, data, preset, context=ctx)
+
+- Runs live in SQLite (WAL; same conventions as core.cache): JD text, raw
+  model output, the coerce_json result and the json_convert preset.
+- Each JD gets a MinHash signature over word 3-shingles (core.dedupe's
+  hasher; shingles are combined from per-token CRCs with NumPy, which keeps
+  a long JD well under a millisecond).
+  The signatures and an LSH band table are kept in memory (loaded on first
+  lookup, refreshed with rows other processes added), so a lookup costs one
+  signature plus a few dict probes and stays well under a millisecond at
+  tens of thousands of runs. Only the matched row is read from disk.
+- `context` (hash of experience, model, sections...) must be equal for a
+  past run to match: a result is only reused for the same inputs besides the JD.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from core.dedupe import _bands, _hasher
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "run_history.sqlite3")
+REUSE_SIMILARITY = 0.9   # serve the stored result as-is
+WARM_SIMILARITY = 0.6    # offer it as a starting point
+JD_SHINGLE = 3
+NUM_PERM = 64
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#%.]*")
+
+
+def context_key(*parts: Any) -> str:
+    """Hash of everything besides the JD that a stored result depends on."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def jd_shingles(text: str, k: int = JD_SHINGLE) -> "np.ndarray":
+    """Distinct 32-bit hashes of the word k-shingles of a JD (stable across processes)."""
+    import numpy as np
+
+    toks = _TOKEN_RE.findall((text or "").lower())
+    h = np.fromiter(map(zlib.crc32, map(str.encode, toks)), dtype=np.uint64, count=len(toks))
+    n = max(1, len(h) - k + 1) if len(h) else 0
+    g = h[:n].copy()
+    for i in range(1, min(k, len(h))):
+        g = (g * np.uint64(0x9E3779B1) + h[i:i + n]) & np.uint64(0xFFFFFFFF)
+    return np.unique(g)
+
+
+def _jd_hash(jd_text: str) -> str:
+    return hashlib.sha256(" ".join((jd_text or "").lower().split()).encode("utf-8")).hexdigest()
+
+
+class RunStore:
+    """SQLite-backed run history with an in-memory MinHash/LSH index over JDs."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH, max_entries: int = 50000,
+                 min_similarity: float = WARM_SIMILARITY, num_perm: int = NUM_PERM):
+        self.path = path
+        self.max_entries = max_entries
+        self.hasher = _hasher(num_perm)
+        self.bands, self.rows = _bands(min_similarity, num_perm)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._loaded_id = 0          # highest run id already indexed
+        self._ids: List[int] = []    # signature row -> run id
+        self._contexts: List[Optional[str]] = []  # None once the run is known to be evicted
+        self._hashes: List[str] = []
+        self._sigs: Optional["np.ndarray"] = None
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]  # band -> key -> rows
+        self._exact: Dict[str, int] = {}  # jd hash -> row
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._conn() as c:
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                    jd_hash     TEXT NOT NULL,
+                    context     TEXT NOT NULL,
+                    jd_text     TEXT NOT NULL,
+                    raw         TEXT NOT NULL,
+                    data        TEXT NOT NULL,
+                    preset      TEXT,
+                    signature   BLOB NOT NULL,
+                    created     REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits        INTEGER NOT NULL DEFAULT 0
+                )""")
+            c.execute("CREATE INDEX IF NOT EXISTS runs_lru ON runs(last_access)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def signature(self, jd_text: str) -> "np.ndarray":
+        return self.hasher.signature(jd_shingles(jd_text))
+
+    def _band_keys(self, sig: "np.ndarray") -> List[bytes]:
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def _refresh(self) -> None:
+        """Index rows added since the last refresh (by this or another process)."""
+        import numpy as np
+
+        rows = self._conn().execute(
+            "SELECT id, jd_hash, context, signature FROM runs WHERE id > ? ORDER BY id", (self._loaded_id,)
+        ).fetchall()
+        if not rows:
+            return
+        new = np.frombuffer(b"".join(r[3] for r in rows), dtype=np.uint32).reshape(len(rows), -1)
+        start = len(self._ids)
+        if self._sigs is None or start + len(rows) > len(self._sigs):  # grow x2
+            grown = np.empty((max(64, 2 * (start + len(rows))), self.hasher.num_perm), dtype=np.uint32)
+            if self._sigs is not None:
+                grown[:start] = self._sigs[:start]
+            self._sigs = grown
+        self._sigs[start:start + len(rows)] = new
+        for i, (run_id, jd_hash, context, _) in enumerate(rows, start=start):
+            self._ids.append(run_id)
+            self._contexts.append(context)
+            self._hashes.append(jd_hash)
+            self._exact[jd_hash] = i
+        for b, band in enumerate(self._buckets):
+            cols = np.ascontiguousarray(new[:, b * self.rows:(b + 1) * self.rows])
+            for i, key in enumerate(cols.view(np.dtype((np.void, cols.itemsize * self.rows))).ravel().tolist(),
+                                    start=start):
+                band.setdefault(key, []).append(i)
+        self._loaded_id = rows[-1][0]
+
+    def _forget(self, row: int) -> None:
+        """Drop an evicted run from the in-memory index (caller holds the lock)."""
+        if self._contexts[row] is None:
+            return
+        for band, key in zip(self._buckets, self._band_keys(self._sigs[row])):
+            rows = band.get(key)
+            if rows and row in rows:
+                rows.remove(row)
+                if not rows:
+                    del band[key]
+        if self._exact.get(self._hashes[row]) == row:
+            del self._exact[self._hashes[row]]
+        self._contexts[row] = None
+
+    def lookup(self, jd_text: str, context: str, threshold: float = WARM_SIMILARITY) -> Optional[Dict[str, Any]]:
+        """
+        The most similar stored run for the same `context` with estimated
+        Jaccard >= threshold, or None. Returns {"id", "similarity", "exact",
+        "jd_text", "raw", "data", "preset", "created", "hits"}. A run that was
+        evicted meanwhile (possibly by another process) is dropped from the
+        index and the next most similar one is tried.
+        """
+        with self._lock:
+            self._refresh()
+            if not self._ids:
+                return None
+            ranked = []  # (row, similarity, exact), best first
+            row = self._exact.get(_jd_hash(jd_text))
+            if row is not None and self._contexts[row] == context:
+                ranked.append((row, 1.0, True))
+            sig = self.signature(jd_text)
+            cand = {r for band, key in zip(self._buckets, self._band_keys(sig)) for r in band.get(key, ())}
+            cand = [r for r in cand if self._contexts[r] == context and r != row]
+            if cand:
+                sims = (self._sigs[cand] == sig).mean(axis=1)
+                ranked += sorted(((r, float(x), False) for r, x in zip(cand, sims) if x >= threshold),
+                                 key=lambda c: (-c[1], -c[0]))
+            ranked = [(self._ids[r], r, sim, exact) for r, sim, exact in ranked if sim >= threshold]
+        c = self._conn()
+        for run_id, row, sim, exact in ranked:
+            found = c.execute(
+                "SELECT jd_text, raw, data, preset, created, hits FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+            if found is None:
+                with self._lock:
+                    self._forget(row)
+                continue
+            c.execute("UPDATE runs SET last_access = ?, hits = hits + 1 WHERE id = ?", (time.time(), run_id))
+            jd, raw, data, preset, created, hits = found
+            return {"id": run_id, "similarity": round(sim, 4), "exact": exact, "jd_text": jd, "raw": raw,
+                    "data": json.loads(data), "preset": json.loads(preset) if preset else None,
+                    "created": created, "hits": hits + 1}
+        return None
+
+    def put(self, jd_text: str, raw: str, data: Dict[str, Any], preset: Optional[Dict[str, Any]],
+            context: str) -> int:
+        """Store one finished run; returns its id."""
+        now = time.time()
+        jd_hash = _jd_hash(jd_text)
+        sig = self.signature(jd_text)
+        c = self._conn()
+        with self._lock:
+            cur = c.execute(
+                "INSERT INTO runs (jd_hash, context, jd_text, raw, data, preset, signature, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (jd_hash, context, jd_text, raw or "", json.dumps(data, ensure_ascii=False),
+                 json.dumps(preset, ensure_ascii=False) if preset is not None else None,
+                 sig.tobytes(), now, now),
+            )
+            self._refresh()  # indexes this row (and any others added meanwhile) in id order
+        if cur.lastrowid % 64 == 0:  # COUNT(*) is a table scan; check the limit now and then
+            self.evict()
+        return cur.lastrowid
+
+    def evict(self) -> None:
+        """Keep at most `max_entries` runs, dropping the least recently used."""
+        c = self._conn()
+        (count,) = c.execute("SELECT COUNT(*) FROM runs").fetchone()
+        if count > self.max_entries:
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                gone = [r[0] for r in c.execute("SELECT id FROM runs ORDER BY last_access ASC LIMIT ?",
+                                                (count - self.max_entries,))]
+                c.executemany("DELETE FROM runs WHERE id = ?", [(i,) for i in gone])
+                c.execute("COMMIT")
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+            with self._lock:
+                for run_id in gone:
+                    row = bisect.bisect_left(self._ids, run_id)  # ids are indexed in increasing order
+                    if row < len(self._ids) and self._ids[row] == run_id:
+                        self._forget(row)
+
+    def stats(self) -> Dict[str, Any]:
+        (count,) = self._conn().execute("SELECT COUNT(*) FROM runs").fetchone()
+        (hits,) = self._conn().execute("SELECT COALESCE(SUM(hits), 0) FROM runs").fetchone()
+        with self._lock:
+            indexed = sum(c is not None for c in self._contexts)
+        return {"runs": count, "hits": hits, "indexed": indexed}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn().execute("DELETE FROM runs")
+            self._ids, self._contexts, self._hashes, self._exact = [], [], [], {}
+            self._sigs = None
+            self._buckets = [{} for _ in range(self.bands)]
+
+
+_DEFAULT_STORE: Optional[RunStore] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_run_store() -> RunStore:
+    """
+    Process-wide run history. Location/limit can be overridden with
+    RESUME_TAILOR_HISTORY_PATH and RESUME_TAILOR_HISTORY_MAX_ENTRIES.
+    """
+    global _DEFAULT_STORE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = RunStore(
+                path=os.getenv("RESUME_TAILOR_HISTORY_PATH", DEFAULT_HISTORY_PATH),
+                max_entries=int(os.getenv("RESUME_TAILOR_HISTORY_MAX_ENTRIES", "50000")),
+            )
+        return _DEFAULT_STORE
@@ -0,0 +1,218 @@
+# core/jdclean.py
+"""
+Local clean-up of a JD before it goes into a prompt: extraction junk,
+repeated lines and boilerplate (EEO statements, benefits, "about us",
+pay-transparency and application notices) cost input tokens on every
+request (N times in fan-out mode) and tell the model nothing about fit.
+
+    jd_prompt = compress_jd(jd_text, skill_inventory, report=report)
+    report["jd_compression"] -> {"tokens_before", "tokens_after", "reduction", "dropped", ...}
+
+Stages, all rule-based and linear in the text:
+  1. normalize: odd whitespace/zero-width chars, ligatures, bullet glyphs,
+     words hyphenated across a line break, lines wrapped mid-sentence.
+  2. drop repeated lines (case/punctuation-insensitive) and page markers.
+  3. classify: lines under a boilerplate heading ("Benefits", "About us",
+     "Equal opportunity"...) are dropped, and so is any other line that
+     hits at least BOILERPLATE_MIN boilerplate phrases.
+Requirement lines are never dropped: anything stating years, degrees,
+proficiency, required/preferred, or naming a known skill (core.skills).
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+BOILERPLATE_MIN = 2  # phrase hits that mark a line outside a boilerplate section
+
+_INVISIBLE_RE = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")  # soft hyphen, zero-width
+_SPACE_RE = re.compile("[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+")
+_LIGATURES = str.maketrans({"\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl"})
+_BULLET_RE = re.compile(r"^(?:[-•*▪●◦·‣○■□➢►✓✔]|\d{1,2}[.)])\s+")
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(?=[a-z])")
+_PAGE_MARK_RE = re.compile(r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+|\d{1,3})$", re.IGNORECASE)
+_KEY_RE = re.compile(r"[\W_]+")
+
+_KEEP_HEADING_RE = re.compile(
+    r"\b(?:responsibilit|requirement|qualification|what you(?:'ll| will)? (?:do|bring|need|have)|you (?:will|have|bring)"
+    r"|skills|experience|nice to have|preferred|bonus points|the role|about the (?:role|job|position|team|opportunity)"
+    r"|job (?:description|summary|duties)|duties|tech(?:nology|nical)? stack|must have|who you are|day to day"
+    r"|key (?:areas|accountabilities)|what we(?:'re| are) looking for|ideal candidate)", re.IGNORECASE)
+_DROP_HEADING_RE = re.compile(
+    r"\b(?:about (?:us|the company|our company)|who we are|our (?:mission|values|culture|story|benefits|commitment)"
+    r"|benefits|perks|what we offer|we offer|compensation|salary|pay (?:range|transparency)|total rewards"
+    r"|equal (?:employment )?opportunity|eeo|diversity|inclusion|accommodations?|privacy|how to apply"
+    r"|application process|disclaimer|(?:life|working) at .+|why (?:join|work (?:at|for|with)) .+)", re.IGNORECASE)
+_ABOUT_COMPANY_RE = re.compile(r"^[Aa]bout\s+[A-Z][\w&.,' -]*$")  # "About Acme Corp"
+# words that may surround a boilerplate phrase in a heading: "Benefits & Perks", "Equal Opportunity Employer"
+# a line ending in one of these was wrapped mid-sentence, it is not a heading
+_CONTINUES = frozenset("and or the a an of to for with in on at by from as".split())
+_HEADING_FILLER = frozenset(
+    "and & + / - the our to of at employer statement notice policy package information info program programs".split())
+
+# boilerplate vocabulary: single words are matched as tokens, phrases as substrings (both lowercase)
+_BOILERPLATE_WORDS = frozenset("""
+    race color colour religion disability disabilities diversity inclusion inclusive e-verify unsolicited
+    recruiters benefits benefit medical dental vision 401k 401(k) retirement pto wellness tuition insurance
+    holidays perks gym salary compensation headquartered award-winning
+""".split())
+_BOILERPLATE_PHRASES = (
+    "equal opportunity", "equal employment opportunity", "affirmative action", "without regard to",
+    "regardless of", "national origin", "sexual orientation", "gender identity", "veteran status",
+    "genetic information", "marital status", "protected veteran", "protected characteristic", "protected class",
+    "reasonable accommodation", "background check", "drug test", "drug screen", "privacy notice", "privacy policy",
+    "recruitment agencies", "staffing agencies", "paid time off", "parental leave", "stock options", "base pay",
+    "pay range", "founded in", "our mission", "we are a ", "leading provider", "leading global", "fortune 500",
+    "our customers", "our clients", "our people", "our culture", "our values", "offices in", "offices across",
+    "great place to work", "apply now", "apply today",
+)
+_PAY_RANGE_RE = re.compile(r"\$\s?\d[\d,.]*\s?k?\s*(?:-|–|to)\s*\$?\s?\d")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9()'-]*")
+_REQUIREMENT_RE = re.compile(
+    r"\b(?:\d+\s*\+?\s*(?:-\s*\d+\s*)?(?:years?|yrs)|experience (?:with|in|using|building|designing)"
+    r"|proficien\w*|hands-on|expertise (?:in|with)|knowledge of|familiar\w* with|understanding of"
+    r"|degree|bachelor'?s?|master'?s?|ph\.?d|certifi\w*|required(?! by)|requirements?|must(?:-| )have|nice(?:-| )to(?:-| )have"
+    r"|preferred|strong (?:skills|background))\b", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for TPM budgeting and reports."""
+    return max(1, len(text or "") // 4)
+
+
+def _is_heading(line: str) -> bool:
+    if _BULLET_RE.match(line) or len(line) > 80:
+        return False
+    words = line.split()
+    if not words or len(words) > 8 or words[-1] in _CONTINUES:
+        return False
+    return line.endswith(":") or line.isupper() or (line[0].isupper() and line[-1] not in ".!?,;")
+
+
+def _is_drop_heading(bare: str, explicit: bool) -> bool:
+    """
+    A heading that opens a boilerplate section. An explicit heading (trailing
+    ":" or all caps) only has to mention a boilerplate topic; any other
+    short line has to *be* one ("Benefits", "About us", "Equal Opportunity
+    Employer"), so "Own the data privacy platform" is not a heading.
+    """
+    if _ABOUT_COMPANY_RE.match(bare):
+        return True
+    if explicit:
+        return bool(_DROP_HEADING_RE.search(bare))
+    rest = _DROP_HEADING_RE.sub(" ", bare)
+    if rest == bare:
+        return False
+    return all(w in _HEADING_FILLER for w in rest.lower().split())
+
+
+def normalize_jd(text: str) -> List[str]:
+    """Non-empty, whitespace-normalized lines with hyphenation and wrapped sentences repaired."""
+    text = _INVISIBLE_RE.sub("", (text or "").translate(_LIGATURES)).replace("\r\n", "\n").replace("\r", "\n")
+    text = _HYPHEN_BREAK_RE.sub(r"\1", text)
+    lines: List[str] = []
+    for raw in text.split("\n"):
+        line = _SPACE_RE.sub(" ", raw).strip()
+        if not line:
+            continue
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            line = "- " + line[bullet.end():]
+        elif (lines and line[0].islower() and not _is_heading(lines[-1])
+              and lines[-1][-1] not in ".:;!?"):
+            lines[-1] += " " + line  # PDF line wrap in the middle of a sentence
+            continue
+        lines.append(line)
+    return lines
+
+
+def _is_boilerplate(line: str) -> bool:
+    """At least BOILERPLATE_MIN distinct boilerplate words/phrases in `line`."""
+    low = line.lower()
+    hits = len(_BOILERPLATE_WORDS.intersection(_WORD_RE.findall(low)))
+    for phrase in _BOILERPLATE_PHRASES:
+        if hits >= BOILERPLATE_MIN:
+            return True
+        if phrase in low:
+            hits += 1
+    return hits + bool(_PAY_RANGE_RE.search(line)) >= BOILERPLATE_MIN
+
+
+def compress_jd(text: str, skill_inventory: Optional[Dict[str, List[str]]] = None,
+                buckets: Optional[List[str]] = None, report: Optional[dict] = None) -> str:
+    """
+    The JD with boilerplate, duplicates and extraction junk removed (see the
+    module docstring). `skill_inventory` enables the known-skill guard (any
+    line naming a skill from core.skills is kept). When `report` is a dict,
+    report["jd_compression"] gets token counts and the dropped lines.
+    """
+    matcher = None
+    if skill_inventory is not None:
+        from core.skills import get_skill_matcher
+        matcher = get_skill_matcher(skill_inventory, buckets)
+
+    lines = normalize_jd(text)
+    kept: List[str] = []
+    dropped: List[Dict[str, str]] = []
+    seen = set()
+    section_drop = False
+    pending_heading: Optional[Tuple[str, bool]] = None  # (line, in a dropped section); kept once content follows
+    duplicates = 0
+    for line in lines:
+        key = _KEY_RE.sub(" ", line.lower()).strip()
+        if not key or _PAGE_MARK_RE.match(line):
+            dropped.append({"reason": "junk", "text": line})
+            continue
+        if key in seen:
+            duplicates += 1
+            dropped.append({"reason": "duplicate", "text": line})
+            continue
+        seen.add(key)
+
+        def protected() -> bool:
+            return bool(_REQUIREMENT_RE.search(line)) or (matcher is not None and bool(matcher.scan(line)))
+
+        if _is_heading(line):
+            bare = line.rstrip(":").strip()
+            explicit = line.endswith(":") or line.isupper()
+            keep_h = bool(_KEEP_HEADING_RE.search(bare))
+            drop_h = not keep_h and _is_drop_heading(bare, explicit)
+            # a bare "Python, Spark, AWS" line is content, and so is "Learning budget" inside a dropped section
+            if keep_h or drop_h or (not protected() and (explicit or not section_drop)):
+                if keep_h or drop_h:
+                    section_drop = drop_h
+                elif explicit:
+                    section_drop = False  # an unknown but explicit heading ends the previous section
+                if pending_heading is not None:  # a heading directly followed by another one
+                    if pending_heading[1]:
+                        dropped.append({"reason": "boilerplate", "text": pending_heading[0]})
+                    else:
+                        kept.append(pending_heading[0])
+                pending_heading = (line, section_drop)
+                continue
+
+        if (section_drop or _is_boilerplate(line)) and not protected():
+            dropped.append({"reason": "boilerplate", "text": line})
+            continue
+        if pending_heading is not None:
+            kept.append(pending_heading[0])
+            pending_heading = None
+        kept.append(line)
+    if pending_heading is not None:  # a short last line: keep it unless it sits in a dropped section
+        if pending_heading[1]:
+            dropped.append({"reason": "boilerplate", "text": pending_heading[0]})
+        else:
+            kept.append(pending_heading[0])
+
+    out = "\n".join(kept)
+    if report is not None:
+        before, after = estimate_tokens(text), estimate_tokens(out) if out else 0
+        report["jd_compression"] = {
+            "tokens_before": before,
+            "tokens_after": after,
+            "reduction": round(1 - after / before, 4) if before else 0.0,
+            "lines_before": len(lines),
+            "lines_after": len(kept),
+            "duplicates": duplicates,
+            "dropped": dropped,
+        }
+    return out
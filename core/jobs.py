@@ -0,0 +1,194 @@
+# core/jobs.py
+"""
+Process-wide background jobs for long LLM work, so Streamlit script threads
+return immediately and poll instead of blocking for the whole generation.
+
+    jobs = get_job_manager()
+    job = jobs.submit(fn, arg, key=prompt_hash, subscriber=session_id)   # fn(job, arg)
+    jobs.get(job.id).snapshot()     # state, events so far, result / error
+    jobs.cancel(job.id, subscriber=session_id)
+
+- Bounded: a fixed worker pool and a cap on queued jobs (JobQueueFull past it).
+- Single-flight: submitting a `key` that is already queued/running returns the
+  in-flight job, so identical requests from several sessions share one call.
+- Cancellation is per subscriber; a shared job is only cancelled once every
+  subscriber has cancelled. Queued jobs never start; running ones see
+  job.cancelled() and should stop at their next checkpoint.
+- Finished jobs are kept for `keep_s` seconds (at most `max_finished`).
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised by job functions (via job.check_cancelled) to stop early."""
+
+
+class JobQueueFull(RuntimeError):
+    """Too many jobs waiting; the caller should ask the user to retry shortly."""
+
+
+class Job:
+    def __init__(self, key: Optional[str], max_events: int):
+        self.id = uuid.uuid4().hex[:16]
+        self.key = key
+        self.state = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.events: List[tuple] = []
+        self.subscribers: set = set()
+        self.coalesced = 0  # submissions served by this job beyond the first
+        self._max_events = max_events
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self.future = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED
+
+    def emit(self, *event) -> None:
+        """Append a progress event (e.g. a streamed section) for pollers."""
+        with self._lock:
+            if len(self.events) < self._max_events:
+                self.events.append(event)
+
+    def events_since(self, n: int) -> List[tuple]:
+        with self._lock:
+            return self.events[n:]
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished or time.time()
+            return {
+                "id": self.id, "state": self.state, "error": self.error,
+                "events": len(self.events), "subscribers": len(self.subscribers),
+                "coalesced": self.coalesced,
+                "queued_s": round((self.started or end) - self.created, 3),
+                "elapsed_s": round(end - (self.started or end), 3),
+            }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = 4, max_queued: int = 64,
+                 max_finished: int = 256, keep_s: float = 600.0, max_events: int = 2000):
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.keep_s = keep_s
+        self.max_events = max_events
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tailor-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._inflight: Dict[str, Job] = {}  # key -> queued/running job
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, key: Optional[str] = None,
+               subscriber: Optional[str] = None, **kwargs) -> Job:
+        """Run fn(job, *args, **kwargs) on the pool, or join the in-flight job with the same key."""
+        with self._lock:
+            self._prune()
+            if key is not None:
+                job = self._inflight.get(key)
+                if job is not None and not job.cancelled():
+                    job.coalesced += 1
+                    if subscriber is not None:
+                        job.subscribers.add(subscriber)
+                    return job
+            queued = sum(1 for j in self._inflight.values() if j.state == QUEUED)
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} jobs waiting")
+            job = Job(key, self.max_events)
+            if subscriber is not None:
+                job.subscribers.add(subscriber)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        if job.cancelled():
+            self._finish(job, CANCELLED)
+            return
+        job.state, job.started = RUNNING, time.time()
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self._finish(job, ERROR, error=f"{type(e).__name__}: {e}")
+        else:
+            self._finish(job, CANCELLED if job.cancelled() else DONE, result=result)
+
+    def _finish(self, job: Job, state: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            job.result, job.error = result, error
+            job.finished = time.time()
+            job.state = state
+            if job.key is not None and self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def cancel(self, job_id: str, subscriber: Optional[str] = None) -> bool:
+        """Drop `subscriber` from the job; cancel it when nobody is left waiting."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job.subscribers.discard(subscriber)
+            if job.subscribers:
+                return False
+            job._cancel.set()
+            if job.key is not None and self._inflight.get(job.key) is job:
+                del self._inflight[job.key]  # later identical submissions start fresh
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            states = [j.state for j in self._jobs.values()]
+            return {s: states.count(s) for s in (QUEUED, RUNNING, DONE, ERROR, CANCELLED)}
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.done]
+        overflow = len(finished) - self.max_finished
+        for j in finished:
+            if overflow > 0 or now - j.finished > self.keep_s:
+                del self._jobs[j.id]
+                overflow -= 1
+
+
+_MANAGER: Optional[JobManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide manager; pool size can be set with RESUME_TAILOR_JOB_WORKERS."""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = JobManager(max_workers=int(os.getenv("RESUME_TAILOR_JOB_WORKERS", "4")))
+        return _MANAGER
@@ -0,0 +1,158 @@
+# core/jsonstream.py
+
+import json
+from typing import Any, List, Optional, Tuple
+
+STREAM_SECTIONS = ("keywords", "missing_skills", "experience_bullets", "project_bullets")
+
+# (section, name, value), e.g. ("keywords", "Cloud", ["AWS", "GCP"])
+# or ("experience_bullets", "Job: Data Engineer – ...", ["Built ...", ...])
+StreamEvent = Tuple[str, Any, Any]
+
+
+class IncrementalJSONParser:
+    """
+    Incremental scanner for the model's JSON output.
+
+    Feed it text deltas as they stream in; it tracks string/escape state and
+    the container stack in a single pass over each new character, and returns
+    an event for every second-level entry (a keyword bucket, a missing-skill
+    bucket, one job's or one project's bullet list) the moment its closing
+    bracket/quote arrives.
+
+    Chunks are kept in a list and only the new one is scanned; the only text
+    copied is the entry being captured, so a long response costs linear
+    time. Text before the object (a code fence, a prose preamble) is
+    skipped: a '{' only opens it when a key or '}' follows, and an object
+    with none of `sections` as keys is discarded in favour of the next one.
+    """
+
+    def __init__(self, sections=STREAM_SECTIONS):
+        self.sections = set(sections)
+        self._chunks: List[str] = []
+        self._stack: List[list] = []  # [kind, key, expect_key]
+        self._in_str = False
+        self._esc = False
+        self._str_is_key = False
+        self._capture: Optional[List[str]] = None  # pieces of the key / entry being read
+        self._capture_from = 0  # where it starts in the current chunk
+        self._started = False
+        self._opening = False  # just saw the candidate top-level '{'
+        self._relevant = False  # the top-level object has a key from `sections`
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def _reset(self) -> None:
+        self._stack.clear()
+        self._started = self._opening = self._relevant = False
+        self._capture = None
+
+    def _begin(self, i: int) -> None:
+        self._capture = []
+        self._capture_from = i
+
+    def _finish(self, chunk: str, i: int) -> str:
+        self._capture.append(chunk[self._capture_from:i + 1])
+        raw = "".join(self._capture)
+        self._capture = None
+        return raw
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        if not chunk or self.done:
+            return []
+        self._chunks.append(chunk)
+        events: List[StreamEvent] = []
+        stack = self._stack
+        i = 0
+        n = len(chunk)
+        while i < n:
+            ch = chunk[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    self._end_string(chunk, i, events)
+                i += 1
+                continue
+
+            if not self._started:
+                if ch == "{":
+                    self._started = self._opening = True
+                    stack.append(["{", None, True])
+                i += 1
+                continue
+            if self._opening:
+                if ch in " \t\r\n":
+                    i += 1
+                    continue
+                self._opening = False
+                if ch not in '"}':  # "{" in prose, not the object
+                    self._reset()
+                    continue
+
+            top = stack[-1]
+            if ch == '"':
+                self._in_str = True
+                self._str_is_key = top[0] == "{" and top[2]
+                if self._capture is None and len(stack) <= 2:
+                    self._begin(i)  # a section/entry name, or a string entry
+            elif ch in "{[":
+                if len(stack) == 2 and not (top[0] == "{" and top[2]):
+                    self._begin(i)
+                stack.append([ch, None, ch == "{"])
+            elif ch in "}]":
+                stack.pop()
+                if not stack:
+                    if self._relevant:
+                        self.done = True
+                        break
+                    self._reset()  # an object that isn't the answer; look for the next one
+                elif len(stack) == 2 and self._capture is not None:
+                    self._emit(self._finish(chunk, i), events)
+            elif ch == ":":
+                if top[0] == "{":
+                    top[2] = False
+            elif ch == ",":
+                if top[0] == "{":
+                    top[1] = None
+                    top[2] = True
+            i += 1
+        if self._capture is not None:
+            self._capture.append(chunk[self._capture_from:])
+            self._capture_from = 0
+        return events
+
+    def _end_string(self, chunk: str, end: int, events: List[StreamEvent]) -> None:
+        if self._str_is_key:
+            if len(self._stack) > 2:
+                return
+            raw = self._finish(chunk, end)
+            try:
+                key = json.loads(raw)
+            except ValueError:
+                key = raw.strip('"')
+            self._stack[-1][1] = key
+            if len(self._stack) == 1 and key in self.sections:
+                self._relevant = True
+        elif len(self._stack) <= 2 and self._capture is not None:
+            raw = self._finish(chunk, end)
+            if len(self._stack) == 2:
+                self._emit(raw, events)
+
+    def _emit(self, raw: str, events: List[StreamEvent]) -> None:
+        section, name = self._stack[0][1], self._stack[1][1]
+        if section not in self.sections or name is None:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        events.append((section, name, value))
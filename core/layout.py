@@ -0,0 +1,636 @@
+# core/layout.py
+"""
+Page-fit estimation for a preset in a DOCX template, without rendering.
+
+    layout = get_template_layout(template_bytes)       # parsed once per template hash
+    estimate_pages(layout, preset)                     # {"pages": 2, "fill": 0.31, ...}
+    wrap_width, wrap_trigger = auto_wrap(layout, preset)
+    preset = fit_to_pages(layout, preset, pages=1, jd_text=jd, report=report)
+
+The template's page size, margins, paragraph styles (fonts, sizes, spacing,
+indents, list numbering) and theme fonts are read from its XML. Glyph widths
+come from the installed font file when Pillow can load it, otherwise from
+built-in Helvetica/Times metrics scaled to the font family, so the result
+is an estimate (typically within a few lines per page), not Word's layout.
+Lines are counted with one vectorized greedy word-wrap pass over every
+bullet and static paragraph.
+"""
+
+import math
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree as ET
+
+from core.docx_render import RICH_KEYS, collapse_ws, soft_wrap_multiline, split_on_dollar, template_hash
+
+if TYPE_CHECKING:  # for annotations; font metrics and line counting import numpy on first use
+    import numpy as np
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+# Adobe core-14 advance widths (1/1000 em) for ASCII 32..126
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_TIMES = (
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)
+# family -> (base metrics, width scale vs. base, line height / font size)
+_FAMILIES = {
+    "arial": ("sans", 1.0, 1.15), "helvetica": ("sans", 1.0, 1.15), "liberation sans": ("sans", 1.0, 1.15),
+    "arimo": ("sans", 1.0, 1.15), "calibri": ("sans", 0.9, 1.22), "carlito": ("sans", 0.9, 1.22),
+    "calibri light": ("sans", 0.89, 1.22), "aptos": ("sans", 0.95, 1.2), "segoe ui": ("sans", 0.98, 1.33),
+    "verdana": ("sans", 1.14, 1.215), "tahoma": ("sans", 1.0, 1.207), "roboto": ("sans", 0.98, 1.17),
+    "open sans": ("sans", 1.04, 1.36), "lato": ("sans", 0.96, 1.2), "helvetica neue": ("sans", 1.0, 1.2),
+    "times new roman": ("serif", 1.0, 1.15), "times": ("serif", 1.0, 1.15),
+    "liberation serif": ("serif", 1.0, 1.15), "tinos": ("serif", 1.0, 1.15),
+    "cambria": ("serif", 1.07, 1.17), "caladea": ("serif", 1.07, 1.17), "georgia": ("serif", 1.12, 1.14),
+    "garamond": ("serif", 0.93, 1.12), "book antiqua": ("serif", 1.05, 1.17),
+    "palatino linotype": ("serif", 1.05, 1.17),
+}
+_BOLD_SCALE = 1.06
+_FONT_DIRS = ("~/.fonts", "~/.local/share/fonts", "/usr/share/fonts", "/usr/local/share/fonts",
+              "~/Library/Fonts", "/Library/Fonts", "/System/Library/Fonts", "C:/Windows/Fonts")
+
+_TAG_RE = re.compile(r"\{\{-?\s*(?:r\s+)?([A-Za-z_]\w*)([^}]*)\}\}")
+_BLOCK_RE = re.compile(r"\{%-?\s*(?:p|tr|tc|r)\s.*?%\}", re.S)
+_INLINE_BLOCK_RE = re.compile(r"\{%.*?%\}", re.S)
+_LOOP_RE = re.compile(r"\{%-?\s*p\s+for\s+(\w+)\s+in\s+(\w+)\s*-?%\}")
+_ENDLOOP_RE = re.compile(r"\{%-?\s*p\s+endfor\s*-?%\}")
+
+
+# ----------------------------
+# Glyph metrics
+# ----------------------------
+
+@lru_cache(maxsize=1)
+def _font_files() -> Dict[str, str]:
+    """Normalized file stem -> path for every TrueType/OpenType font installed."""
+    found: Dict[str, str] = {}
+    for d in _FONT_DIRS:
+        d = os.path.expanduser(d)
+        if not os.path.isdir(d):
+            continue
+        for root, _, files in os.walk(d):
+            for f in files:
+                stem, ext = os.path.splitext(f)
+                if ext.lower() in (".ttf", ".otf"):
+                    found.setdefault(re.sub(r"[^a-z0-9]", "", stem.lower()), os.path.join(root, f))
+    return found
+
+
+def _font_file(name: str, bold: bool) -> Optional[str]:
+    key = re.sub(r"[^a-z0-9]", "", name.lower())
+    files = _font_files()
+    options = (key + "bold", key + "b", key + "bd") if bold else (key, key + "regular")
+    return next((files[k] for k in options if k in files), None)
+
+
+@lru_cache(maxsize=32)
+def glyph_widths(font: str, bold: bool = False) -> Tuple["np.ndarray", float, str]:
+    """
+    (widths, line_factor, source): advance widths in em for code points
+    0..255 (index 0 holds the fallback for anything else), line height as a
+    multiple of the font size, and "file" or "builtin".
+    """
+    import numpy as np
+
+    path = _font_file(font, bold)
+    if path is not None:
+        try:
+            from PIL import ImageFont
+
+            f = ImageFont.truetype(path, 1000)
+            widths = np.array([f.getlength(chr(c)) / 1000.0 if c >= 32 else 0.0 for c in range(256)],
+                              dtype=np.float32)
+            widths[0] = widths[ord("n")]
+            ascent, descent = f.getmetrics()
+            return widths, max(1.0, (ascent + descent) / 1000.0), "file"
+        except Exception:
+            pass  # Pillow missing or unreadable font: fall back to built-in metrics
+
+    name = font.lower().strip()
+    base, scale, line = _FAMILIES.get(name) or (
+        ("serif", 1.0, 1.15) if "serif" in name and "sans" not in name else ("sans", 1.0, 1.17))
+    table = np.array(_TIMES if base == "serif" else _HELVETICA, dtype=np.float32) / 1000.0
+    widths = np.full(256, table[ord("n") - 32], dtype=np.float32)  # Latin-1 and beyond: an average glyph
+    widths[:32] = 0.0
+    widths[32:127] = table
+    widths[0] = table[ord("n") - 32]
+    widths *= scale * (_BOLD_SCALE if bold else 1.0)
+    return widths, line, "builtin"
+
+
+def line_counts(texts: Sequence[str], avail_em: "np.ndarray", widths: "np.ndarray") -> "np.ndarray":
+    """
+    Lines each text occupies when greedily word-wrapped to `avail_em` (per
+    text, in em of its font size). One pass over word positions, vectorized
+    across texts; words wider than a line break mid-word like Word does.
+    """
+    import numpy as np
+
+    n = len(texts)
+    avail = np.broadcast_to(np.asarray(avail_em, dtype=np.float64), (n,)).copy()
+    avail = np.maximum(avail, 1.0)
+    words = [t.split() for t in texts]
+    counts = np.fromiter((len(w) for w in words), dtype=np.int64, count=n)
+    flat = [w for ws in words for w in ws]
+    lines = np.ones(n, dtype=np.float64)
+    if not flat:
+        return lines.astype(np.int64)
+
+    codes = np.frombuffer("".join(flat).encode("utf-32-le"), dtype=np.uint32)
+    cw = widths[np.where(codes < 256, codes, 0)].astype(np.float64)
+    lens = np.fromiter((len(w) for w in flat), dtype=np.int64, count=len(flat))
+    starts = np.concatenate(([0], np.cumsum(lens)[:-1]))
+    word_w = np.add.reduceat(cw, starts)
+
+    m = int(counts.max())
+    grid = np.zeros((n, m))
+    valid = np.zeros((n, m), dtype=bool)
+    rows = np.repeat(np.arange(n), counts)
+    cols = np.arange(len(flat)) - np.repeat(np.cumsum(counts) - counts, counts)
+    grid[rows, cols] = word_w
+    valid[rows, cols] = True
+
+    space = float(widths[32])
+    cur = np.zeros(n)
+    for j in range(m):
+        w, v = grid[:, j], valid[:, j]
+        fresh = cur == 0
+        new = np.where(fresh, w, cur + space + w)
+        brk = v & ~fresh & (new > avail)
+        lines += brk
+        cur = np.where(brk, w, np.where(v, new, cur))
+        over = v & (cur > avail)
+        if over.any():
+            extra = np.ceil(cur[over] / avail[over]) - 1
+            lines[over] += extra
+            cur[over] -= extra * avail[over]
+    return lines.astype(np.int64)
+
+
+# ----------------------------
+# Template geometry & styles
+# ----------------------------
+
+def _twips(el, attr: str, default: float = 0.0) -> float:
+    if el is None:
+        return default
+    v = el.get(_W + attr)
+    try:
+        return float(v) / 20.0 if v is not None else default
+    except ValueError:
+        return default
+
+
+class _Para:
+    """Resolved formatting of one paragraph (points)."""
+    __slots__ = ("style", "font", "size", "bold", "before", "after", "line", "rule",
+                 "left", "right", "contextual", "text")
+
+    def __init__(self):
+        self.style = None
+        self.font = "Calibri"
+        self.size = 11.0
+        self.bold = False
+        self.before = self.after = 0.0
+        self.line, self.rule = 240.0, "auto"
+        self.left = self.right = 0.0
+        self.contextual = False
+        self.text = ""
+
+    def copy(self) -> "_Para":
+        p = _Para()
+        for s in self.__slots__:
+            setattr(p, s, getattr(self, s))
+        return p
+
+    def line_height(self) -> float:
+        natural = self.size * glyph_widths(self.font, self.bold)[1]
+        if self.rule == "exact":
+            return self.line / 20.0
+        if self.rule == "atLeast":
+            return max(self.line / 20.0, natural)
+        return natural * self.line / 240.0
+
+
+class _Styles:
+    def __init__(self, z: zipfile.ZipFile):
+        names = set(z.namelist())
+        self.theme = {"minor": "Calibri", "major": "Calibri Light"}
+        for name in names:
+            if name.startswith("word/theme/") and name.endswith(".xml"):
+                root = ET.fromstring(z.read(name))
+                for kind in ("minor", "major"):
+                    latin = root.find(f".//{_A}{kind}Font/{_A}latin")
+                    if latin is not None and latin.get("typeface"):
+                        self.theme[kind] = latin.get("typeface")
+                break
+        self.styles: Dict[str, Any] = {}
+        self.default = _Para()
+        self.default_style = None
+        if "word/styles.xml" in names:
+            root = ET.fromstring(z.read("word/styles.xml"))
+            dd = root.find(f"{_W}docDefaults")
+            if dd is not None:
+                self._apply_rpr(self.default, dd.find(f"{_W}rPrDefault/{_W}rPr"))
+                self._apply_ppr(self.default, dd.find(f"{_W}pPrDefault/{_W}pPr"))
+            for s in root.findall(f"{_W}style"):
+                if s.get(_W + "type") != "paragraph":
+                    continue
+                sid = s.get(_W + "styleId")
+                self.styles[sid] = s
+                if s.get(_W + "default") in ("1", "true"):
+                    self.default_style = sid
+        self.numbering: Dict[Tuple[str, str], Any] = {}
+        if "word/numbering.xml" in names:
+            root = ET.fromstring(z.read("word/numbering.xml"))
+            abstract = {a.get(_W + "abstractNumId"): a for a in root.findall(f"{_W}abstractNum")}
+            for num in root.findall(f"{_W}num"):
+                ref = num.find(f"{_W}abstractNumId")
+                a = abstract.get(ref.get(_W + "val")) if ref is not None else None
+                if a is None:
+                    continue
+                for lvl in a.findall(f"{_W}lvl"):
+                    self.numbering[(num.get(_W + "numId"), lvl.get(_W + "ilvl"))] = lvl.find(f"{_W}pPr")
+        self._cache: Dict[Optional[str], _Para] = {}
+
+    def _apply_rpr(self, p: _Para, rpr) -> None:
+        if rpr is None:
+            return
+        fonts = rpr.find(f"{_W}rFonts")
+        if fonts is not None:
+            if fonts.get(_W + "ascii"):
+                p.font = fonts.get(_W + "ascii")
+            elif fonts.get(_W + "asciiTheme"):
+                p.font = self.theme["major" if "major" in fonts.get(_W + "asciiTheme") else "minor"]
+        sz = rpr.find(f"{_W}sz")
+        if sz is not None and sz.get(_W + "val"):
+            p.size = float(sz.get(_W + "val")) / 2.0
+        b = rpr.find(f"{_W}b")
+        if b is not None:
+            p.bold = b.get(_W + "val") not in ("0", "false")
+
+    def _apply_ind(self, p: _Para, ind) -> None:
+        if ind is None:
+            return
+        for attr in ("left", "start"):
+            if ind.get(_W + attr) is not None:
+                p.left = _twips(ind, attr)
+        for attr in ("right", "end"):
+            if ind.get(_W + attr) is not None:
+                p.right = _twips(ind, attr)
+
+    def _apply_ppr(self, p: _Para, ppr) -> None:
+        if ppr is None:
+            return
+        sp = ppr.find(f"{_W}spacing")
+        if sp is not None:
+            if sp.get(_W + "before") is not None:
+                p.before = _twips(sp, "before")
+            if sp.get(_W + "after") is not None:
+                p.after = _twips(sp, "after")
+            if sp.get(_W + "line") is not None:
+                p.line = float(sp.get(_W + "line"))
+                p.rule = sp.get(_W + "lineRule") or "auto"
+        num = ppr.find(f"{_W}numPr")
+        if num is not None:
+            num_id, ilvl = num.find(f"{_W}numId"), num.find(f"{_W}ilvl")
+            lvl = self.numbering.get((num_id.get(_W + "val") if num_id is not None else None,
+                                      ilvl.get(_W + "val") if ilvl is not None else "0"))
+            if lvl is not None:
+                self._apply_ind(p, lvl.find(f"{_W}ind"))
+        self._apply_ind(p, ppr.find(f"{_W}ind"))
+        cs = ppr.find(f"{_W}contextualSpacing")
+        if cs is not None:
+            p.contextual = cs.get(_W + "val") not in ("0", "false")
+
+    def style(self, sid: Optional[str]) -> _Para:
+        sid = sid if sid in self.styles else self.default_style
+        if sid in self._cache:
+            return self._cache[sid]
+        chain, seen = [], set()
+        cur = sid
+        while cur in self.styles and cur not in seen:
+            seen.add(cur)
+            chain.append(self.styles[cur])
+            based = self.styles[cur].find(f"{_W}basedOn")
+            cur = based.get(_W + "val") if based is not None else None
+        p = self.default.copy()
+        for s in reversed(chain):
+            self._apply_rpr(p, s.find(f"{_W}rPr"))
+            self._apply_ppr(p, s.find(f"{_W}pPr"))
+        p.style = sid
+        self._cache[sid] = p
+        return p
+
+    def paragraph(self, el) -> _Para:
+        ppr = el.find(f"{_W}pPr")
+        ps = ppr.find(f"{_W}pStyle") if ppr is not None else None
+        p = self.style(ps.get(_W + "val") if ps is not None else None).copy()
+        self._apply_ppr(p, ppr)
+        parts = []
+        first_run = None
+        for node in el.iter():
+            if node.tag == _W + "t" and node.text:
+                parts.append(node.text)
+            elif node.tag in (_W + "br", _W + "cr"):
+                parts.append("\n")
+            elif node.tag == _W + "tab":
+                parts.append("    ")
+            elif node.tag == _W + "r" and first_run is None:
+                t = node.find(f"{_W}t")
+                if t is not None and (t.text or "").strip():
+                    first_run = node
+        if first_run is not None:
+            self._apply_rpr(p, first_run.find(f"{_W}rPr"))
+        p.text = "".join(parts)
+        return p
+
+
+class TemplateLayout:
+    """Page geometry and paragraph plan of one template (see get_template_layout)."""
+
+    def __init__(self, template_bytes: bytes):
+        with zipfile.ZipFile(BytesIO(template_bytes)) as z:
+            styles = _Styles(z)
+            body = ET.fromstring(z.read("word/document.xml")).find(f"{_W}body")
+        sect = body.find(f"{_W}sectPr") if body is not None else None
+        if sect is None and body is not None:
+            sects = list(body.iter(f"{_W}sectPr"))
+            sect = sects[-1] if sects else None
+        size = sect.find(f"{_W}pgSz") if sect is not None else None
+        mar = sect.find(f"{_W}pgMar") if sect is not None else None
+        self.page_width = _twips(size, "w", 612.0)
+        self.page_height = _twips(size, "h", 792.0)
+        self.margins = {k: _twips(mar, k, 72.0) for k in ("top", "bottom", "left", "right")}
+        self.content_width = self.page_width - self.margins["left"] - self.margins["right"]
+        self.content_height = self.page_height - self.margins["top"] - self.margins["bottom"]
+        self._styles = styles
+        self.items = self._blocks(list(body) if body is not None else [], self.content_width)
+        self.fonts = sorted({p.font for p, _ in self._paragraphs(self.items)})
+        self.metrics = {f: glyph_widths(f)[2] for f in self.fonts}
+        self.bullet_keys = sorted({it[1] for it in self._walk(self.items) if it[0] == "loop"})
+
+    def _blocks(self, children, width: float) -> List[tuple]:
+        """("p", para, width) | ("loop", preset_key, para, width) | ("row", [[items], ...])."""
+        items: List[tuple] = []
+        loop: Optional[Tuple[str, str]] = None  # (loop variable, preset key)
+        for el in children:
+            if el.tag == _W + "sdt":
+                content = el.find(f"{_W}sdtContent")
+                items.extend(self._blocks(list(content) if content is not None else [], width))
+            elif el.tag == _W + "tbl":
+                for tr in el.iter(f"{_W}tr"):
+                    cells = tr.findall(f"{_W}tc")
+                    row = []
+                    for tc in cells:
+                        tcw = tc.find(f"{_W}tcPr/{_W}tcW")
+                        w = _twips(tcw, "w") if tcw is not None and tcw.get(_W + "type") == "dxa" else 0.0
+                        row.append(self._blocks(list(tc), w or width / max(1, len(cells))))
+                    items.append(("row", row))
+            elif el.tag == _W + "p":
+                p = self._styles.paragraph(el)
+                m = _LOOP_RE.search(p.text)
+                if m:
+                    src = m.group(2)
+                    loop = (m.group(1), RICH_KEYS.get(src, src))
+                elif _ENDLOOP_RE.search(p.text):
+                    loop = None
+                elif _BLOCK_RE.search(p.text):
+                    continue  # other {%p %} / {%tr %} control paragraphs are removed by docxtpl
+                elif loop is not None and re.search(r"\{\{-?\s*(?:r\s+)?" + loop[0] + r"\b", p.text):
+                    items.append(("loop", loop[1], p, width))
+                else:
+                    items.append(("p", p, width))
+        return items
+
+    def _walk(self, items):
+        for it in items:
+            if it[0] == "row":
+                for cell in it[1]:
+                    yield from self._walk(cell)
+            else:
+                yield it
+
+    def _paragraphs(self, items):
+        for it in self._walk(items):
+            yield (it[1], it[2]) if it[0] == "p" else (it[2], it[3])
+
+
+_LAYOUTS: "OrderedDict[str, TemplateLayout]" = OrderedDict()
+_LAYOUTS_LOCK = threading.Lock()
+
+
+def get_template_layout(template_bytes: bytes) -> TemplateLayout:
+    """TemplateLayout parsed once per template content hash (small LRU)."""
+    key = template_hash(template_bytes)
+    with _LAYOUTS_LOCK:
+        layout = _LAYOUTS.get(key)
+        if layout is not None:
+            _LAYOUTS.move_to_end(key)
+            return layout
+    layout = TemplateLayout(template_bytes)
+    with _LAYOUTS_LOCK:
+        _LAYOUTS[key] = layout
+        while len(_LAYOUTS) > 16:
+            _LAYOUTS.popitem(last=False)
+    return layout
+
+
+# ----------------------------
+# Estimation & fitting
+# ----------------------------
+
+def _preset_list(preset: Dict[str, Any], key: str) -> List[str]:
+    val = preset.get(key) or []
+    if isinstance(val, str):
+        val = split_on_dollar(val)
+    return [collapse_ws(str(b)) for b in val if str(b).strip()]
+
+
+def _static_text(text: str, preset: Dict[str, Any]) -> str:
+    def value(m):
+        v = preset.get(m.group(1), "")
+        return ", ".join(str(x) for x in v) if isinstance(v, list) else str(v or "")
+
+    return _INLINE_BLOCK_RE.sub("", _TAG_RE.sub(value, text))
+
+
+def _measure(layout: TemplateLayout, preset: Dict[str, Any], wrap_width: int, wrap_trigger: int):
+    """Heights (pt) of every static paragraph (by id) and of every bullet per preset key."""
+    import numpy as np
+
+    jobs: Dict[Tuple[str, bool], List[tuple]] = {}  # font -> [(owner, segment, avail_em)]
+    static_lines: Dict[int, int] = {}
+    bullet_lines: Dict[str, np.ndarray] = {}
+    for it in layout._walk(layout.items):
+        if it[0] == "p":
+            _, p, width = it
+            avail = (width - p.left - p.right) / p.size
+            for seg in _static_text(p.text, preset).split("\n"):
+                jobs.setdefault((p.font, p.bold), []).append((("p", id(p)), seg, avail))
+        else:
+            _, key, p, width = it
+            if key in bullet_lines:
+                continue
+            avail = (width - p.left - p.right) / p.size
+            bullets = _preset_list(preset, key)
+            bullet_lines[key] = np.zeros(len(bullets), dtype=np.int64)
+            for i, b in enumerate(bullets):
+                for seg in soft_wrap_multiline(b, width=wrap_width, trigger=wrap_trigger):
+                    jobs.setdefault((p.font, p.bold), []).append((("b", key, i), seg, avail))
+    for (font, bold), segs in jobs.items():
+        counts = line_counts([s for _, s, _ in segs], np.array([a for _, _, a in segs]),
+                             glyph_widths(font, bold)[0])
+        for (owner, _, _), n in zip(segs, counts.tolist()):
+            if owner[0] == "p":
+                static_lines[owner[1]] = static_lines.get(owner[1], 0) + n
+            else:
+                bullet_lines[owner[1]][owner[2]] += n
+    return static_lines, bullet_lines
+
+
+def _height(items, layout, static_lines, bullet_lines, kept) -> float:
+    total, prev = 0.0, None
+    for it in items:
+        if it[0] == "row":
+            total += max((_height(cell, layout, static_lines, bullet_lines, kept) for cell in it[1]), default=0.0)
+            prev = None
+            continue
+        p = it[1] if it[0] == "p" else it[2]
+        same = prev is not None and p.contextual and prev.style == p.style
+        if it[0] == "p":
+            lines = static_lines.get(id(p), 1)
+            total += (0.0 if same else p.before) + lines * p.line_height() + p.after
+            prev = p
+            continue
+        n = bullet_lines.get(it[1])
+        if n is None or not len(n):
+            continue
+        mask = kept.get(it[1])
+        lines = int(n[mask].sum()) if mask is not None else int(n.sum())
+        count = int(mask.sum()) if mask is not None else len(n)
+        if not count:
+            continue
+        gaps = (count - 1) * (0.0 if p.contextual else p.before + p.after)
+        total += (0.0 if same else p.before) + lines * p.line_height() + gaps + p.after
+        prev = p
+    return total
+
+
+def estimate_pages(layout: TemplateLayout, preset: Dict[str, Any],
+                   wrap_width: int = 100, wrap_trigger: int = 105) -> Dict[str, Any]:
+    """
+    Predicted page count for `preset` rendered into the template:
+    {"pages", "fill" (share of the last page used), "height_pt",
+     "bullet_lines": {key: [lines per bullet]}}.
+    """
+    static_lines, bullet_lines = _measure(layout, preset, wrap_width, wrap_trigger)
+    height = _height(layout.items, layout, static_lines, bullet_lines, {})
+    return _summary(layout, height, bullet_lines)
+
+
+def _summary(layout, height: float, bullet_lines) -> Dict[str, Any]:
+    pages = max(1, math.ceil(height / layout.content_height - 1e-9))
+    return {
+        "pages": pages,
+        "fill": round(height / layout.content_height - (pages - 1), 3),
+        "height_pt": round(height, 1),
+        "bullet_lines": {k: v.tolist() for k, v in bullet_lines.items()},
+    }
+
+
+def auto_wrap(layout: TemplateLayout, preset: Dict[str, Any], slack: int = 5) -> Tuple[int, int]:
+    """
+    (wrap_width, wrap_trigger) for soft_wrap_multiline: the widest character
+    width whose soft-wrapped lines all fit on one physical line of the
+    narrowest bullet slot, so Word never wraps a line just before our own
+    break (which would leave a one-word orphan line).
+    """
+    import numpy as np
+
+    slots = [it for it in layout._walk(layout.items) if it[0] == "loop"]
+    bullets = [b for key in {it[1] for it in slots} for b in _preset_list(preset, key)]
+    if not slots or not bullets:
+        return 100, 100 + slack
+    _, _, p, width = min(slots, key=lambda it: (it[3] - it[2].left - it[2].right) / it[2].size)
+    avail = (width - p.left - p.right) / p.size
+    widths = glyph_widths(p.font, p.bold)[0]
+    text = "".join(bullets)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    mean_w = float(widths[np.where(codes < 256, codes, 0)].mean()) or 0.5
+    cap = int(avail / mean_w)
+    for w in range(int(cap * 1.08), max(20, int(cap * 0.75)), -1):
+        parts = [s for b in bullets for s in soft_wrap_multiline(b, width=w, trigger=w + slack)]
+        if int(line_counts(parts, np.full(len(parts), avail), widths).max()) <= 1:
+            return w, w + slack
+    return max(20, int(cap * 0.75)), max(20, int(cap * 0.75)) + slack
+
+
+def fit_to_pages(layout: TemplateLayout, preset: Dict[str, Any], pages: int,
+                 jd_text: Optional[str] = None, wrap_width: int = 100, wrap_trigger: int = 105,
+                 min_bullets: int = 2, report: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Drop the lowest-value bullets until the estimate fits in `pages`.
+    Value is JD relevance (core.relevance) when `jd_text` is given, else
+    position (later bullets go first). Every section keeps at least
+    `min_bullets`. Returns a new preset; report["fit"] gets
+    {"pages_before", "pages_after", "fits", "trimmed": [{"section", "text"}]}.
+    """
+    import numpy as np
+
+    static_lines, bullet_lines = _measure(layout, preset, wrap_width, wrap_trigger)
+    kept = {k: np.ones(len(v), dtype=bool) for k, v in bullet_lines.items()}
+    limit = pages * layout.content_height
+    height = _height(layout.items, layout, static_lines, bullet_lines, kept)
+    before = _summary(layout, height, bullet_lines)["pages"]
+
+    lists = {k: _preset_list(preset, k) for k in bullet_lines}
+    flat = [(k, i) for k, v in lists.items() for i in range(len(v))]
+    if jd_text and flat:
+        from core.relevance import RelevanceIndex
+
+        value = RelevanceIndex([lists[k][i] for k, i in flat]).score(jd_text).tolist()
+    else:
+        value = [1.0 - i / max(1, len(lists[k])) for k, i in flat]
+    order = sorted(range(len(flat)), key=lambda x: (value[x], -flat[x][1]))
+
+    trimmed = []
+    for x in order:
+        if height <= limit + 1e-6:
+            break
+        k, i = flat[x]
+        if int(kept[k].sum()) <= min_bullets:
+            continue
+        kept[k][i] = False
+        height = _height(layout.items, layout, static_lines, bullet_lines, kept)
+        trimmed.append({"section": k, "text": lists[k][i]})
+
+    out = dict(preset)
+    for k, mask in kept.items():
+        if not mask.all():
+            out[k] = [b for b, keep in zip(lists[k], mask.tolist()) if keep]
+    if report is not None:
+        after = _summary(layout, height, bullet_lines)["pages"]
+        report["fit"] = {"pages_before": before, "pages_after": after, "fits": after <= pages,
+                         "trimmed": trimmed}
+    return out
@@ -1,10 +1,59 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
 import streamlit as st
 
+from core.cache import LLMCache, get_llm_cache
+from core.metrics import RunMetrics
+from core.resilience import Deadline, get_breaker, get_latency_tracker, resilient_call
+
+def _create(client, model: str, deadline: Deadline = None, hedge: bool = False,
+            metrics: RunMetrics = None, **kwargs):
+    """
+    client.chat.completions.create with per-attempt timeouts, retries with
+    backoff, a per-model circuit breaker and (opt-in) hedging past the
+    model's recent p95 latency; see core.resilience.
+    """
+    tracker = get_latency_tracker(model)
+
+    def attempt(timeout: float):
+        t0 = time.perf_counter()
+        resp = client.chat.completions.create(model=model, timeout=timeout, **kwargs)
+        if not kwargs.get("stream"):
+            tracker.record(time.perf_counter() - t0)
+        return resp
+
+    return resilient_call(attempt, deadline=deadline, breaker=get_breaker(model),
+                          hedge_after=tracker.hedge_delay() if hedge else None, metrics=metrics)
+
 def call_gpt(client, system_prompt: str, user_prompt: str,
              model: str = "gpt-4o-mini", temperature: float = 0.25,
-             max_tokens: int = 2800) -> str:
-    resp = client.chat.completions.create(
-        model=model,
+             max_tokens: int = 2800, use_cache: bool = True,
+             cache: LLMCache = None, metrics: RunMetrics = None,
+             deadline: Deadline = None, hedge: bool = False) -> str:
+    """
+    Single chat completion. Responses are memoized in the on-disk LLM cache
+    keyed by (model, temperature, max_tokens, system prompt, user prompt);
+    pass use_cache=False to force a fresh call. When `metrics` is given, LLM
+    latency, token usage and cache hits are recorded on it. Transient errors
+    are retried within `deadline`; hedge=True may send a duplicate request
+    when the first one is slower than usual.
+    """
+    start = time.perf_counter()
+    key = None
+    if use_cache:
+        cache = cache or get_llm_cache()
+        key = cache.make_key(model, temperature, max_tokens, system_prompt, user_prompt)
+        hit = cache.get(key)
+        if hit is not None:
+            if metrics is not None:
+                metrics.set("llm_cache_hit", True)
+                metrics.add_span("llm", time.perf_counter() - start)
+            return hit
+
+    resp = _create(
+        client, model, deadline=deadline, hedge=hedge, metrics=metrics,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user",   "content": user_prompt},
@@ -12,4 +61,124 @@ def call_gpt(client, system_prompt: str, user_prompt: str,
         temperature=temperature,
         max_tokens=max_tokens
     )
-    return resp.choices[0].message.content
\ No newline at end of file
+    content = resp.choices[0].message.content
+    elapsed = time.perf_counter() - start
+    if metrics is not None:
+        metrics.set("llm_cache_hit", False)
+        metrics.set("model", model)
+        metrics.add_span("llm", elapsed)
+        metrics.add_span("llm_ttft", elapsed)  # non-streaming: first token == full response
+        metrics.record_usage(getattr(resp, "usage", None))
+    if key is not None and content:
+        cache.put(key, content, elapsed=elapsed)
+    return content
+
+def call_gpt_candidates(client, system_prompt: str, user_prompt: str, n: int = 3,
+                        model: str = "gpt-4o-mini", temperature: float = 0.25,
+                        max_tokens: int = 2800, use_cache: bool = True,
+                        cache: LLMCache = None, metrics: RunMetrics = None,
+                        parallel: bool = False, deadline: Deadline = None,
+                        hedge: bool = False) -> List[str]:
+    """
+    `n` alternative completions for the same prompt, for local ranking
+    (core.ranking). By default one request with the API's `n` parameter
+    (prompt tokens are billed once); parallel=True sends n single-choice
+    requests concurrently instead, for backends without `n` support.
+    The candidate list is cached as a whole under its own key.
+    """
+    n = max(1, int(n))
+    start = time.perf_counter()
+    key = None
+    if use_cache:
+        cache = cache or get_llm_cache()
+        key = cache.make_key(f"{model}#n={n}", temperature, max_tokens, system_prompt, user_prompt)
+        hit = cache.get(key)
+        if hit is not None:
+            if metrics is not None:
+                metrics.set("llm_cache_hit", True)
+                metrics.add_span("llm", time.perf_counter() - start)
+            return json.loads(hit)
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user",   "content": user_prompt},
+    ]
+
+    def create(k: int):
+        return _create(client, model, deadline=deadline, hedge=hedge, metrics=metrics,
+                       messages=messages, temperature=temperature, max_tokens=max_tokens, n=k)
+
+    if parallel and n > 1:
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            responses = list(pool.map(lambda _: create(1), range(n)))
+    else:
+        responses = [create(n)]
+    contents = [c.message.content or "" for r in responses for c in r.choices]
+    elapsed = time.perf_counter() - start
+    if metrics is not None:
+        metrics.set("llm_cache_hit", False)
+        metrics.set("model", model)
+        metrics.add_span("llm", elapsed)
+        metrics.add_span("llm_ttft", elapsed)
+        for r in responses:
+            metrics.record_usage(getattr(r, "usage", None))
+    if key is not None and any(contents):
+        cache.put(key, json.dumps(contents), elapsed=elapsed)
+    return contents
+
+def stream_gpt(client, system_prompt: str, user_prompt: str,
+               model: str = "gpt-4o-mini", temperature: float = 0.25,
+               max_tokens: int = 2800, use_cache: bool = True,
+               cache: LLMCache = None, metrics: RunMetrics = None,
+               deadline: Deadline = None) -> Iterator[str]:
+    """
+    Streaming variant of call_gpt: yields content deltas as they arrive.
+    A cache hit is yielded as one chunk; a completed stream is written to
+    the cache under the same key call_gpt uses. Opening the stream is
+    retried like call_gpt; once content flows, only `deadline` applies.
+    """
+    start = time.perf_counter()
+    key = None
+    if use_cache:
+        cache = cache or get_llm_cache()
+        key = cache.make_key(model, temperature, max_tokens, system_prompt, user_prompt)
+        hit = cache.get(key)
+        if hit is not None:
+            if metrics is not None:
+                metrics.set("llm_cache_hit", True)
+                metrics.add_span("llm", time.perf_counter() - start)
+            yield hit
+            return
+
+    stream = _create(
+        client, model, deadline=deadline, metrics=metrics,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user",   "content": user_prompt},
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    parts = []
+    for chunk in stream:
+        if deadline is not None:
+            deadline.check()
+        if getattr(chunk, "usage", None) is not None and metrics is not None:
+            metrics.record_usage(chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if not parts and metrics is not None:
+                metrics.add_span("llm_ttft", time.perf_counter() - start)
+            parts.append(delta)
+            yield delta
+    elapsed = time.perf_counter() - start
+    if metrics is not None:
+        metrics.set("llm_cache_hit", False)
+        metrics.set("model", model)
+        metrics.add_span("llm", elapsed)
+    if key is not None and parts:
+        cache.put(key, "".join(parts), elapsed=elapsed)
@@ -0,0 +1,177 @@
+# core/metrics.py
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+DEFAULT_METRICS_DIR = ".metrics"
+_RESERVOIR = 1000  # recent samples kept per stage for quantiles
+
+
+class RunMetrics:
+    """
+    Per-run timing spans, token usage and flags for one pipeline run.
+
+        run = RunMetrics("generate")
+        with run.span("prompt_build"):
+            ...
+        call_gpt(..., metrics=run)   # records llm latency + usage
+        emit_run(run)
+    """
+
+    def __init__(self, kind: str = "generate", run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.started = time.time()
+        self.spans: Dict[str, float] = {}
+        self.tokens: Dict[str, int] = {"prompt": 0, "completion": 0, "cached": 0}
+        self.flags: Dict[str, Any] = {}
+        self.status = "ok"
+        self._lock = threading.Lock()  # fan-out LLM calls record from worker threads
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, time.perf_counter() - t0)
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def record_usage(self, usage) -> None:
+        """Accumulate an OpenAI `usage` object (or dict) into the token counters."""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda k, d=None: getattr(usage, k, d)
+        details = get("prompt_tokens_details", None)
+        cached = 0
+        if details is not None:
+            cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)
+        with self._lock:
+            self.tokens["prompt"] += int(get("prompt_tokens", 0) or 0)
+            self.tokens["completion"] += int(get("completion_tokens", 0) or 0)
+            self.tokens["cached"] += int(cached or 0)
+
+    def set(self, key: str, value: Any) -> None:
+        self.flags[key] = value
+
+    def incr(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.flags[key] = self.flags.get(key, 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "ts": self.started,
+            "status": self.status,
+            "total_s": round(time.time() - self.started, 4),
+            "spans_s": {k: round(v, 4) for k, v in self.spans.items()},
+            "tokens": dict(self.tokens),
+            **self.flags,
+        }
+
+
+class MetricsSink:
+    """
+    Writes finished runs to a rotating JSONL log and keeps process-wide
+    aggregates, rendered as a Prometheus text-format file.
+    """
+
+    def __init__(self, directory: str = DEFAULT_METRICS_DIR,
+                 max_log_bytes: int = 5 * 1024 * 1024, backups: int = 5):
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "runs.jsonl")
+        self.prom_path = os.path.join(directory, "metrics.prom")
+        self._logger = logging.getLogger(f"resume_tailor.runs.{os.path.abspath(directory)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            h = RotatingFileHandler(self.log_path, maxBytes=max_log_bytes, backupCount=backups, encoding="utf-8")
+            h.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(h)
+        self._lock = threading.Lock()
+        self._stage_sum: Dict[str, float] = defaultdict(float)
+        self._stage_count: Dict[str, int] = defaultdict(int)
+        self._stage_recent: Dict[str, deque] = defaultdict(lambda: deque(maxlen=_RESERVOIR))
+        self._tokens: Dict[str, int] = defaultdict(int)
+        self._runs: Dict[tuple, int] = defaultdict(int)
+        self._flags: Dict[str, int] = defaultdict(int)
+
+    def emit(self, run: RunMetrics) -> Dict[str, Any]:
+        rec = run.to_dict()
+        self._logger.info(json.dumps(rec, ensure_ascii=False))
+        with self._lock:
+            self._runs[(run.kind, run.status)] += 1
+            for stage, s in run.spans.items():
+                self._stage_sum[stage] += s
+                self._stage_count[stage] += 1
+                self._stage_recent[stage].append(s)
+            for k, v in run.tokens.items():
+                self._tokens[k] += v
+            for k, v in run.flags.items():
+                if v is True:
+                    self._flags[k] += 1
+            text = self._prometheus_text()
+        tmp = f"{self.prom_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.prom_path)
+        return rec
+
+    def _prometheus_text(self) -> str:
+        lines = [
+            "# HELP resume_tailor_stage_seconds Pipeline stage latency.",
+            "# TYPE resume_tailor_stage_seconds summary",
+        ]
+        for stage in sorted(self._stage_sum):
+            recent = sorted(self._stage_recent[stage])
+            for q in (0.5, 0.95):
+                v = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+                lines.append(f'resume_tailor_stage_seconds{{stage="{stage}",quantile="{q}"}} {v:.6f}')
+            lines.append(f'resume_tailor_stage_seconds_sum{{stage="{stage}"}} {self._stage_sum[stage]:.6f}')
+            lines.append(f'resume_tailor_stage_seconds_count{{stage="{stage}"}} {self._stage_count[stage]}')
+        lines += ["# HELP resume_tailor_tokens_total LLM tokens used.",
+                  "# TYPE resume_tailor_tokens_total counter"]
+        for k in sorted(self._tokens):
+            lines.append(f'resume_tailor_tokens_total{{kind="{k}"}} {self._tokens[k]}')
+        lines += ["# HELP resume_tailor_runs_total Pipeline runs by kind and status.",
+                  "# TYPE resume_tailor_runs_total counter"]
+        for (kind, status), n in sorted(self._runs.items()):
+            lines.append(f'resume_tailor_runs_total{{kind="{kind}",status="{status}"}} {n}')
+        lines += ["# HELP resume_tailor_flag_total Runs where a boolean flag (e.g. json_repaired) was set.",
+                  "# TYPE resume_tailor_flag_total counter"]
+        for k in sorted(self._flags):
+            lines.append(f'resume_tailor_flag_total{{flag="{k}"}} {self._flags[k]}')
+        return "\n".join(lines) + "\n"
+
+
+_SINK: Optional[MetricsSink] = None
+_SINK_LOCK = threading.Lock()
+
+
+def get_metrics_sink() -> MetricsSink:
+    """Process-wide sink; directory can be set with RESUME_TAILOR_METRICS_DIR."""
+    global _SINK
+    with _SINK_LOCK:
+        if _SINK is None:
+            _SINK = MetricsSink(os.getenv("RESUME_TAILOR_METRICS_DIR", DEFAULT_METRICS_DIR))
+        return _SINK
+
+
+def emit_run(run: RunMetrics) -> Dict[str, Any]:
+    try:
+        return get_metrics_sink().emit(run)
+    except OSError:
+        # metrics must never break a run
+        return run.to_dict()
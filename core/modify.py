@@ -1,7 +1,10 @@
 # core/modify.py
 
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from core.dedupe import NEAR_DUP_THRESHOLD, drop_near_duplicates
+from core.experience import ExperienceModel, JOB_SLOTS, PROJECT_SLOTS, classify_job, classify_project
 
 EM_DASH = "–"  # U+2013/2014 may appear; we'll handle both
 DASH_RE = re.compile(r"[–—-]")  # em/en/hyphen
@@ -61,9 +64,20 @@ def _clean_role(header: str) -> str:
     role = re.sub(r"\s+", " ", role)
     return role
 
-def json_convert(data: dict) -> dict:
+def json_convert(data: dict, missing_skills: dict = None, experience: ExperienceModel = None,
+                 near_dup_threshold: Optional[float] = NEAR_DUP_THRESHOLD, near_dup_keep: str = "first",
+                 report: dict = None) -> dict:
     """
     Convert model JSON to the preset schema your DOCX expects.
+    `missing_skills` (e.g. from core.skills.match_skills) overrides the
+    model's own `missing_skills` buckets when given. `experience` (from
+    core.experience.get_experience_model) maps each job/project header to
+    its template slot and supplies the exact role title.
+
+    Rephrased copies of the same bullet across jobs/projects are removed
+    (core.dedupe; estimated Jaccard >= `near_dup_threshold`, None disables),
+    keeping one per `near_dup_keep` policy. When `report` is a dict, the
+    removed bullets are listed in report["near_duplicates"].
 
     Input:
       data = {
@@ -82,6 +96,8 @@ def json_convert(data: dict) -> dict:
       }
     """
     # ---------- start preset (skills from missing_skills buckets) ----------
+    if missing_skills is not None:
+        data = {**data, "missing_skills": missing_skills}
     out = {
         "TITLE_MAIN": "",
         "TITLE_SUB": "",
@@ -104,61 +120,51 @@ def json_convert(data: dict) -> dict:
         "EXTRA_HOSPITAL":  [],
     }
 
-    # ---------- map experience bullets ----------
-    exp: Dict[str, List[str]] = _get(data, "experience_bullets", default={}) or {}
-    main_set = False
+    # ---------- map experience / project bullets ----------
+    # Headers are resolved against the parsed experience (when given), so each
+    # job/project lands in the slot assigned at parse time; headers the model
+    # invented or reworded beyond recognition fall back to header classification.
+    if experience is not None:
+        # titles come straight from the source, even for sections the template
+        # shows without bullets (and which were therefore not generated)
+        for section in experience.jobs:
+            if section.title_key and not out[section.title_key]:
+                out[section.title_key] = section.role
 
+    exp: Dict[str, List[str]] = _get(data, "experience_bullets", default={}) or {}
     for header, bullets in exp.items():
         header_str = str(header or "")
-        h_low = header_str.lower()
-        blist = _norm_list(bullets)
-
-        # Titles
-        if "intern" in h_low:
-            if not out["TITLE_INTERN"]:
-                out["TITLE_INTERN"] = _clean_role(header_str)
-            out["EXTRA_BULLETS_INTERN"].extend(blist)
-            continue
-
-        if "junior" in h_low or "associate" in h_low:
-            if not out["TITLE_SUB"]:
-                out["TITLE_SUB"] = _clean_role(header_str)
-            out["EXTRA_BULLETS_ASSOCIATE"].extend(blist)
-            continue
-
-        # Treat first non-intern/non-associate as main
-        if not main_set:
-            out["TITLE_MAIN"] = _clean_role(header_str)
-            main_set = True
-
-        # TEK-specific (keep as per your original schema)
-        if "teksystems" in h_low or "tek systems" in h_low:
-            out["EXTRA_BULLETS_TEK"].extend(blist)
+        section = experience.resolve(header_str) if experience is not None else None
+        if section is not None:
+            title_key, bullets_key = section.title_key, section.bullets_key
+            role = section.role
         else:
-            # If you want separate buckets for other employers, add them here.
-            out["EXTRA_BULLETS_TEK"].extend(blist)
-
-    # Deduplicate experience bullets while preserving order
-    out["EXTRA_BULLETS_TEK"]        = _dedupe_keep_order(out["EXTRA_BULLETS_TEK"])
-    out["EXTRA_BULLETS_ASSOCIATE"]  = _dedupe_keep_order(out["EXTRA_BULLETS_ASSOCIATE"])
-    out["EXTRA_BULLETS_INTERN"]     = _dedupe_keep_order(out["EXTRA_BULLETS_INTERN"])
+            title_key, bullets_key = JOB_SLOTS[classify_job(header_str)]
+            role = _clean_role(header_str)
+        if title_key and not out[title_key]:
+            out[title_key] = role
+        if bullets_key:
+            out[bullets_key].extend(_norm_list(bullets))
 
-    # ---------- map projects ----------
     projects: Dict[str, List[str]] = _get(data, "project_bullets", default={}) or {}
     for header, bullets in projects.items():
         header_str = str(header or "")
-        h_low = header_str.lower()
-        blist = _norm_list(bullets)
-
-        if "e-commerce" in h_low or "ecommerce" in h_low:
-            out["EXTRA_ECOMMERCE"].extend(blist)
-        elif "hospital" in h_low:
-            out["EXTRA_HOSPITAL"].extend(blist)
-        else:
-            # Add additional project buckets here if needed
-            pass
-
-    out["EXTRA_ECOMMERCE"] = _dedupe_keep_order(out["EXTRA_ECOMMERCE"])
-    out["EXTRA_HOSPITAL"]  = _dedupe_keep_order(out["EXTRA_HOSPITAL"])
+        section = experience.resolve(header_str) if experience is not None else None
+        bullets_key = section.bullets_key if section is not None else PROJECT_SLOTS.get(classify_project(header_str))
+        if bullets_key:
+            out[bullets_key].extend(_norm_list(bullets))
+
+    # Deduplicate bullets while preserving order
+    bullet_keys = (*(k for _, k in JOB_SLOTS.values()), *PROJECT_SLOTS.values())
+    for key in bullet_keys:
+        out[key] = _dedupe_keep_order(out[key])
+
+    # ---------- near-duplicates across all sections ----------
+    if near_dup_threshold is not None:
+        kept, removed = drop_near_duplicates({k: out[k] for k in bullet_keys},
+                                             threshold=near_dup_threshold, keep=near_dup_keep)
+        out.update(kept)
+        if report is not None:
+            report["near_duplicates"] = removed
 
     return out
\ No newline at end of file
@@ -1,11 +1,68 @@
 import io
 import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 import streamlit as st
 import json
 
-def extract_text_from_upload(uploaded_file) -> str:
-    name = uploaded_file.name.lower()
-    data = uploaded_file.read()
+from core.experience import get_experience_model
+
+# ----------------------------
+# JD text extraction
+# ----------------------------
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # refuse anything bigger than 10 MB
+MAX_PDF_PAGES = 50                   # JDs longer than this are truncated
+PDF_TIME_BUDGET_S = 15.0             # per-document extraction budget
+PDF_PAGES_PER_TASK = 4
+
+_EXTRACT_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jd-extract")
+_TEXT_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_TEXT_CACHE_MAX = 128
+_TEXT_CACHE_LOCK = threading.Lock()
+
+def extract_text_from_upload(uploaded_file, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    size = getattr(uploaded_file, "size", None)
+    if size is not None and size > max_bytes:
+        st.error(f"JD file is too large ({size / 1e6:.1f} MB; limit {max_bytes / 1e6:.0f} MB).")
+        return ""
+    data = uploaded_file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        st.error(f"JD file is too large (limit {max_bytes / 1e6:.0f} MB).")
+        return ""
+    return extract_text_from_bytes(uploaded_file.name, data)
+
+def extract_text_from_bytes(name: str, data: bytes,
+                            max_pages: int = MAX_PDF_PAGES,
+                            time_budget: float = PDF_TIME_BUDGET_S) -> str:
+    """
+    Extract plain text from a JD file's bytes; the format is picked from the
+    file name (.pdf / .docx / .txt, anything else is decoded as text).
+    Results are cached by content hash, so re-uploading the same JD is instant.
+    """
+    name = (name or "").lower()
+    ext = name.rsplit(".", 1)[-1] if "." in name else ""
+    key = hashlib.sha256(ext.encode() + b"\0" + data).hexdigest()
+    with _TEXT_CACHE_LOCK:
+        if key in _TEXT_CACHE:
+            _TEXT_CACHE.move_to_end(key)
+            return _TEXT_CACHE[key]
+
+    text = _extract_text(name, data, max_pages=max_pages, time_budget=time_budget)
+    if text is None:
+        return ""
+    with _TEXT_CACHE_LOCK:
+        _TEXT_CACHE[key] = text
+        while len(_TEXT_CACHE) > _TEXT_CACHE_MAX:
+            _TEXT_CACHE.popitem(last=False)
+    return text
+
+def _extract_text(name: str, data: bytes, max_pages: int, time_budget: float):
+    """Returns extracted text, or None when extraction failed (nothing is cached)."""
     if name.endswith(".txt"):
         return data.decode("utf-8", errors="ignore")
     if name.endswith(".pdf"):
@@ -13,79 +70,292 @@ def extract_text_from_upload(uploaded_file) -> str:
             import PyPDF2
         except ImportError:
             st.error("PyPDF2 not installed. Run: pip install PyPDF2")
-            return ""
-        reader = PyPDF2.PdfReader(io.BytesIO(data))
-        return "\n".join([page.extract_text() or "" for page in reader.pages])
+            return None
+        try:
+            return _extract_pdf_text(data, max_pages=max_pages, time_budget=time_budget)
+        except Exception as e:
+            st.error(f"Could not read PDF: {e}")
+            return None
     if name.endswith(".docx"):
         try:
             import docx
         except ImportError:
             st.error("python-docx not installed. Run: pip install python-docx")
-            return ""
-        doc = docx.Document(io.BytesIO(data))
+            return None
+        try:
+            doc = docx.Document(io.BytesIO(data))
+        except Exception as e:
+            st.error(f"Could not read DOCX: {e}")
+            return None
         return "\n".join([p.text for p in doc.paragraphs])
     # Fallback: try decode as text
     try:
         return data.decode("utf-8", errors="ignore")
     except Exception:
-        return ""
+        return None
+
+def _extract_pdf_pages(data: bytes, start: int, stop: int, deadline: float) -> list:
+    import PyPDF2
+    # Each task gets its own reader: PdfReader is not safe to share across threads.
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    out = []
+    for i in range(start, stop):
+        if time.monotonic() > deadline:
+            break
+        try:
+            out.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            out.append("")  # skip a malformed page instead of failing the document
+    return out
+
+def _extract_pdf_text(data: bytes, max_pages: int, time_budget: float) -> str:
+    """
+    Page-parallel PDF extraction on the shared extraction pool.
+    Only the first `max_pages` pages are read, and whatever finished within
+    `time_budget` seconds is returned (in page order).
+    """
+    import PyPDF2
+    deadline = time.monotonic() + time_budget
+    n_pages = min(len(PyPDF2.PdfReader(io.BytesIO(data)).pages), max_pages)
+    ranges = [(s, min(s + PDF_PAGES_PER_TASK, n_pages)) for s in range(0, n_pages, PDF_PAGES_PER_TASK)]
+    futures = [_EXTRACT_POOL.submit(_extract_pdf_pages, data, s, e, deadline) for s, e in ranges]
+    done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    for f in not_done:
+        f.cancel()
+
+    pages = []
+    for f in futures:
+        if f in done and f.exception() is None:
+            pages.extend(f.result())
+    return "\n".join(pages)
 
 def parse_skill_buckets(text: str, BUCKETS=None) -> dict:
     """
     Parses [Programming]... [Data Engineering]... etc from experience.txt
     Returns dict of {bucket: [skills]}
+    Memoized on (text, buckets); treat the returned dict as read-only.
     """
     BUCKETS = BUCKETS or ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
-    out = {b: [] for b in BUCKETS}
-    blocks = re.split(r"\n\s*(?=\[)", text.strip())
-    for block in blocks:
-        m = re.match(r"\[(?P<h>.+?)\]\s*\n(?P<body>[\s\S]+)", block)
-        if not m:
-            continue
-        h = m.group("h").strip()
-        body = m.group("body").strip()
-        if h in out:
-            items = [i.strip(" •\t,-") for i in re.split(r"[,\n]", body) if i.strip()]
-            out[h] = [i for i in items if i]
-    return out
+    return _parse_skill_buckets(text, tuple(BUCKETS))
+
+@lru_cache(maxsize=16)
+def _parse_skill_buckets(text: str, BUCKETS: tuple) -> dict:
+    return get_experience_model(text).skill_buckets(BUCKETS)
 
-def coerce_json(text: str):
+# ----------------------------
+# Tolerant JSON recovery
+# ----------------------------
+
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_FENCE_START_RE = re.compile(r"```(?:json)?\s*(?=\{)", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+class _Truncated(Exception):
+    """Raised internally when the input ends inside a value."""
+
+class _JSONRecovery:
+    """
+    Single left-to-right pass over model output. Valid JSON parses exactly as
+    json.loads would; when the text is cut off (inside a string, array or
+    object) or has trailing commas / junk between tokens, the parser keeps
+    every value that was complete and closes the open containers.
     """
-    Try to recover a valid JSON object from model output that may include
-    markdown or be slightly malformed/truncated.
 
-    Strategy:
-      1) Prefer fenced ```json ... ``` block if present.
-      2) Else, take substring from first '{' to last '}'.
-      3) Light repairs: balance braces, remove trailing commas.
-    Returns: dict or None
+    def __init__(self, text: str, keep_partial_strings: bool = False):
+        self.s = text
+        self.n = len(text)
+        self.keep_partial = keep_partial_strings
+        self.repairs = []
+        self.truncated = False
+
+    def _ws(self, i: int) -> int:
+        return _WS_RE.match(self.s, i).end()
+
+    def parse(self, start: int):
+        value, end = self._value(start)
+        return value, end
+
+    def _value(self, i: int):
+        i = self._ws(i)
+        if i >= self.n:
+            raise _Truncated()
+        c = self.s[i]
+        if c == "{":
+            return self._object(i + 1)
+        if c == "[":
+            return self._array(i + 1)
+        if c == '"':
+            return self._string(i + 1)
+        m = _NUMBER_RE.match(self.s, i)
+        if m and m.group(0):
+            if m.end() >= self.n:
+                # a number running into EOF may itself be cut off
+                raise _Truncated()
+            integer, frac, exp = m.groups()
+            return (float(integer + (frac or "") + (exp or "")) if frac or exp else int(integer)), m.end()
+        for word, val in _LITERALS.items():
+            if self.s.startswith(word, i):
+                return val, i + len(word)
+            if word.startswith(self.s[i:i + len(word)]) and i + len(word) > self.n:
+                raise _Truncated()
+        raise ValueError(f"unexpected character {c!r} at {i}")
+
+    def _string(self, i: int):
+        try:
+            return json.decoder.scanstring(self.s, i, False)
+        except json.JSONDecodeError:
+            if self.s.find('"', i) != -1:
+                raise
+            # unterminated string at EOF
+            partial = self.s[i:]
+            if not self.keep_partial:
+                raise _Truncated()
+            partial = partial.rstrip("\\")
+            try:
+                text = json.loads('"' + partial + '"', strict=False)
+            except ValueError:
+                text = partial
+            self.repairs.append("closed unterminated string")
+            self.truncated = True
+            return text, self.n
+
+    def _object(self, i: int):
+        out = {}
+        while True:
+            i = self._ws(i)
+            if i >= self.n:
+                self._close("object")
+                return out, i
+            c = self.s[i]
+            if c == "}":
+                return out, i + 1
+            if c == ",":
+                j = self._ws(i + 1)
+                if j < self.n and self.s[j] == "}":
+                    self.repairs.append("removed trailing comma")
+                i += 1
+                continue
+            if c != '"':
+                self.repairs.append(f"skipped stray {c!r}")
+                i += 1
+                continue
+            try:
+                key, i = self._string(i + 1)
+            except _Truncated:
+                self._close("object")
+                return out, self.n
+            i = self._ws(i)
+            if i < self.n and self.s[i] == ":":
+                i += 1
+            elif i < self.n:
+                self.repairs.append("inserted missing ':'")
+            try:
+                value, i = self._value(i)
+            except _Truncated:
+                self.repairs.append(f"dropped incomplete value for {key!r}")
+                self._close("object")
+                return out, self.n
+            out[key] = value
+            if self.truncated:
+                self._close("object")
+                return out, self.n
+
+    def _array(self, i: int):
+        out = []
+        while True:
+            i = self._ws(i)
+            if i >= self.n:
+                self._close("array")
+                return out, i
+            c = self.s[i]
+            if c == "]":
+                return out, i + 1
+            if c == ",":
+                j = self._ws(i + 1)
+                if j < self.n and self.s[j] == "]":
+                    self.repairs.append("removed trailing comma")
+                i += 1
+                continue
+            try:
+                value, i = self._value(i)
+            except _Truncated:
+                self.repairs.append("dropped incomplete array item")
+                self._close("array")
+                return out, self.n
+            out.append(value)
+            if self.truncated:
+                self._close("array")
+                return out, self.n
+
+    def _close(self, kind: str) -> None:
+        self.truncated = True
+        self.repairs.append(f"closed unterminated {kind}")
+
+
+def recover_json(text: str, keep_partial_strings: bool = False):
+    """
+    Recover the largest valid JSON object from (possibly fenced, truncated or
+    slightly malformed) model output in one linear pass.
+
+    Returns (obj_or_None, report) where report is
+      {"extracted": "fenced" | "braces" | None, "repaired": bool,
+       "truncated": bool, "repairs": [str, ...]}
+    A value cut off mid-way (e.g. a half-written bullet) is dropped unless
+    keep_partial_strings=True.
     """
-    # 1) fenced ```json block
-    m = re.search(r"```json\s*(\{[\s\S]*?\})\s*```", text)
+    report = {"extracted": None, "repaired": False, "truncated": False, "repairs": []}
+    text = text or ""
+    m = _FENCE_START_RE.search(text)
     if m:
-        candidate = m.group(1)
+        start = m.end()
+        report["extracted"] = "fenced"
     else:
-        # 2) first { ... last }
         start = text.find("{")
-        end   = text.rfind("}")
-        if start == -1 or end == -1 or end <= start:
-            return None
-        candidate = text[start:end+1]
+        if start == -1:
+            return None, report
+        report["extracted"] = "braces"
 
-    # 3) strict parse
+    p = _JSONRecovery(text, keep_partial_strings=keep_partial_strings)
     try:
-        return json.loads(candidate)
-    except json.JSONDecodeError:
-        # Light repairs
-        open_braces = candidate.count("{")
-        close_braces = candidate.count("}")
-        if close_braces < open_braces:
-            candidate = candidate + ("}" * (open_braces - close_braces))
-        # remove trailing commas before } or ]
-        candidate = re.sub(r",(\s*[}\]])", r"\1", candidate)
-        # collapse unmatched backticks or stray code fences
-        candidate = candidate.replace("```", "")
+        obj, end = p.parse(start)
+    except (ValueError, _Truncated) as e:
+        report["repairs"].append(f"unrecoverable: {e}" if str(e) else "unrecoverable: no complete value")
+        report["repaired"] = True
+        return None, report
+
+    report["repairs"] = p.repairs
+    report["truncated"] = p.truncated
+    report["repaired"] = bool(p.repairs)
+    if not isinstance(obj, dict) or not obj:
+        return None, report
+    return obj, report
+
+def coerce_json(text: str, report: dict = None):
+    """
+    Try to recover a valid JSON object from model output that may include
+    markdown or be malformed/truncated.
+
+    Strategy:
+      1) Strict json.loads when the output is already a bare object.
+      2) Else recover_json(): skip to the ```json fence or first '{', then a
+         single tolerant pass that closes unterminated strings/arrays/objects,
+         drops trailing commas and keeps every complete value.
+    Returns: dict or None
+    If `report` is given, it is filled with recover_json's report.
+    """
+    if report is None:
+        report = {}
+    stripped = (text or "").strip()
+    if stripped.startswith("{"):
         try:
-            return json.loads(candidate)
-        except Exception:
-            return None
\ No newline at end of file
+            obj = json.loads(stripped)
+        except ValueError:
+            pass
+        else:
+            if isinstance(obj, dict):
+                report.update(extracted="braces", repaired=False, truncated=False, repairs=[])
+                return obj
+    obj, rep = recover_json(text)
+    report.update(rep)
+    return obj
@@ -0,0 +1,377 @@
+# core/pipeline.py
+"""
+The LLM stage of one tailoring run, free of Streamlit calls so it can run on
+a background worker (core.jobs) while the UI polls for progress.
+
+    job = get_job_manager().submit(generation_job, key=generation_key(params), **params)
+
+Progress is reported as (section, name, value) events, the same shape the
+incremental JSON parser and fan-out produce, so pollers render them as-is.
+
+Output is checked against the compiled schema for the requested sections
+(core.schema) before anyone converts it; when it fails, the run escalates
+through the model cascade (cheap model first), re-requesting only the
+failing sections when the rest is sound.
+
+regenerate_section() redoes a single [Job]/[Project] section of a finished
+run with the small fan-out prompt and patches only that part of the JSON and
+preset (pair it with core.docx_render.render_docx_incremental).
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.dedupe import NEAR_DUP_THRESHOLD, drop_near_duplicates
+from core.experience import ExperienceModel, Section, normalize_header
+from core.fanout import generate_fanout
+from core.jsonstream import IncrementalJSONParser
+from core.llm import call_gpt, call_gpt_candidates, stream_gpt
+from core.metrics import RunMetrics
+from core.modify import json_convert
+from core.parsers import coerce_json
+from core.prompts import SYSTEM_PROMPT, build_section_prompt
+from core.ranking import rank_candidates
+from core.relevance import BULLET_KEYS, rank_preset_bullets
+from core.resilience import Deadline
+from core.schema import SKILL_KEYS, OutputSchema, failing_parts, fatal, get_schema, needs_retry
+
+
+def generation_key(params: Dict[str, Any]) -> str:
+    """Hash of everything that determines the output, for single-flight de-duplication."""
+    skip = ("client", "metrics", "experience", "sections", "deadline_s", "hedge")  # don't change the output
+    keyed = {k: v for k, v in params.items() if k not in skip}
+    keyed["sections"] = [s.id for s in params.get("sections") or ()]
+    blob = json.dumps(keyed, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def generate(client, jd_text: str, user_prompt: str, experience_text: str,
+             skill_inventory: dict, buckets: list,
+             local: Optional[dict] = None,
+             sections: Optional[Sequence[Section]] = None,
+             experience: Optional[ExperienceModel] = None,
+             include_skills: bool = True,
+             fan_out: bool = False, n_candidates: int = 1, stream: bool = False,
+             model: str = "gpt-4o-mini", temperature: float = 0.25, max_tokens: int = 2800,
+             use_cache: bool = True, metrics: RunMetrics = None,
+             deadline_s: Optional[float] = None, hedge: bool = False,
+             models: Optional[Sequence[str]] = None, validate: bool = True,
+             on_event: Optional[Callable[..., None]] = None,
+             check_cancelled: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Produce the tailored JSON for one JD. Mode: fan_out (one call per
+    section), n_candidates > 1 (pick the best locally), stream, or a single
+    call. `check_cancelled()` is called between chunks / sections and should
+    raise to stop early; `deadline_s` bounds all LLM requests of the run
+    (retries included), see core.resilience.
+
+    With `validate`, the result is checked against core.schema and, while
+    it fails, redone with the next model of `models` (default: just
+    `model`, which then only filters out unusable output); see escalate().
+
+    Returns {"data" (None if unparseable or invalid), "raw", "repair",
+    "ranked", "chosen", "validation", "model", "section_errors"} where
+    ranked is [{"index", "score"}] for candidate runs (best score first),
+    chosen the index of the candidate actually used (None when escalation
+    replaced it), validation the remaining core.schema issues, model the
+    cascade tier that produced the data and section_errors the fan-out
+    requests that failed and were not made up for ({header: error}).
+    """
+    emit = on_event or (lambda *e: None)
+    check = check_cancelled or (lambda: None)
+    metrics = metrics or RunMetrics("generate")
+    deadline = Deadline(deadline_s) if deadline_s else None
+    models = list(models or [model])
+    model = models[0]
+    if sections is None and experience is not None:
+        sections = experience.sections
+    schema = get_schema(sections or (), buckets, include_skills=include_skills and local is None) if validate else None
+    for section, groups in (local or {}).items():
+        for name, value in groups.items():
+            emit(section, name, value)
+
+    repair: Dict[str, Any] = {}
+    fanout_report: Dict[str, Any] = {}
+    ranked = None
+    check()
+    if fan_out and sections:
+        def on_section(section, name, value):
+            emit(section, name, value)
+            check()
+
+        with metrics.span("llm_fanout"):
+            data, raws = generate_fanout(
+                client=client,
+                job_description=jd_text,
+                experience_text=experience_text,
+                skill_inventory=skill_inventory,
+                buckets=buckets,
+                local_skills=local,
+                sections=[(s.kind, s.header, s.body) for s in sections],
+                include_skills=include_skills,
+                model=model,
+                temperature=temperature,
+                use_cache=use_cache,
+                metrics=metrics,
+                deadline=deadline,
+                hedge=hedge,
+                on_section=on_section,
+                report=fanout_report
+            )
+        metrics.set("fanout_sections", len(raws))
+        raw = json.dumps(raws, indent=2, ensure_ascii=False)
+    else:
+        if n_candidates > 1:
+            raws = call_gpt_candidates(
+                client=client, system_prompt=SYSTEM_PROMPT, user_prompt=user_prompt, n=n_candidates,
+                model=model, temperature=temperature, max_tokens=max_tokens,
+                use_cache=use_cache, metrics=metrics, deadline=deadline, hedge=hedge
+            )
+            check()
+            with metrics.span("rank"):
+                candidates = rank_candidates(raws, jd_text, skill_inventory, buckets, local=local,
+                                             experience=experience, sections=sections)
+            best = pick_candidate(candidates, schema)
+            raw = best["raw"]
+            ranked = [{"index": c["index"], "score": c["score"]} for c in candidates]
+            metrics.set("candidates", len(raws))
+            metrics.set("candidate_scores", [c["score"] for c in ranked])
+        elif stream:
+            parser = IncrementalJSONParser()
+            chunks = []
+            for delta in stream_gpt(
+                client=client, system_prompt=SYSTEM_PROMPT, user_prompt=user_prompt,
+                model=model, temperature=temperature, max_tokens=max_tokens,
+                use_cache=use_cache, metrics=metrics, deadline=deadline
+            ):
+                check()
+                chunks.append(delta)
+                for event in parser.feed(delta):
+                    emit(*event)
+            raw = "".join(chunks)
+        else:
+            raw = call_gpt(
+                client=client, system_prompt=SYSTEM_PROMPT, user_prompt=user_prompt,
+                model=model, temperature=temperature, max_tokens=max_tokens,
+                use_cache=use_cache, metrics=metrics, deadline=deadline, hedge=hedge
+            )
+            check()
+
+        with metrics.span("coerce_json"):
+            data = coerce_json(raw, report=repair)
+        metrics.set("json_repaired", bool(repair.get("repaired")))
+        metrics.set("json_truncated", bool(repair.get("truncated")))
+        if data is not None and local is not None:
+            data = {**data, **local}
+
+    issues: List[Dict[str, Any]] = []
+    tier = 0
+    if schema is not None:
+        data, raw, issues, tier = escalate(
+            client, data, raw, schema, models, jd_text=jd_text, user_prompt=user_prompt,
+            experience_text=experience_text, skill_inventory=skill_inventory, buckets=buckets,
+            local=local, sections=sections, temperature=temperature, max_tokens=max_tokens,
+            use_cache=use_cache, metrics=metrics, deadline=deadline, hedge=hedge,
+            on_event=emit, check_cancelled=check, report=fanout_report
+        )
+    chosen = None
+    if ranked is not None and raw is best["raw"]:  # else a full escalation replaced the candidate
+        chosen = best["index"]
+    return {"data": data, "raw": raw, "repair": repair, "ranked": ranked, "chosen": chosen,
+            "validation": issues, "model": models[tier],
+            "section_errors": fanout_report.get("section_errors") or {}}
+
+
+def pick_candidate(candidates: List[Dict[str, Any]], schema: Optional[OutputSchema] = None) -> Dict[str, Any]:
+    """
+    The best-scoring of core.ranking.rank_candidates' candidates that passes
+    `schema` (report-only issues allowed), else the first without fatal ones, else the top one.
+    """
+    if schema is None:
+        return candidates[0]
+    fallback = None
+    for c in candidates:
+        if c["data"] is None:
+            continue
+        issues = schema.validate(c["data"])
+        if not needs_retry(issues):
+            return c
+        if fallback is None and not fatal(issues):
+            fallback = c
+    return fallback or candidates[0]
+
+
+def _severity(issues: List[Dict[str, Any]]) -> Tuple[int, int]:
+    return sum(i["fatal"] for i in issues), sum(i["retry"] for i in issues)
+
+
+def _merge_patch(data: Dict[str, Any], patch: Dict[str, Any], redo_skills: bool) -> Dict[str, Any]:
+    """Replace the re-requested sections of `data` (matched by normalized header) with `patch`'s."""
+    out = dict(data)
+    for target in ("experience_bullets", "project_bullets"):
+        fresh = patch.get(target) or {}
+        if not fresh:
+            continue
+        entries = dict(out.get(target) or {})
+        by_norm = {normalize_header(str(h)): h for h in entries}
+        for header, bullets in fresh.items():
+            entries[by_norm.get(normalize_header(header), header)] = bullets
+        out[target] = entries
+    if redo_skills:
+        for key in SKILL_KEYS:
+            if key in patch:
+                out[key] = patch[key]
+    return out
+
+
+def escalate(client, data: Optional[Dict[str, Any]], raw: str, schema: OutputSchema, models: Sequence[str],
+             jd_text: str, user_prompt: str, experience_text: str, skill_inventory: dict, buckets: list,
+             local: Optional[dict] = None, sections: Optional[Sequence[Section]] = None,
+             temperature: float = 0.25, max_tokens: int = 2800, use_cache: bool = True,
+             metrics: RunMetrics = None, deadline: Optional[Deadline] = None, hedge: bool = False,
+             on_event: Optional[Callable[..., None]] = None,
+             check_cancelled: Optional[Callable[[], None]] = None, report: Optional[dict] = None
+             ) -> Tuple[Optional[Dict[str, Any]], str, List[Dict[str, Any]], int]:
+    """
+    Validate `data` (produced by models[0]) and, while it has issues worth a
+    retry (core.schema.needs_retry), retry with the next model in the
+    cascade: only the failing sections (the small fan-out prompts) when the
+    rest of the response is sound, the whole prompt otherwise. A whole new
+    response replaces `data` only if it has no more fatal (then retry)
+    issues than the one it would replace. Returns (data, raw, issues, tier); data is None when
+    fatal issues remain after the last model, so invalid output never gets
+    converted. report["section_errors"] (from generate_fanout, if any) is
+    updated with the re-requests' failures and trimmed to the sections that
+    still have issues.
+    """
+    emit = on_event or (lambda *e: None)
+    check = check_cancelled or (lambda: None)
+    metrics = metrics or RunMetrics("generate")
+    by_header = {s.header: s for s in sections or ()}
+    errors: Dict[str, str] = dict((report or {}).get("section_errors") or {})
+
+    def check_schema(d):
+        with metrics.span("validate"):
+            return schema.validate(d) if d is not None else [{"section": "output", "header": None,
+                                                              "message": "could not parse JSON", "fatal": True,
+                                                              "retry": True}]
+
+    issues = check_schema(data)
+    tier = 0
+    while needs_retry(issues) and tier + 1 < len(models):
+        check()
+        tier += 1
+        redo_skills, headers = failing_parts(issues)
+        partial = (data is not None and all(i["header"] or i["section"] == "skills"
+                                            for i in issues if i["retry"])
+                   and all(h in by_header for h in headers)
+                   and len(headers) <= max(1, len(schema.sections) // 2))
+        if partial:
+            patch_report: Dict[str, Any] = {}
+            with metrics.span("llm_escalate"):
+                patch, _ = generate_fanout(
+                    client=client, job_description=jd_text, experience_text=experience_text,
+                    skill_inventory=skill_inventory, buckets=buckets, local_skills=None,
+                    sections=[(by_header[h].kind, h, by_header[h].body) for h in headers],
+                    include_skills=redo_skills, model=models[tier], temperature=temperature,
+                    use_cache=use_cache, metrics=metrics, deadline=deadline, hedge=hedge, on_section=emit,
+                    report=patch_report
+                )
+            errors.update(patch_report["section_errors"])
+            data = _merge_patch(data, patch, redo_skills)
+            metrics.incr("sections_escalated", len(headers) + int(redo_skills))
+        else:
+            with metrics.span("llm_escalate"):
+                fresh_raw = call_gpt(
+                    client=client, system_prompt=SYSTEM_PROMPT, user_prompt=user_prompt,
+                    model=models[tier], temperature=temperature, max_tokens=max_tokens,
+                    use_cache=use_cache, metrics=metrics, deadline=deadline, hedge=hedge
+                )
+            fresh = coerce_json(fresh_raw or "")
+            metrics.incr("full_escalations")
+            if fresh is None:
+                continue
+            fresh = {**fresh, **local} if local is not None else fresh
+            fresh_issues = check_schema(fresh)
+            if _severity(fresh_issues) > _severity(issues):
+                continue  # the stronger model did worse; keep what we have
+            data, raw, issues = fresh, fresh_raw, fresh_issues
+            for target in ("experience_bullets", "project_bullets"):
+                for header, bullets in (data.get(target) or {}).items():
+                    emit(target, header, bullets)
+            continue
+        issues = check_schema(data)
+
+    metrics.set("model_tier", tier)
+    metrics.set("model", models[tier])
+    metrics.set("validation_issues", len(issues))
+    if report is not None:
+        unresolved = {i["header"] or i["section"] for i in issues}
+        report["section_errors"] = {h: e for h, e in errors.items() if h in unresolved}
+    if fatal(issues):
+        data = None
+    return data, raw, issues, tier
+
+
+def generation_job(job, **params) -> Dict[str, Any]:
+    """core.jobs entry point: generate() with progress and cancellation wired to `job`."""
+    return generate(on_event=job.emit, check_cancelled=job.check_cancelled, **params)
+
+
+def regenerate_section(client, jd_text: str, section: Section, data: Dict[str, Any],
+                       preset: Optional[Dict[str, Any]], experience: ExperienceModel,
+                       model: str = "gpt-4o-mini", temperature: float = 0.25,
+                       order_by_relevance: bool = False, top_k: Optional[int] = None,
+                       near_dup_threshold: Optional[float] = NEAR_DUP_THRESHOLD,
+                       metrics: RunMetrics = None, deadline_s: Optional[float] = None,
+                       hedge: bool = False, report: Optional[dict] = None) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Fresh bullets for one section (always a new LLM call, never the cache).
+    Returns (data, preset) with only that section's entry / template slot
+    replaced; every other key is shared with the inputs. The new bullets are
+    de-duplicated against the other slots (only the new ones are dropped) and
+    ranked / trimmed like a full run. report gets "raw" and "near_duplicates".
+    """
+    metrics = metrics or RunMetrics("regenerate")
+    with metrics.span("llm_section"):
+        raw = call_gpt(
+            client=client, system_prompt=SYSTEM_PROMPT,
+            user_prompt=build_section_prompt(jd_text, section.header, section.body, kind=section.kind),
+            model=model, temperature=temperature, max_tokens=700, use_cache=False,
+            metrics=metrics, deadline=Deadline(deadline_s) if deadline_s else None, hedge=hedge
+        )
+    bullets = (coerce_json(raw or "") or {}).get("bullets")
+    if report is not None:
+        report["raw"] = raw
+    if not isinstance(bullets, list) or not bullets:
+        raise ValueError(f"model returned no bullets for [{section.header}]")
+
+    # the run's JSON may echo the header slightly differently; replace that entry
+    target = "experience_bullets" if section.kind == "job" else "project_bullets"
+    entries = dict(data.get(target) or {})
+    header = next((h for h in entries if experience.resolve(str(h)) is section), section.header)
+    entries[header] = bullets
+    data = {**data, target: entries}
+
+    slot = section.bullets_key
+    if preset is None or slot is None:
+        return data, preset
+    # the slot may be shared by several sections: rebuild it from all of them
+    with metrics.span("json_convert"):
+        fresh = json_convert(data, experience=experience, near_dup_threshold=None)[slot]
+    removed = []
+    if near_dup_threshold is not None:
+        others = {k: preset.get(k) or [] for k in BULLET_KEYS if k != slot}
+        kept, removed = drop_near_duplicates({**others, slot: fresh}, threshold=near_dup_threshold)
+        removed = [r for r in removed if r["section"] == slot]
+        fresh = kept[slot]
+    preset = {**preset, slot: fresh}
+    if order_by_relevance or top_k:
+        with metrics.span("relevance"):
+            preset = rank_preset_bullets(preset, jd_text, top_k=top_k or None, keys=(slot,))
+    metrics.set("regenerated_section", section.id)
+    metrics.set("near_duplicates_removed", len(removed))
+    if report is not None:
+        report["near_duplicates"] = removed
+    return data, preset
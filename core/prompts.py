@@ -8,7 +8,8 @@ SYSTEM_PROMPT = (
     "Return ONLY a single valid JSON object. No markdown, no code fences, no explanations."
 )
 
-def build_user_prompt(job_description: str, experience_text: str, skill_inventory: dict, buckets: list) -> str:
+def build_user_prompt(job_description: str, experience_text: str, skill_inventory: dict, buckets: list,
+                      include_skills: bool = True) -> str:
     """
     JSON-only prompt:
       - keywords: top JD terms per bucket
@@ -16,7 +17,12 @@ def build_user_prompt(job_description: str, experience_text: str, skill_inventor
       - experience_bullets: tailored bullets per Job (keep jobs separate; keys are the exact Job headers)
       - project_bullets: tailored bullets per Project (keep projects separate; keys are the exact Project headers)
     Bullet density & style constraints are explicit for longer/more detailed output.
+
+    With include_skills=False, keywords/missing_skills are computed locally
+    (core.skills) and the prompt asks for bullets only.
     """
+    if not include_skills:
+        return build_bullets_prompt(job_description, experience_text)
     return f"""
 You will receive:
 1) Job Description (JD).
@@ -71,4 +77,93 @@ DATA:
 
 === CANDIDATE SKILL INVENTORY (BUCKETED) ===
 {skill_inventory}
-""".strip()
\ No newline at end of file
+""".strip()
+
+def build_bullets_prompt(job_description: str, experience_text: str) -> str:
+    """
+    Bullets-only variant of build_user_prompt, used when keywords and
+    missing skills come from the local matcher.
+    """
+    return f"""
+You will receive:
+1) Job Description (JD).
+2) Candidate experience text including:
+   - [Work Experience] sections like [Job: Title – Company (Dates)]
+   - [Projects] sections like [Project: Name (Dates)]
+
+TASK:
+Generate ATS-friendly, quantifiable, and concise bullets tailored to the JD:
+   - For EACH Job: produce 6–9 bullets.
+   - For EACH Project: produce 4–6 bullets.
+   - Target 18–28 words per bullet; start with a strong verb; weave in relevant JD terms; quantify impact where appropriate.
+   - Do NOT invent employment, companies, dates, or tools; only rephrase facts to emphasize fit.
+   - Avoid near-duplicates across jobs/projects; vary verbs and metrics.
+
+OUTPUT (JSON only; no markdown/backticks/explanations):
+{{
+  "experience_bullets": {{
+    "<Job: Title – Company (Dates)>": [string]
+  }},
+  "project_bullets": {{
+    "<Project: Name (Dates)>": [string]
+  }}
+}}
+
+DATA:
+=== JOB DESCRIPTION ===
+{job_description}
+
+=== CANDIDATE EXPERIENCE (DO NOT CHANGE FACTS) ===
+{experience_text}
+""".strip()
+
+def build_section_prompt(job_description: str, header: str, section_text: str, kind: str = "job") -> str:
+    """
+    Prompt for ONE [Job: ...] or [Project: ...] section (fan-out mode).
+    Returns {"bullets": [string]} so results can be merged per header.
+    """
+    count = "6–9" if kind == "job" else "4–6"
+    return f"""
+You will receive a Job Description (JD) and ONE section of the candidate's experience: [{header}].
+
+TASK:
+Generate {count} ATS-friendly, quantifiable, and concise bullets for this section only, tailored to the JD:
+   - Target 18–28 words per bullet; start with a strong verb; weave in relevant JD terms; quantify impact where appropriate.
+   - Do NOT invent employment, companies, dates, or tools; only rephrase facts to emphasize fit.
+   - Avoid near-duplicates; vary verbs and metrics.
+
+OUTPUT (JSON only; no markdown/backticks/explanations):
+{{
+  "bullets": [string]
+}}
+
+DATA:
+=== JOB DESCRIPTION ===
+{job_description}
+
+=== SECTION: {header} (DO NOT CHANGE FACTS) ===
+{section_text}
+""".strip()
+
+def build_skills_prompt(job_description: str, skill_inventory: dict, buckets: list) -> str:
+    """Keywords / missing skills only (fan-out mode without the local matcher)."""
+    return f"""
+You will receive a Job Description (JD) and the candidate's skill inventory grouped by buckets {buckets}.
+
+TASKS:
+A) Extract the top, high-signal JD keywords/phrases grouped by {buckets}. Keep lists concise and deduplicated.
+B) Identify only the genuinely missing skills/keywords per bucket by comparing the JD to skill_inventory.
+
+OUTPUT (JSON only; no markdown/backticks/explanations):
+{{
+  "keywords": {{ "<bucket>": [string] }},
+  "missing_skills": {{ "<bucket>": [string] }}
+}}
+
+DATA:
+=== JOB DESCRIPTION ===
+{job_description}
+
+=== CANDIDATE SKILL INVENTORY (BUCKETED) ===
+{skill_inventory}
+""".strip()
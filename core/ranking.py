@@ -0,0 +1,146 @@
+# core/ranking.py
+"""
+Local scoring of tailored outputs, used to pick the best of several
+candidates from one generation without another round trip.
+
+Score (0..1) blends:
+  - coverage:     JD skills the candidate owns, and frequent JD terms, that
+                  appear in the bullets
+  - length:       bullets inside the 18–28 word target the prompt asks for
+  - duplication:  share of bullets that are not near-copies of an earlier one
+  - completeness: share of expected job/project slots that got bullets
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.experience import JOB_SLOTS, PROJECT_SLOTS, ExperienceModel, Section
+from core.modify import json_convert
+from core.parsers import coerce_json
+from core.skills import get_skill_matcher
+
+BULLET_KEYS = tuple(k for _, k in JOB_SLOTS.values()) + tuple(PROJECT_SLOTS.values())
+WORDS_TARGET = (18, 28)
+NEAR_DUP_JACCARD = 0.6
+WEIGHTS = {"coverage": 0.55, "length": 0.15, "duplication": 0.15, "completeness": 0.15}
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]{2,}")
+_STOPWORDS = frozenset("""
+    the and for with you our are will from that this have your has was were they their them who what
+    when where which while into onto about across over under more most other such than then also
+    able ability experience years year work working team teams including include includes using use
+    role job position company candidate candidates strong skills skill knowledge understanding
+    plus preferred required requirements responsibilities qualifications must should would can
+    all any each both new well within based high level etc per via not but its it's out one two
+    equal opportunity employer benefits insurance paid time off medical dental vision matching
+""".split())
+
+
+def jd_targets(jd_text: str, skill_inventory: Dict[str, List[str]], buckets: Optional[List[str]] = None,
+               top_terms: int = 25) -> Tuple[List[str], List[str]]:
+    """
+    (skills, terms) a good candidate should mention: JD skills the candidate
+    already has (mentioning missing ones would be fabrication), and the most
+    frequent non-boilerplate JD words.
+    """
+    matched = get_skill_matcher(skill_inventory, buckets).match(jd_text)
+    missing = {s for group in matched["missing_skills"].values() for s in group}
+    skills = [s for group in matched["keywords"].values() for s in group if s not in missing]
+    counts = Counter(t for t in _TOKEN_RE.findall((jd_text or "").lower()) if t not in _STOPWORDS)
+    terms = [t for t, _ in counts.most_common(top_terms)]
+    return skills, terms
+
+
+def preset_bullets(preset: Dict[str, Any]) -> List[str]:
+    return [b for k in BULLET_KEYS for b in (preset.get(k) or []) if isinstance(b, str)]
+
+
+def _length_score(bullets: List[str]) -> float:
+    lo, hi = WORDS_TARGET
+    total = 0.0
+    for b in bullets:
+        w = len(b.split())
+        dist = lo - w if w < lo else w - hi if w > hi else 0
+        total += max(0.0, 1.0 - dist / 10.0)
+    return total / len(bullets)
+
+
+def _duplication(bullets: List[str]) -> float:
+    """Share of bullets whose word-bigram Jaccard with an earlier bullet is >= NEAR_DUP_JACCARD."""
+    seen: List[set] = []
+    dups = 0
+    for b in bullets:
+        words = _TOKEN_RE.findall(b.lower())
+        grams = set(zip(words, words[1:])) or set(words)
+        for other in seen:
+            union = len(grams | other)
+            if union and len(grams & other) / union >= NEAR_DUP_JACCARD:
+                dups += 1
+                break
+        seen.append(grams)
+    return dups / len(bullets)
+
+
+def score_preset(preset: Dict[str, Any], skills: List[str], terms: List[str],
+                 expected_keys: Optional[Iterable[str]] = None, matcher=None) -> Dict[str, float]:
+    """Score one json_convert preset; returns the blended `score` plus each component."""
+    bullets = preset_bullets(preset)
+    if not bullets:
+        return {"score": 0.0, "coverage": 0.0, "length": 0.0, "duplication": 0.0, "completeness": 0.0, "bullets": 0}
+    text = " ".join(bullets)
+    found = {s for s, _ in matcher.scan(text)} if matcher is not None and skills else set()
+    tokens = set(_TOKEN_RE.findall(text.lower()))
+    skill_cov = len(found & set(skills)) / len(skills) if skills else None
+    term_cov = len(tokens & set(terms)) / len(terms) if terms else 1.0
+    coverage = term_cov if skill_cov is None else 0.65 * skill_cov + 0.35 * term_cov
+    expected = [k for k in (expected_keys or ())]
+    completeness = sum(1 for k in expected if preset.get(k)) / len(expected) if expected else 1.0
+    parts = {
+        "coverage": coverage,
+        "length": _length_score(bullets),
+        "duplication": _duplication(bullets),
+        "completeness": completeness,
+    }
+    score = (WEIGHTS["coverage"] * parts["coverage"] + WEIGHTS["length"] * parts["length"]
+             + WEIGHTS["duplication"] * (1.0 - parts["duplication"])
+             + WEIGHTS["completeness"] * parts["completeness"])
+    return {"score": round(score, 4), **{k: round(v, 4) for k, v in parts.items()}, "bullets": len(bullets)}
+
+
+def rank_candidates(raws: List[str], jd_text: str, skill_inventory: Dict[str, List[str]],
+                    buckets: Optional[List[str]] = None, local: Optional[dict] = None,
+                    experience: Optional[ExperienceModel] = None,
+                    sections: Optional[Iterable[Section]] = None) -> List[Dict[str, Any]]:
+    """
+    Parse, convert and score each raw model output; best first.
+
+    Each entry: {"index", "raw", "data", "preset", "report", "score", "breakdown"}.
+    Candidates that cannot be parsed sort last with score -1. `local` is the
+    match_skills result merged in as the pipeline does; `sections` (default:
+    every experience section) sets which slots are expected to get bullets.
+    """
+    skills, terms = jd_targets(jd_text, skill_inventory, buckets)
+    matcher = get_skill_matcher(skill_inventory, buckets)
+    if sections is None and experience is not None:
+        sections = experience.sections
+    expected = {s.bullets_key for s in sections or () if s.bullets_key}
+
+    out = []
+    for i, raw in enumerate(raws):
+        report: Dict[str, Any] = {}
+        data = coerce_json(raw or "", report=report)
+        entry = {"index": i, "raw": raw, "data": data, "preset": None, "report": report,
+                 "score": -1.0, "breakdown": {}}
+        if data is not None:
+            if local is not None:
+                data = entry["data"] = {**data, **local}
+            preset = json_convert(data, missing_skills=local["missing_skills"] if local else None,
+                                  experience=experience)
+            breakdown = score_preset(preset, skills, terms, expected_keys=expected, matcher=matcher)
+            if report.get("truncated"):
+                breakdown["score"] = round(breakdown["score"] * 0.9, 4)  # salvaged output is incomplete
+            entry.update(preset=preset, score=breakdown["score"], breakdown=breakdown)
+        out.append(entry)
+    out.sort(key=lambda e: (-e["score"], e["index"]))
+    return out
@@ -0,0 +1,182 @@
+# core/relevance.py
+"""
+Local JD relevance scoring for bullets (BM25 weights, NumPy).
+
+    index = RelevanceIndex(bullets)
+    index.score(jd_text)              # (n_bullets,) in [0, 1]
+    index.score_many(jd_texts)        # (n_jds, n_bullets), one matrix product
+
+Bullets are weighted with BM25 (term saturation + length normalization, IDF
+over the bullet set) and L2-normalized; a JD is a log-scaled term-count
+vector over the same vocabulary, also L2-normalized, so scores are
+cosine-like and comparable across JDs.
+
+CLI: rank a folder of JDs by how well your experience bullets fit them.
+
+    python -m core.relevance jds/ [--preset tailored_preset.json] [--top 20]
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from core.experience import JOB_SLOTS, PROJECT_SLOTS
+
+if TYPE_CHECKING:  # for annotations; RelevanceIndex and the scorers import numpy when they run
+    import numpy as np
+
+BULLET_KEYS = tuple(k for _, k in JOB_SLOTS.values()) + tuple(PROJECT_SLOTS.values())
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]*")
+_STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or our that the their this to was were
+    will with you your we us who what when where which while into over under more most other such than
+    also able ability experience years year work working team teams role job position company
+    candidate strong skills knowledge plus preferred required requirements responsibilities
+    equal opportunity employer benefits insurance paid time off medical dental vision
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+class RelevanceIndex:
+    """BM25-weighted term matrix over a fixed set of bullets, queried by JD text."""
+
+    def __init__(self, docs: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        import numpy as np
+
+        self.docs = list(docs)
+        toks = [tokenize(d) for d in self.docs]
+        self.vocab: Dict[str, int] = {}
+        for ts in toks:
+            for t in ts:
+                self.vocab.setdefault(t, len(self.vocab))
+        n, v = len(self.docs), len(self.vocab)
+        tf = np.zeros((n, max(v, 1)), dtype=np.float32)
+        rows = np.fromiter((i for i, ts in enumerate(toks) for _ in ts), dtype=np.int64)
+        cols = np.fromiter((self.vocab[t] for ts in toks for t in ts), dtype=np.int64)
+        np.add.at(tf, (rows, cols), 1.0)
+
+        dl = tf.sum(axis=1, keepdims=True)
+        avgdl = float(dl.mean()) if n else 1.0
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        denom = tf + k1 * (1.0 - b + b * dl / max(avgdl, 1e-9))
+        w = np.where(tf > 0, tf * (k1 + 1.0) / np.maximum(denom, 1e-9), 0.0) * idf
+        norms = np.linalg.norm(w, axis=1, keepdims=True)
+        self.weights = (w / np.maximum(norms, 1e-9)).astype(np.float32)  # (n_docs, vocab)
+
+    def query_matrix(self, queries: Sequence[str]) -> "np.ndarray":
+        """(vocab, n_queries) log-scaled, L2-normalized term vectors (terms outside the bullets are dropped)."""
+        import numpy as np
+
+        q = np.zeros((self.weights.shape[1], len(queries)), dtype=np.float32)
+        for j, text in enumerate(queries):
+            counts: Dict[int, int] = {}
+            for t in tokenize(text):
+                i = self.vocab.get(t)
+                if i is not None:
+                    counts[i] = counts.get(i, 0) + 1
+            if counts:
+                idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                q[idx, j] = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        norms = np.linalg.norm(q, axis=0, keepdims=True)
+        return q / np.maximum(norms, 1e-9)
+
+    def score(self, query: str) -> "np.ndarray":
+        return self.score_many([query])[0]
+
+    def score_many(self, queries: Sequence[str]) -> "np.ndarray":
+        """(n_queries, n_docs) relevance of every bullet to every query."""
+        if not self.docs:
+            import numpy as np
+            return np.zeros((len(queries), 0), dtype=np.float32)
+        return (self.weights @ self.query_matrix(queries)).T
+
+
+def rank_preset_bullets(preset: Dict[str, Any], jd_text: str, top_k: Optional[int] = None,
+                        keys: Sequence[str] = BULLET_KEYS,
+                        report: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Reorder every bullet list in `preset` by relevance to the JD (most
+    relevant first; ties keep model order) and, with `top_k`, keep only the
+    best `top_k` per section. Returns a new preset; per-bullet scores go to
+    report["relevance"] = {key: [score, ...]} in the new order.
+    """
+    import numpy as np
+
+    flat: List[Tuple[str, str]] = [(k, b) for k in keys for b in (preset.get(k) or [])]
+    out = dict(preset)
+    if not flat:
+        return out
+    scores = RelevanceIndex([b for _, b in flat]).score(jd_text)
+    by_key: Dict[str, List[Tuple[float, int, str]]] = {}
+    for pos, ((k, b), s) in enumerate(zip(flat, scores.tolist())):
+        by_key.setdefault(k, []).append((s, pos, b))
+    rel: Dict[str, List[float]] = {}
+    for k, items in by_key.items():
+        items.sort(key=lambda x: (-x[0], x[1]))
+        if top_k:
+            items = items[:top_k]
+        out[k] = [b for _, _, b in items]
+        rel[k] = [round(float(s), 4) for s, _, _ in items]
+    if report is not None:
+        report["relevance"] = rel
+        report["dropped_by_top_k"] = len(flat) - sum(len(v) for v in rel.values())
+    return out
+
+
+def score_jds(bullets: Sequence[str], jd_texts: Sequence[str], top_n: int = 15) -> "np.ndarray":
+    """
+    Fit of one bullet set to many JDs: the mean of each JD's `top_n` best
+    bullet scores (so a long experience file is not penalized for breadth).
+    """
+    import numpy as np
+
+    scores = RelevanceIndex(bullets).score_many(jd_texts)
+    if scores.shape[1] == 0:
+        return np.zeros(len(jd_texts), dtype=np.float32)
+    n = min(top_n, scores.shape[1])
+    best = -np.partition(-scores, n - 1, axis=1)[:, :n]
+    return best.mean(axis=1)
+
+
+def main(argv=None) -> int:
+    from core.config import get_experience_text
+    from core.experience import get_experience_model
+    from core.parsers import extract_text_from_bytes
+
+    ap = argparse.ArgumentParser(description="Rank JD files by how well your bullets fit them.")
+    ap.add_argument("jd_dir", help="Folder containing JD files (PDF/DOCX/TXT)")
+    ap.add_argument("--preset", help="Score a tailored preset JSON's bullets instead of experience.txt")
+    ap.add_argument("--top", type=int, default=20, help="How many JDs to print")
+    ap.add_argument("--top-n", type=int, default=15, help="Best bullets averaged per JD")
+    args = ap.parse_args(argv)
+
+    if args.preset:
+        data = json.loads(Path(args.preset).read_text(encoding="utf-8"))
+        data = data.get("preset", data)  # accept core.batch output files too
+        bullets = [b for k in BULLET_KEYS for b in data.get(k) or []]
+    else:
+        bullets = [b for s in get_experience_model(get_experience_text()).sections for b in s.bullets]
+    if not bullets:
+        print("No bullets to score.", file=sys.stderr)
+        return 1
+
+    paths = sorted(p for p in Path(args.jd_dir).iterdir()
+                   if p.is_file() and p.suffix.lower() in (".pdf", ".docx", ".txt"))
+    texts = [extract_text_from_bytes(p.name, p.read_bytes()) for p in paths]
+    fit = score_jds(bullets, texts, top_n=args.top_n)
+    order = sorted(range(len(paths)), key=lambda i: -fit[i])
+    for i in order[:args.top]:
+        print(f"{fit[i]:.3f}  {paths[i].name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+# core/resilience.py
+"""
+Timeouts, retries, hedging and circuit breaking for upstream LLM requests.
+
+    deadline = Deadline(120)                         # budget for the whole run
+    resp = resilient_call(lambda timeout: client.chat.completions.create(..., timeout=timeout),
+                          deadline=deadline, breaker=get_breaker(model),
+                          hedge_after=get_latency_tracker(model).hedge_delay())
+
+- Each attempt gets timeout = min(policy.attempt_timeout, deadline.remaining()).
+- Retryable errors (429, 408/409, 5xx, timeouts, connection errors) are
+  retried with full-jitter exponential backoff, honouring Retry-After, as
+  long as the wait fits in the deadline.
+- Hedging: if an attempt is still running after `hedge_after` seconds (the
+  recent p95 latency), one duplicate request is sent and whichever finishes
+  first wins. Costs tokens, so callers opt in. The first request is sent
+  right away on its own thread; backups share HEDGE_BUDGET slots and are
+  skipped (not queued) while those are busy, so a stalled upstream ties up
+  at most that many extra requests, each bounded by the attempt's timeout.
+- The breaker opens after `failure_threshold` consecutive retryable failures
+  and fails fast (CircuitOpen) until `reset_after` seconds pass; then one
+  trial request decides whether it closes again.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+HEDGE_BUDGET = 4  # backup requests in flight at once, process-wide
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+_RETRYABLE_NAMES = frozenset({
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+    "TimeoutException", "ConnectError", "ReadTimeout", "RemoteProtocolError",
+})
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run's time budget ran out before the upstream answered."""
+
+
+class CircuitOpen(RuntimeError):
+    """Upstream has been failing; requests are refused until the cool-down ends."""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def check(self) -> None:
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"run deadline of {self.seconds:.0f}s exceeded")
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0,
+                 attempt_timeout: float = 90.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full jitter: uniform(0, min(max_delay, base * 2**attempt)), never below Retry-After."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(backoff, retry_after or 0.0)
+
+
+DEFAULT_RETRY = RetryPolicy()
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (DeadlineExceeded, CircuitOpen)):
+        return False
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(exc, (TimeoutError, ConnectionError)) or type(exc).__name__ in _RETRYABLE_NAMES
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return min(float(value), 60.0) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to our own backoff
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True  # exactly one request probes the upstream
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures, self.opened_at, self._trial = 0, None, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self) -> None:
+        """Give back an allow() that ended without an upstream answer either way."""
+        with self._lock:
+            self._trial = False
+
+
+class LatencyTracker:
+    """Recent successful-request latencies; the p95 sets when to hedge."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20, floor: float = 1.0):
+        self.samples: deque = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.floor = floor
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """None until enough samples exist (no hedging on a cold start)."""
+        p = self.p95()
+        return None if p is None else max(self.floor, p)
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_TRACKERS: Dict[str, LatencyTracker] = {}
+_REGISTRY_LOCK = threading.Lock()
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=HEDGE_BUDGET, thread_name_prefix="llm-hedge")
+_HEDGE_SLOTS = threading.BoundedSemaphore(HEDGE_BUDGET)
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _REGISTRY_LOCK:
+        return _BREAKERS.setdefault(name, CircuitBreaker())
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    with _REGISTRY_LOCK:
+        return _TRACKERS.setdefault(name, LatencyTracker())
+
+
+def _start_primary(fn: Callable[[float], Any], timeout: float) -> Future:
+    """fn(timeout) on its own thread, so it is sent now instead of waiting for a pool worker."""
+    f: Future = Future()
+
+    def run() -> None:
+        f.set_running_or_notify_cancel()
+        try:
+            f.set_result(fn(timeout))
+        except BaseException as e:
+            f.set_exception(e)
+
+    threading.Thread(target=run, name="llm-primary", daemon=True).start()
+    return f
+
+
+def _start_backup(fn: Callable[[float], Any], timeout: float) -> Optional[Future]:
+    """fn(timeout) on the hedge pool, or None when all HEDGE_BUDGET slots are busy (never queued)."""
+    if not _HEDGE_SLOTS.acquire(blocking=False):
+        return None
+
+    def run() -> Any:
+        try:
+            return fn(timeout)
+        finally:
+            _HEDGE_SLOTS.release()
+
+    try:
+        return _HEDGE_POOL.submit(run)
+    except BaseException:
+        _HEDGE_SLOTS.release()
+        raise
+
+
+def _hedged(fn: Callable[[float], Any], timeout: float, hedge_after: float, metrics=None) -> Any:
+    end = time.monotonic() + timeout
+    primary = _start_primary(fn, timeout)
+    done, _ = wait([primary], timeout=min(hedge_after, timeout))
+    if done:
+        return primary.result()
+    backup = _start_backup(fn, max(0.1, end - time.monotonic()))
+    if backup is None:
+        if metrics is not None:
+            metrics.incr("llm_hedge_skipped")
+        done, _ = wait([primary], timeout=max(0.0, end - time.monotonic()))
+        if done:
+            return primary.result()
+        raise TimeoutError(f"no response within {timeout:.1f}s")
+    if metrics is not None:
+        metrics.incr("llm_hedged")
+    pending = {primary, backup}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for f in done:
+            if f.exception() is None:
+                if f is backup and metrics is not None:
+                    metrics.incr("llm_hedge_won")
+                # a loser still in flight is bounded by its own timeout (<= the attempt's end)
+                return f.result()
+            first_error = first_error or f.exception()
+    raise first_error or TimeoutError(f"no response within {timeout:.1f}s")
+
+
+def resilient_call(fn: Callable[[float], Any], deadline: Optional[Deadline] = None,
+                   policy: RetryPolicy = DEFAULT_RETRY, breaker: Optional[CircuitBreaker] = None,
+                   hedge_after: Optional[float] = None, metrics=None,
+                   sleep: Callable[[float], None] = time.sleep) -> Any:
+    """Call fn(timeout) under the deadline / retry / hedge / breaker rules above."""
+    attempt = 0
+    while True:
+        timeout = policy.attempt_timeout
+        if deadline is not None:
+            deadline.check()  # before allow(): a half-open breaker must not lose its trial to this
+            timeout = min(timeout, deadline.remaining())
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpen("upstream is failing; retry after the cool-down")
+        try:
+            if hedge_after is not None and hedge_after < timeout:
+                result = _hedged(fn, timeout, hedge_after, metrics)
+            else:
+                result = fn(timeout)
+        except Exception as e:
+            retryable = is_retryable(e)
+            if breaker is not None:
+                if isinstance(e, (DeadlineExceeded, CircuitOpen)):
+                    breaker.release()  # raised on our side, the upstream was not asked
+                elif retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()  # a 4xx still proves the upstream is answering
+            attempt += 1
+            if not retryable or attempt >= policy.max_attempts:
+                raise
+            delay = policy.delay(attempt, retry_after(e))
+            if deadline is not None and delay >= deadline.remaining():
+                raise DeadlineExceeded(f"no time left to retry after {type(e).__name__}") from e
+            if metrics is not None:
+                metrics.incr("llm_retries")
+            sleep(delay)
+            continue
+        except BaseException:
+            if breaker is not None:
+                breaker.release()  # interrupted mid-call: says nothing about the upstream
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
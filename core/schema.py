@@ -0,0 +1,149 @@
+# core/schema.py
+"""
+Fast check of a model response against the shape the prompts ask for,
+run before json_convert so malformed output never reaches the preset.
+
+    schema = get_schema(sections, BUCKETS, include_skills=True)
+    issues = schema.validate(data)      # [] when the response is as asked
+    # [{"section": "experience_bullets", "header": "<Job: ...>", "message": ...,
+    #   "fatal": bool, "retry": bool}]
+
+- The expected sections, bucket names and limits are compiled once per
+  (sections, buckets) combination; validation is a single pass of dict
+  lookups and word counts (a fraction of a millisecond for a full resume).
+- "fatal" issues make the output unusable (not an object, none of the
+  requested jobs/projects present, non-string bullets or skills). A
+  missing skill bucket or job/project is worth a retry with a stronger
+  model ("retry") but acceptable when no stronger model is left:
+  json_convert fills gaps with empty lists, so output salvaged from a
+  truncated response is kept. Unknown skill buckets and a bullet count or
+  length outside the prompt's targets are only reported; models miss those by one or two
+  often enough that retrying on them would make the cheap tier pointless.
+- `issue["section"]`/`["header"]` say which part to re-request: "skills"
+  for the keywords/missing_skills buckets, or the job/project header.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.experience import normalize_header
+
+SKILL_KEYS = ("keywords", "missing_skills")
+TARGETS = {"job": "experience_bullets", "project": "project_bullets"}
+# the prompts ask for 6–9 / 4–6 bullets of 18–28 words; these are the accepted ranges
+BULLET_COUNTS = {"job": (5, 10), "project": (3, 7)}
+BULLET_WORDS = (10, 40)
+
+
+def _issue(section: str, message: str, header: Optional[str] = None, fatal: bool = True,
+           retry: bool = True) -> Dict[str, Any]:
+    return {"section": section, "header": header, "message": message, "fatal": fatal, "retry": fatal or retry}
+
+
+class OutputSchema:
+    """Compiled expectations for one prompt: skill buckets and the job/project sections."""
+
+    __slots__ = ("buckets", "include_skills", "sections", "_exact", "_by_norm", "counts", "words")
+
+    def __init__(self, sections: Sequence[Tuple[str, str]], buckets: Sequence[str], include_skills: bool = True,
+                 counts: Dict[str, Tuple[int, int]] = BULLET_COUNTS, words: Tuple[int, int] = BULLET_WORDS):
+        self.buckets = tuple(buckets)
+        self.include_skills = include_skills
+        self.sections = tuple(sections)  # (kind, header)
+        self._exact = {h: (kind, h) for kind, h in self.sections}
+        self._by_norm = {normalize_header(h): (kind, h) for kind, h in self.sections}
+        self.counts = counts
+        self.words = words
+
+    def _validate_bullets(self, kind: str, header: str, bullets: Any, issues: List[Dict[str, Any]]) -> None:
+        target = TARGETS[kind]
+        if not isinstance(bullets, list) or not bullets:
+            issues.append(_issue(target, "no bullets", header))
+            return
+        if not all(isinstance(b, str) and b.strip() for b in bullets):
+            issues.append(_issue(target, "bullets must be non-empty strings", header))
+            return
+        lo, hi = self.counts[kind]
+        if not lo <= len(bullets) <= hi:
+            issues.append(_issue(target, f"{len(bullets)} bullets, expected {lo}–{hi}", header,
+                                 fatal=False, retry=False))
+        wlo, whi = self.words
+        off = [n for n in map(len, map(str.split, bullets)) if not wlo <= n <= whi]
+        if off:
+            issues.append(_issue(target, f"{len(off)} bullet(s) outside {wlo}–{whi} words "
+                                         f"({min(off)}–{max(off)})", header, fatal=False, retry=False))
+
+    def validate(self, data: Any) -> List[Dict[str, Any]]:
+        if not isinstance(data, dict):
+            return [_issue("output", "not a JSON object")]
+        issues: List[Dict[str, Any]] = []
+        if self.include_skills:
+            for key in SKILL_KEYS:
+                groups = data.get(key)
+                if groups is None:
+                    issues.append(_issue("skills", f"{key} missing", fatal=False))
+                    continue
+                if not isinstance(groups, dict):
+                    issues.append(_issue("skills", f"{key} is not an object"))
+                    continue
+                missing = [b for b in self.buckets if groups.get(b) is None]
+                wrong = [b for b in self.buckets if groups.get(b) is not None and not isinstance(groups[b], list)]
+                extra = [b for b in groups if b not in self.buckets]
+                if missing:
+                    issues.append(_issue("skills", f"{key} lacks bucket(s) {', '.join(missing)}", fatal=False))
+                if wrong:
+                    issues.append(_issue("skills", f"{key} bucket(s) {', '.join(wrong)} not a list"))
+                if extra:
+                    issues.append(_issue("skills", f"{key} has unknown bucket(s) {', '.join(map(str, extra))}",
+                                         fatal=False, retry=False))
+                if any(not isinstance(s, str) for b in self.buckets for s in (groups.get(b) or ())
+                       if isinstance(groups.get(b), list)):
+                    issues.append(_issue("skills", f"{key} entries must be strings"))
+
+        seen = set()
+        for kind, target in TARGETS.items():
+            entries = data.get(target)
+            if entries is None:
+                entries = {}
+            if not isinstance(entries, dict):
+                issues.append(_issue(target, "not an object"))
+                continue
+            for header, bullets in entries.items():
+                hit = self._exact.get(header) or self._by_norm.get(normalize_header(str(header)))
+                if hit is None or hit[0] != kind:
+                    continue  # not requested (json_convert ignores or classifies it)
+                seen.add(hit[1])
+                self._validate_bullets(kind, hit[1], bullets, issues)
+        for kind, header in self.sections:
+            if header not in seen:
+                issues.append(_issue(TARGETS[kind], "section missing", header, fatal=False))
+        if self.sections and not seen:
+            issues.append(_issue("output", "none of the requested jobs/projects"))
+        return issues
+
+
+@lru_cache(maxsize=64)
+def _compiled(sections: Tuple[Tuple[str, str], ...], buckets: Tuple[str, ...], include_skills: bool) -> OutputSchema:
+    return OutputSchema(sections, buckets, include_skills)
+
+
+def get_schema(sections: Iterable[Any], buckets: Sequence[str], include_skills: bool = True) -> OutputSchema:
+    """Compiled schema for `sections` (core.experience.Section or (kind, header, ...) tuples), memoized."""
+    key = tuple((s.kind, s.header) if hasattr(s, "kind") else (s[0], s[1]) for s in sections)
+    return _compiled(key, tuple(buckets), include_skills)
+
+
+def fatal(issues: List[Dict[str, Any]]) -> bool:
+    return any(i["fatal"] for i in issues)
+
+
+def needs_retry(issues: List[Dict[str, Any]]) -> bool:
+    return any(i["retry"] for i in issues)
+
+
+def failing_parts(issues: List[Dict[str, Any]]) -> Tuple[bool, List[str]]:
+    """(skills need redoing, headers of job/project sections that need redoing); report-only issues are skipped."""
+    issues = [i for i in issues if i["retry"]]
+    skills = any(i["section"] == "skills" for i in issues)
+    headers = list(dict.fromkeys(i["header"] for i in issues if i["header"]))
+    return skills, headers
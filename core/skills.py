@@ -0,0 +1,310 @@
+# core/skills.py
+
+import hashlib
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
+
+# Known skills the JD may mention, per bucket (canonical spelling).
+# Anything found here but not in the candidate's inventory is "missing".
+SKILL_VOCABULARY: Dict[str, List[str]] = {
+    "Programming": [
+        "Python", "SQL", "Scala", "Java", "Go", "Rust", "C++", "C#", "JavaScript",
+        "TypeScript", "Bash", "Shell Scripting", "PySpark", "Pandas", "NumPy",
+    ],
+    "Data Engineering": [
+        "Apache Spark", "Apache Kafka", "Apache Airflow", "Apache Flink", "Apache Beam",
+        "Hadoop", "Hive", "dbt", "ETL", "ELT", "Data Pipelines", "Data Modeling",
+        "Data Warehousing", "Data Lake", "Lakehouse", "Delta Lake", "Apache Iceberg",
+        "Streaming", "Batch Processing", "Kinesis", "Dagster", "Prefect", "Fivetran",
+        "Informatica", "Talend", "NiFi", "Change Data Capture",
+    ],
+    "Cloud": [
+        "AWS", "Google Cloud", "Azure", "S3", "AWS Glue", "AWS Lambda", "EMR", "Redshift",
+        "Athena", "EC2", "BigQuery", "Dataflow", "Dataproc", "Pub/Sub", "Azure Data Factory",
+        "Synapse", "Databricks", "Docker", "Kubernetes", "Terraform", "CloudFormation",
+    ],
+    "Database": [
+        "PostgreSQL", "MySQL", "SQL Server", "Oracle", "MongoDB", "Cassandra", "DynamoDB",
+        "Redis", "Elasticsearch", "Snowflake", "Teradata", "SQLite", "Neo4j", "NoSQL",
+    ],
+    "ML/AI": [
+        "Machine Learning", "Deep Learning", "scikit-learn", "TensorFlow", "PyTorch", "MLflow",
+        "LLM", "NLP", "Feature Engineering", "Generative AI", "SageMaker", "Vertex AI",
+    ],
+    "Misc": [
+        "Git", "CI/CD", "Jenkins", "GitHub Actions", "Agile", "Scrum", "Jira", "Tableau",
+        "Power BI", "Looker", "Linux", "REST APIs", "Data Governance", "Data Quality",
+        "Great Expectations", "Unit Testing",
+    ],
+}
+
+# alias -> canonical. Matching is case-insensitive.
+SKILL_ALIASES: Dict[str, str] = {
+    "gcp": "Google Cloud",
+    "google cloud platform": "Google Cloud",
+    "amazon web services": "AWS",
+    "microsoft azure": "Azure",
+    "postgres": "PostgreSQL",
+    "postgresql": "PostgreSQL",
+    "psql": "PostgreSQL",
+    "mssql": "SQL Server",
+    "ms sql": "SQL Server",
+    "microsoft sql server": "SQL Server",
+    "mongo": "MongoDB",
+    "spark": "Apache Spark",
+    "kafka": "Apache Kafka",
+    "airflow": "Apache Airflow",
+    "flink": "Apache Flink",
+    "beam": "Apache Beam",
+    "iceberg": "Apache Iceberg",
+    "golang": "Go",
+    "js": "JavaScript",
+    "k8s": "Kubernetes",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "ml": "Machine Learning",
+    "genai": "Generative AI",
+    "gen ai": "Generative AI",
+    "large language models": "LLM",
+    "llms": "LLM",
+    "natural language processing": "NLP",
+    "amazon s3": "S3",
+    "glue": "AWS Glue",
+    "lambda": "AWS Lambda",
+    "amazon redshift": "Redshift",
+    "amazon emr": "EMR",
+    "adf": "Azure Data Factory",
+    "azure synapse": "Synapse",
+    "google bigquery": "BigQuery",
+    "pubsub": "Pub/Sub",
+    "cdc": "Change Data Capture",
+    "ci cd": "CI/CD",
+    "powerbi": "Power BI",
+    "rest api": "REST APIs",
+    "restful apis": "REST APIs",
+    "elastic search": "Elasticsearch",
+    "shell": "Shell Scripting",
+    "data pipeline": "Data Pipelines",
+    "data warehouse": "Data Warehousing",
+    "data modelling": "Data Modeling",
+}
+
+# Surface forms that are also ordinary English ("go the extra mile", "glue
+# code", "shell out", "spark ideas"): counted only with the canonical casing
+# mid-sentence ("written in Go"), next to a tech qualifier ("AWS Lambda",
+# "Go/Golang", "Apache Spark") or as a whole list item ("python, go, rust").
+AMBIGUOUS_FORMS: Dict[str, str] = {
+    "go": "Go", "glue": "Glue", "shell": "Shell", "lambda": "Lambda",
+    "spark": "Spark", "beam": "Beam", "ml": "ML", "js": "JS",
+}
+_TECH_QUALIFIERS = frozenset({"aws", "amazon", "apache", "google", "azure", "gcp"})
+_LIST_SEPARATORS = ",;/()|:&"
+_SENTENCE_BREAKS = ".!?:;-*\u2022\"'("
+
+
+def _norm(s: str) -> str:
+    return " ".join((s or "").lower().split())
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def _prev_index(t: str, i: int) -> int:
+    """Index of the first non-space character before index i (-1 at the start)."""
+    i -= 1
+    while i >= 0 and t[i] == " ":
+        i -= 1
+    return i
+
+
+def _next_char(t: str, i: int) -> str:
+    n = len(t)
+    while i < n and t[i] == " ":
+        i += 1
+    return t[i] if i < n else ""
+
+
+def _in_tech_context(cased_text: Optional[str], t: str, start: int, end: int, cased: str) -> bool:
+    """Whether an ambiguous form at t[start:end] is used as a skill name (see AMBIGUOUS_FORMS)."""
+    p = _prev_index(t, start)
+    before = t[p] if p >= 0 else ""
+    if cased_text is not None and cased_text[start:end] == cased:
+        if cased.isupper():
+            return True
+        if before and before not in _SENTENCE_BREAKS and t[end:end + 1] != "-":
+            return True  # "Go" mid-sentence, not "Go the extra mile" / "Go-getter"
+    if t[start - 1:start] == "/" or t[end:end + 1] == "/":
+        return True
+    words = t[max(0, start - 12):start].split()
+    if words and words[-1] in _TECH_QUALIFIERS:
+        return True
+    # a whole list item: "python, go, rust", "(go)", "- go"
+    after = _next_char(t, end)
+    closes = after in _LIST_SEPARATORS or after == "."
+    if not before:
+        return closes  # also the whole text being just the skill
+    if before in _LIST_SEPARATORS or (before == "-" and (p == 0 or t[p - 1] == " ")):
+        return not after or closes or t.startswith(("and ", "or "), end + 1)
+    return False
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: all patterns are found in one linear pass over the text."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pid, p in enumerate(patterns):
+            state = 0
+            for ch in p:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state].append(pid)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in self._goto[s].items():
+                queue.append(t)
+                f = self._fail[s]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[t] = self._goto[f].get(ch, 0) if self._goto[f].get(ch, 0) != t else 0
+                self._out[t] = self._out[t] + self._out[self._fail[t]]
+
+    def iter_matches(self, text: str):
+        """Yield (end_index_exclusive, pattern_id) for every occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for pid in out[state]:
+                    yield i + 1, pid
+
+
+class SkillMatcher:
+    """
+    Local replacement for the model's `keywords` / `missing_skills` task.
+
+    Built once from the candidate's bucketed skill inventory plus
+    SKILL_VOCABULARY and SKILL_ALIASES; match() scans a JD in a single pass
+    and returns both dicts bucketed like the LLM output.
+    """
+
+    def __init__(self, inventory: Dict[str, List[str]],
+                 buckets: Optional[List[str]] = None,
+                 vocabulary: Optional[Dict[str, List[str]]] = None,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.buckets = list(buckets or DEFAULT_BUCKETS)
+        vocabulary = SKILL_VOCABULARY if vocabulary is None else vocabulary
+        aliases = {_norm(k): v for k, v in (SKILL_ALIASES if aliases is None else aliases).items()}
+
+        # canonical -> bucket; inventory placement wins over the vocabulary's
+        self._bucket_of: Dict[str, str] = {}
+        for bucket, skills in vocabulary.items():
+            for s in skills:
+                self._bucket_of.setdefault(s, bucket)
+        self._owned = set()
+        for bucket, skills in (inventory or {}).items():
+            for s in skills:
+                canon = aliases.get(_norm(s), s)
+                self._bucket_of[canon] = bucket if bucket in self.buckets else self._bucket_of.get(canon, "Misc")
+                self._owned.add(_norm(canon))
+
+        # surface form -> canonical
+        forms: Dict[str, str] = {}
+        for canon in self._bucket_of:
+            forms.setdefault(_norm(canon), canon)
+        for alias, canon in aliases.items():
+            if canon in self._bucket_of:
+                forms.setdefault(alias, canon)
+        forms.pop("", None)
+
+        self._forms = list(forms.keys())
+        self._canon = [forms[f] for f in self._forms]
+        self._ambiguous = [AMBIGUOUS_FORMS.get(f) for f in self._forms]
+        self._ac = AhoCorasick(self._forms)
+
+    def scan(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Return [(canonical skill, count)] ordered by first occurrence.
+        Overlapping matches are resolved leftmost-longest, so "Apache Spark"
+        counts once, not again as "Spark".
+        """
+        cased_text: Optional[str] = " ".join((text or "").split())
+        t = cased_text.lower()
+        if len(t) != len(cased_text):
+            cased_text = None  # lowercasing changed offsets; casing can't be checked
+        n = len(t)
+        hits: List[Tuple[int, int, int]] = []
+        for end, pid in self._ac.iter_matches(t):
+            start = end - len(self._forms[pid])
+            # whole-word matches only ("Go" must not match inside "Google")
+            if start > 0 and _is_word_char(t[start - 1]) and _is_word_char(t[start]):
+                continue
+            if end < n and _is_word_char(t[end]) and _is_word_char(t[end - 1]):
+                continue
+            cased = self._ambiguous[pid]
+            if cased is not None and not _in_tech_context(cased_text, t, start, end, cased):
+                continue
+            hits.append((start, -end, pid))
+        hits.sort()
+        counts: Dict[str, int] = {}
+        covered = 0
+        for start, neg_end, pid in hits:
+            if start < covered:
+                continue  # inside (or overlapping) a match already taken
+            covered = -neg_end
+            canon = self._canon[pid]
+            counts[canon] = counts.get(canon, 0) + 1
+        return list(counts.items())
+
+    def match(self, jd_text: str) -> Dict[str, Dict[str, List[str]]]:
+        found = self.scan(jd_text)
+        # most-mentioned first; ties keep JD order
+        found = [s for s, _ in sorted(found, key=lambda x: -x[1])]
+        keywords = {b: [] for b in self.buckets}
+        missing = {b: [] for b in self.buckets}
+        for skill in found:
+            bucket = self._bucket_of.get(skill, "Misc")
+            if bucket not in keywords:
+                bucket = self.buckets[-1]
+            keywords[bucket].append(skill)
+            if _norm(skill) not in self._owned:
+                missing[bucket].append(skill)
+        return {"keywords": keywords, "missing_skills": missing}
+
+
+_MATCHERS: Dict[str, SkillMatcher] = {}
+_MATCHERS_LOCK = threading.Lock()
+
+
+def get_skill_matcher(inventory: Dict[str, List[str]], buckets: Optional[List[str]] = None) -> SkillMatcher:
+    """SkillMatcher for this inventory, built once per process."""
+    key = hashlib.sha256(json.dumps([inventory, buckets], sort_keys=True).encode("utf-8")).hexdigest()
+    with _MATCHERS_LOCK:
+        m = _MATCHERS.get(key)
+        if m is None:
+            m = _MATCHERS[key] = SkillMatcher(inventory, buckets=buckets)
+        return m
+
+
+def match_skills(jd_text: str, inventory: Dict[str, List[str]],
+                 buckets: Optional[List[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+    return get_skill_matcher(inventory, buckets).match(jd_text)
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _isolated_state(tmp_path_factory):
+    """Keep the process-wide cache, history, blob and metrics stores out of the working tree."""
+    root = tmp_path_factory.mktemp("state")
+    env = {
+        "RESUME_TAILOR_CACHE_PATH": str(root / "llm_cache.sqlite"),
+        "RESUME_TAILOR_HISTORY_PATH": str(root / "history.sqlite"),
+        "RESUME_TAILOR_BLOB_DIR": str(root / "blobs"),
+        "RESUME_TAILOR_METRICS_DIR": str(root / "metrics"),
+    }
+    old = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    yield
+    for k, v in old.items():
+        if v is None:
+            os.environ.pop(k, None)
+        else:
+            os.environ[k] = v
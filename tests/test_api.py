@@ -0,0 +1,91 @@
+import json
+import threading
+
+import pytest
+from starlette.testclient import TestClient
+
+from benchmarks.generators import make_experience, make_jd, make_template
+from core.api import create_app
+from core.fakes import FakeOpenAIClient
+
+EXPERIENCE = make_experience(n_jobs=3, n_projects=2, bullets=4)
+JD = make_jd(pages=1)
+
+
+def make_client(**kw):
+    opts = {"client": FakeOpenAIClient(), "experience": EXPERIENCE, "models": ["cheap", "strong"], **kw}
+    return TestClient(create_app(**opts))
+
+
+@pytest.fixture(scope="module")
+def api():
+    with make_client() as tc:
+        yield tc
+
+
+@pytest.fixture(scope="module")
+def template(api):
+    r = api.post("/templates", content=make_template(static_paragraphs=5))
+    assert r.status_code == 200
+    return r.json()["template"]
+
+
+def test_health(api):
+    body = api.get("/health").json()
+    assert body["status"] == "ok"
+    assert set(body["breaker"]) == {"cheap", "strong"}
+
+
+def test_tailor(api):
+    r = api.post("/tailor", json={"jd_text": JD, "use_cache": False})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["model"] == "cheap" and body["validation"] == [] and body["section_errors"] == {}
+    assert body["preset"]["EXTRA_PROGRAMMING"] is not None
+    assert body["jd_compression"]["tokens_after"] <= body["jd_compression"]["tokens_before"]
+
+
+def test_tailor_stream(api):
+    with api.stream("POST", "/tailor", json={"jd_text": JD, "stream": True, "fan_out": True,
+                                             "use_cache": False}) as r:
+        assert r.status_code == 200
+        events = [json.loads(line) for line in r.iter_lines() if line]
+    assert events[-1]["event"] == "result"
+    assert any(e["event"] == "section" and e["section"] == "experience_bullets" for e in events)
+
+
+def test_tailor_requires_jd(api):
+    assert api.post("/tailor", json={}).status_code == 400
+    assert api.post("/tailor", content=b"[1]").status_code == 400
+
+
+def test_render(api, template):
+    preset = api.post("/tailor", json={"jd_text": JD, "template": template, "use_cache": False}).json()["preset"]
+    r = api.post("/render", json={"template": template, "preset": preset, "auto_wrap": True})
+    assert r.status_code == 200
+    assert r.content[:2] == b"PK"
+    assert "attachment" in r.headers["content-disposition"]
+
+
+def test_unknown_template(api):
+    assert api.post("/render", json={"template": "nope", "preset": {}}).status_code == 404
+    assert api.post("/tailor", json={"jd_text": JD, "template": "nope"}).status_code == 404
+
+
+def test_saturation_returns_429():
+    with make_client(client=FakeOpenAIClient(latency=0.5), llm_concurrency=1, llm_queue=1) as tc:
+        codes, lock = [], threading.Lock()
+
+        def hit():
+            r = tc.post("/tailor", json={"jd_text": JD, "use_cache": False})
+            with lock:
+                codes.append((r.status_code, r.headers.get("retry-after")))
+
+        threads = [threading.Thread(target=hit) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(c for c, _ in codes) == [200, 200, 429, 429, 429]
+        assert all(ra == "1" for c, ra in codes if c == 429)
+        assert tc.get("/health").json()["llm"]["active"] == 0
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.generators import make_experience, make_jd, make_template
+from core import batch
+from core.fakes import FakeOpenAIClient
+
+EXPERIENCE = make_experience(n_jobs=3, n_projects=2, bullets=4)
+
+
+def on_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@pytest.fixture
+def jd_dir(tmp_path):
+    d = tmp_path / "jds"
+    d.mkdir()
+    for i in range(3):
+        (d / f"jd{i}.txt").write_text(make_jd(pages=1, seed=i), encoding="utf-8")
+    return d
+
+
+def run(jd_dir, out_dir, **kw):
+    opts = dict(client=FakeOpenAIClient(), experience=EXPERIENCE, rpm=0, tpm=0, render_workers=1,
+                models=["cheap", "strong"], use_cache=False, **kw)
+    return asyncio.run(batch.tailor_directory(jd_dir, out_dir, **opts))
+
+
+@pytest.mark.parametrize("mode", [{}, {"fanout": True}, {"candidates": 3}])
+def test_tailors_every_jd(jd_dir, tmp_path, mode):
+    results = run(jd_dir, tmp_path / "out", template_bytes=make_template(static_paragraphs=5), **mode)
+    assert [r["ok"] for r in results] == [True] * 3, results
+    for r in results:
+        saved = json.loads(open(r["json"], encoding="utf-8").read())
+        assert saved["tailored"]["experience_bullets"] and saved["preset"]
+        assert open(r["docx"], "rb").read(2) == b"PK"
+
+
+def test_cpu_steps_stay_off_the_event_loop(jd_dir, tmp_path, monkeypatch):
+    seen = []
+    for name in ("match_skills", "compress_jd", "generate", "json_convert", "rank_preset_bullets"):
+        fn = getattr(batch, name)
+
+        def spy(*a, _fn=fn, _name=name, **k):
+            seen.append((_name, on_loop()))
+            return _fn(*a, **k)
+
+        monkeypatch.setattr(batch, name, spy)
+    results = run(jd_dir, tmp_path / "out")
+    assert all(r["ok"] for r in results)
+    assert {name for name, _ in seen} == {"match_skills", "compress_jd", "generate", "json_convert",
+                                          "rank_preset_bullets"}
+    assert not any(loop for _, loop in seen)
+
+
+def test_failed_jd_is_reported_not_raised(jd_dir, tmp_path):
+    client = FakeOpenAIClient(responder=lambda m: "not json")
+    results = asyncio.run(batch.tailor_directory(jd_dir, tmp_path / "out", client=client, experience=EXPERIENCE,
+                                                 rpm=0, tpm=0, models=["only"], use_cache=False))
+    assert not any(r["ok"] for r in results)
+    assert all("could not parse JSON" in r["error"] for r in results)
+    assert (tmp_path / "out" / "jd0.raw.txt").read_text(encoding="utf-8") == "not json"
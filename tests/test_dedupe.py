@@ -0,0 +1,46 @@
+import pytest
+
+from core.dedupe import drop_near_duplicates, near_duplicate_clusters, near_duplicate_pairs
+
+# A~B and B~C, but A and C share too little to be near-duplicates of each other
+A = "Built streaming pipelines in Kafka and Spark for the fraud detection team"
+B = "Built streaming pipelines in Kafka and Spark for the fraud detection team cutting alert latency by forty percent"
+C = "Spark for the fraud detection team cutting alert latency by forty percent"
+OTHER = "Led hiring for the platform group and mentored four junior engineers"
+
+
+def test_pairs_are_not_transitive():
+    linked = {(i, j) for i, j, _ in near_duplicate_pairs([A, B, C])}
+    assert linked == {(0, 1), (1, 2)}
+
+
+def test_clusters_are_built_around_a_representative():
+    assert near_duplicate_clusters([A, B, C, OTHER]) == [[0, 1]]
+
+
+def test_exact_copies_collapse():
+    kept, removed = drop_near_duplicates({"X": [A, OTHER], "Y": [A]})
+    assert kept == {"X": [A, OTHER], "Y": []}
+    assert removed == [{"section": "Y", "text": A, "kept": A}]
+
+
+def test_chain_keeps_both_ends():
+    kept, removed = drop_near_duplicates({"X": [A], "Y": [B], "Z": [C]})
+    assert kept == {"X": [A], "Y": [], "Z": [C]}
+    assert [(r["text"], r["kept"]) for r in removed] == [(B, A)]
+
+
+def test_longest_drops_only_what_resembles_the_kept_bullet():
+    kept, removed = drop_near_duplicates({"X": [A], "Y": [B], "Z": [C]}, keep="longest")
+    assert kept == {"X": [], "Y": [B], "Z": []}
+    assert all(r["kept"] == B for r in removed)
+
+
+def test_balanced_takes_from_the_fuller_section():
+    kept, _ = drop_near_duplicates({"X": [A, OTHER, C], "Y": [A]}, keep="balanced")
+    assert kept == {"X": [OTHER, C], "Y": [A]}
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        drop_near_duplicates({"X": [A]}, keep="random")
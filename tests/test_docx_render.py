@@ -0,0 +1,65 @@
+import io
+import zipfile
+
+import pytest
+from lxml import etree
+
+from benchmarks.generators import make_template
+from core.docx_render import (
+    TemplateCache, get_compiled_template, render_docx_bytes, render_docx_bytes_uncached,
+    render_docx_incremental
+)
+from core.fakes import fake_tailored_output
+from core.modify import json_convert
+
+TEMPLATE = make_template(static_paragraphs=20)
+PRESET = json_convert(fake_tailored_output())
+
+
+def elements(docx: bytes, part: str = "word/document.xml"):
+    """(tag, attributes, text, tail) of every element: serialization details such as
+    repeated xmlns declarations or <a/> vs <a></a> don't count."""
+    root = etree.fromstring(zipfile.ZipFile(io.BytesIO(docx)).read(part))
+    return [(el.tag, dict(el.attrib), el.text, el.tail) for el in root.iter()]
+
+
+def edits():
+    yield {"TITLE_MAIN": "Senior Data Engineer"}
+    yield {"EXTRA_BULLETS_TEK": PRESET["EXTRA_BULLETS_TEK"][:2] + ["Shipped a brand new bullet & more"]}
+    yield {"EXTRA_CLOUD": ["GCP", "Azure"], "EXTRA_HOSPITAL": []}
+
+
+@pytest.mark.parametrize("edit", list(edits()))
+def test_incremental_render_matches_full_render(edit):
+    first = render_docx_incremental(TEMPLATE, PRESET)
+    data = {**PRESET, **edit}
+    patched = render_docx_incremental(TEMPLATE, data, previous=first)
+    assert 0 < patched.rerendered < first.rerendered
+    assert elements(patched.docx) == elements(render_docx_bytes(TEMPLATE, data))
+    assert elements(patched.docx) == elements(render_docx_bytes_uncached(TEMPLATE, data))
+
+
+def test_unchanged_preset_reuses_the_previous_render():
+    first = render_docx_incremental(TEMPLATE, PRESET)
+    assert render_docx_incremental(TEMPLATE, dict(PRESET), previous=first) is first
+    other_wrap = render_docx_incremental(TEMPLATE, PRESET, wrap_width=80, wrap_trigger=85, previous=first)
+    assert other_wrap is not first and other_wrap.wrap == (80, 85)
+
+
+def test_template_cache_compiles_once_per_content():
+    cache = TemplateCache()
+    ct = cache.get(TEMPLATE)
+    assert cache.get(bytes(TEMPLATE)) is ct
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "TITLE_MAIN" in ct.variables
+    assert get_compiled_template(TEMPLATE).key == ct.key
+
+
+def test_template_cache_evicts_least_recently_used():
+    a, b = make_template(static_paragraphs=1), make_template(static_paragraphs=2)
+    cache = TemplateCache(max_bytes=1)  # room for a single template
+    ct_a = cache.get(a)
+    cache.get(b)
+    assert cache.get(a) is not ct_a and cache.misses == 3
+    cache.clear()
+    assert cache.get(a) is not None and cache.misses == 4
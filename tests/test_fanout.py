@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from core.experience import parse_experience
+from core.fakes import FakeOpenAIClient, fake_response
+from core.fanout import generate_fanout
+from core.jobs import JobCancelled
+from core.metrics import RunMetrics
+from core.pipeline import generate
+from core.resilience import DeadlineExceeded
+
+BUCKETS = ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
+JOB_A = "Job: Data Engineer – Acme (2020 – 2022)"
+JOB_B = "Job: Analyst – Beta (2018 – 2020)"
+EXPERIENCE = "\n".join([
+    "[Programming]", "Python, SQL",
+    f"[{JOB_A}]", "- Built batch pipelines in Python",
+    f"[{JOB_B}]", "- Wrote SQL reports",
+])
+SECTIONS = [("job", JOB_A, "- Built batch pipelines in Python"), ("job", JOB_B, "- Wrote SQL reports")]
+
+
+def failing_on(marker, exc):
+    def responder(messages):
+        if marker in messages[-1]["content"]:
+            raise exc
+        return fake_response(messages)
+    return responder
+
+
+def fanout(responder, **kw):
+    run, report = RunMetrics(), {}
+    data, raws = generate_fanout(FakeOpenAIClient(responder=responder), "Python data engineer", EXPERIENCE,
+                                 {"Programming": ["Python"]}, BUCKETS, sections=SECTIONS, use_cache=False,
+                                 metrics=run, report=report, **kw)
+    return data, raws, run, report
+
+
+def test_all_sections_merged_in_order():
+    data, raws, run, report = fanout(fake_response)
+    assert list(data["experience_bullets"]) == [JOB_A, JOB_B]
+    assert set(raws) == {"skills", JOB_A, JOB_B}
+    assert report["section_errors"] == {} and "fanout_errors" not in run.flags
+
+
+def test_failed_section_is_reported():
+    data, raws, run, report = fanout(failing_on("Analyst", ValueError("bad gateway body")))
+    assert list(data["experience_bullets"]) == [JOB_A]
+    assert report["section_errors"] == {JOB_B: "ValueError: bad gateway body"}
+    assert run.flags["fanout_errors"] == 1
+    assert raws[JOB_B].startswith("ERROR: ")
+
+
+def test_deadline_stops_the_run():
+    with pytest.raises(DeadlineExceeded):
+        fanout(failing_on("Analyst", DeadlineExceeded("run deadline of 1s exceeded")))
+
+
+def test_cancellation_does_not_wait_for_sections_in_flight():
+    def responder(messages):
+        if "Analyst" in messages[-1]["content"]:
+            raise JobCancelled("cancelled")
+        time.sleep(1.0)  # the other sections are slow
+        return fake_response(messages)
+
+    t0 = time.perf_counter()
+    with pytest.raises(JobCancelled):
+        fanout(responder)
+    assert time.perf_counter() - t0 < 0.5
+
+
+def run_generate(client, models):
+    return generate(client, "Python data engineer", "", EXPERIENCE, {"Programming": ["Python"]}, BUCKETS,
+                    experience=parse_experience(EXPERIENCE), fan_out=True, use_cache=False, models=models)
+
+
+def test_generate_surfaces_unrecovered_section_errors():
+    result = run_generate(FakeOpenAIClient(responder=failing_on("Analyst", ValueError("boom"))), ["only"])
+    assert result["data"] is not None
+    assert result["section_errors"] == {JOB_B: "ValueError: boom"}
+    assert [i["header"] for i in result["validation"] if i["message"] == "section missing"] == [JOB_B]
+
+
+def test_section_recovered_by_escalation_is_not_reported():
+    calls = {"n": 0}
+
+    def flaky(messages):
+        if "Analyst" in messages[-1]["content"]:
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise ValueError("boom")
+        return fake_response(messages)
+
+    result = run_generate(FakeOpenAIClient(responder=flaky), ["cheap", "strong"])
+    assert result["section_errors"] == {} and result["validation"] == []
+    assert result["model"] == "strong"
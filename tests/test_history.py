@@ -0,0 +1,91 @@
+from benchmarks.generators import make_jd
+from core.history import REUSE_SIMILARITY, WARM_SIMILARITY, RunStore, context_key
+
+DATA = {"experience_bullets": {"Job: Data Engineer – Acme": ["Built pipelines"]}}
+PRESET = {"font": "Calibri"}
+
+
+def store(tmp_path, **kwargs):
+    return RunStore(path=str(tmp_path / "history.sqlite3"), **kwargs)
+
+
+def test_context_key_is_order_stable():
+    assert context_key("exp", {"a": 1, "b": 2}) == context_key("exp", {"b": 2, "a": 1})
+    assert context_key("exp", "gpt-4o-mini") != context_key("exp", "gpt-4o")
+
+
+def test_exact_jd_round_trip(tmp_path):
+    s = store(tmp_path)
+    jd = make_jd(pages=1, seed=1)
+    ctx = context_key("exp")
+    run_id = s.put(jd, "raw", DATA, PRESET, context=ctx)
+    match = s.lookup("  " + jd.upper() + "\n", context=ctx)  # whitespace/case don't matter
+    assert match["id"] == run_id and match["exact"] and match["similarity"] == 1.0
+    assert match["data"] == DATA and match["preset"] == PRESET and match["raw"] == "raw"
+    assert match["hits"] == 1
+
+
+def test_lightly_reworded_jd_is_reusable(tmp_path):
+    s = store(tmp_path)
+    jd = make_jd(pages=1, seed=2)
+    ctx = context_key("exp")
+    s.put(jd, "raw", DATA, None, context=ctx)
+    reposted = jd + "\nApply by Friday."
+    match = s.lookup(reposted, context=ctx)
+    assert match is not None and not match["exact"]
+    assert match["similarity"] >= REUSE_SIMILARITY
+    assert match["preset"] is None
+
+
+def test_other_context_or_jd_does_not_match(tmp_path):
+    s = store(tmp_path)
+    jd = make_jd(pages=1, seed=3)
+    s.put(jd, "raw", DATA, None, context=context_key("exp"))
+    assert s.lookup(jd, context=context_key("other exp")) is None
+    assert s.lookup(make_jd(pages=1, seed=4), context=context_key("exp"), threshold=WARM_SIMILARITY) is None
+
+
+def test_rows_from_another_store_are_picked_up(tmp_path):
+    writer, reader = store(tmp_path), store(tmp_path)
+    ctx = context_key("exp")
+    assert reader.lookup(make_jd(pages=1, seed=5), context=ctx) is None
+    writer.put(make_jd(pages=1, seed=5), "raw", DATA, None, context=ctx)
+    assert reader.lookup(make_jd(pages=1, seed=5), context=ctx)["exact"]
+
+
+def test_evict_and_clear(tmp_path):
+    s = store(tmp_path, max_entries=2)
+    ctx = context_key("exp")
+    for seed in range(4):
+        s.put(make_jd(pages=1, seed=10 + seed), "raw", DATA, None, context=ctx)
+    s.evict()
+    assert s.stats()["runs"] == 2
+    s.clear()
+    assert s.stats() == {"runs": 0, "hits": 0, "indexed": 0}
+    assert s.lookup(make_jd(pages=1, seed=13), context=ctx) is None
+
+
+def test_evicted_best_match_falls_back_to_the_next_one(tmp_path):
+    s, other = store(tmp_path), store(tmp_path)
+    jd = make_jd(pages=1, seed=20)
+    ctx = context_key("exp")
+    older = s.put(jd + "\nApply by Friday.", "older", DATA, None, context=ctx)
+    newest = s.put(jd, "newest", DATA, None, context=ctx)
+    assert s.lookup(jd, context=ctx)["id"] == newest
+    other._conn().execute("DELETE FROM runs WHERE id = ?", (newest,))  # evicted by another process
+    match = s.lookup(jd, context=ctx)
+    assert match["id"] == older and not match["exact"] and match["raw"] == "older"
+    assert s.stats()["indexed"] == 1
+
+
+def test_evict_drops_runs_from_the_index(tmp_path):
+    s = store(tmp_path, max_entries=1)
+    ctx = context_key("exp")
+    jd = make_jd(pages=1, seed=21)
+    s.put(jd, "raw", DATA, None, context=ctx)
+    s.put(make_jd(pages=1, seed=22), "raw", DATA, None, context=ctx)
+    assert s.lookup(make_jd(pages=1, seed=22), context=ctx)  # the first run is now least recently used
+    s.evict()
+    assert s.stats() == {"runs": 1, "hits": 1, "indexed": 1}
+    assert s.lookup(jd, context=ctx) is None
+    assert not any(0 in rows for band in s._buckets for rows in band.values())
@@ -0,0 +1,91 @@
+from core.jdclean import compress_jd, estimate_tokens, normalize_jd
+
+INVENTORY = {"Programming": ["Python", "SQL"], "Cloud": ["AWS"]}
+
+JD = """Senior Data Engineer
+About the role
+You will build the data platform behind our analytics products.
+Responsibilities
+Own the data privacy platform and its retention jobs
+Design batch and streaming pipelines on AWS
+Partner with analysts on data modeling
+- Run the on-call rotation for ingestion
+Requirements:
+5+ years of experience with Python and SQL
+Experience with Kafka or Kinesis is preferred
+Benefits & Perks
+Medical, dental and vision insurance for you and your family
+Generous PTO and paid parental leave
+401(k) with company match
+Equal Opportunity Employer
+Acme is an equal opportunity employer. We consider all applicants without regard to race, color, religion or national origin.
+Strong communication skills
+"""
+
+
+def kept_lines(text, **kw):
+    return compress_jd(text, INVENTORY, **kw).splitlines()
+
+
+def test_responsibility_lines_survive_topic_words():
+    kept = kept_lines(JD)
+    for line in ("Own the data privacy platform and its retention jobs",
+                 "Design batch and streaming pipelines on AWS",
+                 "Partner with analysts on data modeling",
+                 "- Run the on-call rotation for ingestion"):
+        assert line in kept
+
+
+def test_requirements_and_trailing_line_kept():
+    kept = kept_lines(JD)
+    assert "5+ years of experience with Python and SQL" in kept
+    assert "Experience with Kafka or Kinesis is preferred" in kept
+    assert kept[-1] == "Strong communication skills"
+
+
+def test_boilerplate_sections_dropped():
+    report = {}
+    out = compress_jd(JD, INVENTORY, report=report)
+    assert "Benefits" not in out and "dental" not in out and "401(k)" not in out
+    assert "without regard to race" not in out
+    stats = report["jd_compression"]
+    assert stats["tokens_after"] < stats["tokens_before"]
+    assert {d["reason"] for d in stats["dropped"]} == {"boilerplate"}
+
+
+def test_explicit_heading_only_needs_topic_mention():
+    jd = "What you will do\nShip features\nOUR CULTURE AND VALUES\nWe love offsites\nRequirements:\nSQL"
+    kept = kept_lines(jd)
+    assert "We love offsites" not in kept and "OUR CULTURE AND VALUES" not in kept
+    assert kept[-2:] == ["Requirements:", "SQL"]
+
+
+def test_about_company_section():
+    jd = ("About Acme Analytics\nWe are a leading provider of dashboards.\nFounded in 2009.\n"
+          "The Role\nBuild ETL jobs in Python.")
+    kept = kept_lines(jd)
+    assert kept == ["The Role", "Build ETL jobs in Python."]
+
+
+def test_requirement_line_in_dropped_section_is_kept():
+    jd = "Benefits:\nLearning budget\nAWS certification required\nResponsibilities:\nWrite SQL"
+    kept = kept_lines(jd)
+    assert "AWS certification required" in kept and "Learning budget" not in kept
+
+
+def test_duplicates_and_page_marks():
+    jd = "Requirements:\nPython experience required\nPage 1 of 2\nPython experience required\n2"
+    report = {}
+    out = compress_jd(jd, report=report)
+    assert out.splitlines() == ["Requirements:", "Python experience required"]
+    assert report["jd_compression"]["duplicates"] == 1
+
+
+def test_normalize_repairs_extraction_junk():
+    text = "Build​ data pipe-\nlines for the anaﬂytics team and\nits partners.\n•  Python"
+    assert normalize_jd(text) == ["Build data pipelines for the anaflytics team and its partners.", "- Python"]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 100
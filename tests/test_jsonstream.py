@@ -0,0 +1,80 @@
+import json
+
+from core.fakes import fake_tailored_output
+from core.jsonstream import IncrementalJSONParser
+
+
+def feed_all(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+def expected_events(data):
+    return [(section, name, value) for section, groups in data.items() for name, value in groups.items()]
+
+
+def test_events_match_for_any_chunking():
+    data = fake_tailored_output(n_jobs=2, n_projects=1, bullets_per_section=3)
+    text = json.dumps(data, indent=2)
+    for size in (1, 7, 64, len(text)):
+        parser, events = feed_all(text, size)
+        assert events == expected_events(data)
+        assert parser.done and parser.text == text
+
+
+def test_fenced_output():
+    data = {"keywords": {"Cloud": ["AWS"]}}
+    _, events = feed_all("```json\n" + json.dumps(data) + "\n```", 5)
+    assert events == [("keywords", "Cloud", ["AWS"])]
+
+
+def test_prose_prelude_with_braces():
+    data = {"keywords": {"Cloud": ["AWS", "GCP"]}, "experience_bullets": {"Job: A": ['x {y} "z"']}}
+    text = "Sure! I filled in the {placeholders} and kept {\"style\": 1} as asked.\n" + json.dumps(data)
+    _, events = feed_all(text, 3)
+    assert events == expected_events(data)
+
+
+def test_escapes_and_string_entries():
+    text = '{"keywords": {"Misc": "Git \\\\ \\"CI\\""}, "project_bullets": {"P: \\"Q\\"": ["a\\nb"]}}'
+    _, events = feed_all(text, 2)
+    assert events == [("keywords", "Misc", 'Git \\ "CI"'), ("project_bullets", 'P: "Q"', ["a\nb"])]
+
+
+def test_truncated_stream_emits_complete_entries_only():
+    data = fake_tailored_output(n_jobs=2, n_projects=0, bullets_per_section=3)
+    text = json.dumps(data)
+    cut = text[:text.rindex("]") - 5]
+    parser, events = feed_all(cut, 16)
+    assert not parser.done
+    assert events == expected_events(data)[:-1]
+
+
+class CountingParser(IncrementalJSONParser):
+    """Counts the characters copied into capture buffers."""
+
+    copied = 0
+
+    def _begin(self, i):
+        super()._begin(i)
+        parser = self
+
+        class Pieces(list):
+            def append(self, piece):
+                parser.copied += len(piece)
+                super().append(piece)
+
+        self._capture = Pieces()
+
+
+def test_each_character_is_copied_at_most_once():
+    text = json.dumps(fake_tailored_output(n_jobs=50, n_projects=0, bullets_per_section=8))
+    parser = CountingParser()
+    for i in range(0, len(text), 3):
+        parser.feed(text[i:i + 3])
+    assert parser.done
+    assert 0 < parser.copied <= len(text)
+    assert len(parser._chunks) == -(-len(text) // 3)  # feeding never re-joins what came before
@@ -0,0 +1,63 @@
+import math
+
+import pytest
+
+from benchmarks.generators import make_template
+from core.fakes import fake_tailored_output
+from core.layout import auto_wrap, estimate_pages, fit_to_pages, get_template_layout
+from core.modify import json_convert
+
+BULLET_KEYS = ("EXTRA_BULLETS_TEK", "EXTRA_BULLETS_ASSOCIATE", "EXTRA_BULLETS_INTERN",
+               "EXTRA_ECOMMERCE", "EXTRA_HOSPITAL")
+
+
+@pytest.fixture(scope="module")
+def layout():
+    return get_template_layout(make_template(static_paragraphs=5))
+
+
+def preset(bullets_per_section):
+    return json_convert(fake_tailored_output(bullets_per_section=bullets_per_section))
+
+
+def test_estimate_pages(layout):
+    empty, long = estimate_pages(layout, preset(0)), estimate_pages(layout, preset(9))
+    assert empty["pages"] == 1 and 0 < empty["fill"] <= 1  # headings and static text only
+    assert long["pages"] > 2
+    assert long["pages"] == math.ceil(long["height_pt"] / layout.content_height)
+    assert {k: len(v) for k, v in long["bullet_lines"].items()} == {k: 9 for k in BULLET_KEYS}
+    assert all(n >= 1 for lines in long["bullet_lines"].values() for n in lines)
+
+
+def test_narrower_wrap_means_more_lines(layout):
+    p = preset(6)
+    wide, narrow = estimate_pages(layout, p, 100, 105), estimate_pages(layout, p, 40, 45)
+    assert narrow["height_pt"] > wide["height_pt"]
+
+
+def test_fit_to_pages_trims_least_relevant_first(layout):
+    p = preset(9)
+    before = estimate_pages(layout, p)["pages"]
+    report = {}
+    out = fit_to_pages(layout, p, before - 1, jd_text="python spark airflow", report=report)
+    fit = report["fit"]
+    assert fit["fits"] and fit["pages_before"] == before and fit["pages_after"] <= before - 1
+    assert estimate_pages(layout, out)["pages"] == fit["pages_after"]
+    assert sum(len(p[k]) - len(out[k]) for k in BULLET_KEYS) == len(fit["trimmed"]) > 0
+    for t in fit["trimmed"]:
+        assert t["text"] in p[t["section"]] and t["text"] not in out[t["section"]]
+    assert all(len(out[k]) >= 2 for k in BULLET_KEYS)
+    assert p["EXTRA_BULLETS_TEK"] == preset(9)["EXTRA_BULLETS_TEK"]  # input left alone
+
+
+def test_fit_to_pages_keeps_min_bullets_when_it_cannot_fit(layout):
+    report = {}
+    out = fit_to_pages(layout, preset(9), 1, min_bullets=3, report=report)
+    assert {k: len(out[k]) for k in BULLET_KEYS} == {k: 3 for k in BULLET_KEYS}
+    assert not report["fit"]["fits"] and report["fit"]["pages_after"] > 1
+
+
+def test_auto_wrap_lines_fit_the_slot(layout):
+    width, trigger = auto_wrap(layout, preset(6))
+    assert 20 <= width < trigger
+    assert estimate_pages(layout, preset(6), width, trigger)["pages"] >= 1
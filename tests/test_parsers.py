@@ -0,0 +1,71 @@
+import json
+
+from core.parsers import coerce_json, recover_json
+
+DATA = {
+    "keywords": {"Programming": ["Python", "SQL"]},
+    "experience_bullets": {"Job: Data Engineer – Acme": ["Built pipelines", "Cut costs by 30%"]},
+}
+
+
+def test_bare_object_parses_strictly():
+    report = {}
+    assert coerce_json(json.dumps(DATA), report) == DATA
+    assert report == {"extracted": "braces", "repaired": False, "truncated": False, "repairs": []}
+
+
+def test_fenced_output_with_prose():
+    text = "Here is the JSON you asked for:\n```json\n" + json.dumps(DATA, indent=2) + "\n```\nLet me know!"
+    obj, report = recover_json(text)
+    assert obj == DATA
+    assert report["extracted"] == "fenced" and not report["repaired"]
+
+
+def test_prose_prefix_without_fence():
+    obj, report = recover_json("Sure! " + json.dumps(DATA))
+    assert obj == DATA
+    assert report["extracted"] == "braces"
+
+
+def test_trailing_commas():
+    obj, report = recover_json('{"a": [1, 2,], "b": {"c": true,},}')
+    assert obj == {"a": [1, 2], "b": {"c": True}}
+    assert "removed trailing comma" in report["repairs"]
+    assert report["repaired"] and not report["truncated"]
+
+
+def test_truncated_output_keeps_complete_values():
+    text = json.dumps(DATA)
+    cut = text[:text.index("Cut costs") + 4]
+    obj, report = recover_json(cut)
+    assert obj == {
+        "keywords": {"Programming": ["Python", "SQL"]},
+        "experience_bullets": {"Job: Data Engineer – Acme": ["Built pipelines"]},
+    }
+    assert report["truncated"] and report["repaired"]
+    assert "dropped incomplete array item" in report["repairs"]
+
+
+def test_truncated_string_kept_on_request():
+    obj, report = recover_json('{"bullets": ["Built pipelines", "Cut co', keep_partial_strings=True)
+    assert obj == {"bullets": ["Built pipelines", "Cut co"]}
+    assert "closed unterminated string" in report["repairs"]
+
+
+def test_truncated_number_is_dropped():
+    obj, _ = recover_json('{"a": 1, "b": 12')
+    assert obj == {"a": 1}
+
+
+def test_coerce_fills_report_on_recovery():
+    report = {}
+    assert coerce_json('```json\n{"a": [1,]}\n```', report) == {"a": [1]}
+    assert report["extracted"] == "fenced" and report["repaired"]
+
+
+def test_nothing_to_recover():
+    assert recover_json("no json here") == (None, {"extracted": None, "repaired": False,
+                                                   "truncated": False, "repairs": []})
+    obj, report = recover_json("{")
+    assert obj is None and report["truncated"]
+    assert coerce_json("") is None
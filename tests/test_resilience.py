@@ -0,0 +1,190 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+import pytest
+
+from core.fakes import FakeLLMServer, FakeOpenAIClient
+from core import resilience
+from core.metrics import RunMetrics
+from core.resilience import (
+    CircuitBreaker, CircuitOpen, Deadline, DeadlineExceeded, RetryPolicy, resilient_call
+)
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+FAST_RETRY = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.02, attempt_timeout=5.0)
+
+
+def no_sleep(_):
+    pass
+
+
+def call(client):
+    return lambda timeout: client.chat.completions.create(model="m", messages=MESSAGES, timeout=timeout)
+
+
+@pytest.fixture
+def server_client():
+    servers = []
+
+    def make(**kw):
+        server = FakeLLMServer(responder=lambda m: "ok", **kw).start()
+        servers.append(server)
+        return server, openai.OpenAI(base_url=server.url, api_key="fake", max_retries=0)
+
+    yield make
+    for s in servers:
+        s.stop()
+
+
+def test_retries_transient_errors(server_client):
+    server, client = server_client(fail_first=2, error_status=503)
+    run = RunMetrics()
+    breaker = CircuitBreaker(failure_threshold=5)
+    resp = resilient_call(call(client), policy=FAST_RETRY, breaker=breaker, metrics=run, sleep=no_sleep)
+    assert resp.choices[0].message.content == "ok"
+    assert (server.requests, server.errors) == (3, 2)
+    assert run.flags["llm_retries"] == 2
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_client_errors_are_not_retried(server_client):
+    server, client = server_client(fail_first=1, error_status=400)
+    breaker = CircuitBreaker()
+    with pytest.raises(openai.BadRequestError):
+        resilient_call(call(client), policy=FAST_RETRY, breaker=breaker, sleep=no_sleep)
+    assert server.requests == 1
+    assert breaker.state == "closed"
+
+
+def test_retry_after_is_honoured(server_client):
+    server, client = server_client(fail_first=1, error_status=429, retry_after=0.3)
+    waits = []
+    resilient_call(call(client), policy=FAST_RETRY, sleep=waits.append)
+    assert waits and waits[0] >= 0.3
+
+
+def test_retry_that_does_not_fit_the_deadline(server_client):
+    server, client = server_client(fail_first=1, error_status=503, retry_after=5)
+    with pytest.raises(DeadlineExceeded):
+        resilient_call(call(client), deadline=Deadline(2), policy=FAST_RETRY, sleep=no_sleep)
+    assert server.requests == 1
+
+
+def test_breaker_opens_fails_fast_and_probes(server_client):
+    server, client = server_client(fail_first=3, error_status=503)
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=0.05)
+    once = RetryPolicy(max_attempts=1, attempt_timeout=5.0)
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            resilient_call(call(client), policy=once, breaker=breaker)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        resilient_call(call(client), policy=once, breaker=breaker)
+    assert server.requests == 2  # refused locally
+
+    time.sleep(0.06)
+    with pytest.raises(openai.InternalServerError):  # the one trial fails: open again
+        resilient_call(call(client), policy=once, breaker=breaker)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    resilient_call(call(client), policy=once, breaker=breaker)
+    assert breaker.state == "closed" and server.requests == 4
+
+
+def test_expired_deadline_keeps_the_half_open_trial():
+    client = FakeOpenAIClient(responder=lambda m: "ok")
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+    with pytest.raises(DeadlineExceeded):
+        resilient_call(call(client), deadline=Deadline(0), breaker=breaker)
+    assert client.calls == 0
+    resilient_call(call(client), breaker=breaker)  # the trial was not used up
+    assert breaker.state == "closed"
+
+
+def test_interrupted_trial_is_released():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    def interrupted(timeout):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        resilient_call(interrupted, breaker=breaker)
+    assert breaker.allow()
+
+
+def test_hedge_wins_over_a_slow_attempt():
+    state = {"n": 0}
+
+    def responder(messages):
+        state["n"] += 1
+        if state["n"] == 1:
+            time.sleep(1.0)  # the first request stalls
+        return "ok"
+
+    client = FakeOpenAIClient(responder=responder)
+    run = RunMetrics()
+    t0 = time.perf_counter()
+    resp = resilient_call(call(client), hedge_after=0.05, metrics=run)
+    assert time.perf_counter() - t0 < 0.5
+    assert resp.choices[0].message.content == "ok"
+    assert client.calls == 2
+    assert run.flags["llm_hedged"] == 1 and run.flags["llm_hedge_won"] == 1
+
+
+def test_concurrent_sections_hedge_independently():
+    seen = set()
+    lock = threading.Lock()
+
+    def responder(messages):
+        with lock:
+            first = messages[0]["content"] not in seen
+            seen.add(messages[0]["content"])
+        if first:
+            time.sleep(1.0)  # each section's first request stalls
+        return "ok"
+
+    client = FakeOpenAIClient(responder=responder)
+    runs = [RunMetrics(), RunMetrics()]
+
+    def section(k):
+        msgs = [{"role": "user", "content": f"section {k}"}]
+        fn = lambda timeout: client.chat.completions.create(model="m", messages=msgs, timeout=timeout)
+        return resilient_call(fn, hedge_after=0.05, metrics=runs[k])
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(section, range(2)))
+    assert time.perf_counter() - t0 < 0.8
+    assert all(r.choices[0].message.content == "ok" for r in results)
+    assert all(r.flags["llm_hedged"] == 1 and r.flags["llm_hedge_won"] == 1 for r in runs)
+
+
+def test_backup_skipped_when_hedge_budget_is_used_up(monkeypatch):
+    monkeypatch.setattr(resilience, "_HEDGE_SLOTS", threading.BoundedSemaphore(1))
+    resilience._HEDGE_SLOTS.acquire()  # every slot is taken by other calls
+
+    def responder(messages):
+        time.sleep(0.2)
+        return "ok"
+
+    client = FakeOpenAIClient(responder=responder)
+    run = RunMetrics()
+    resp = resilient_call(call(client), hedge_after=0.05, metrics=run)
+    assert resp.choices[0].message.content == "ok"
+    assert client.calls == 1
+    assert run.flags["llm_hedge_skipped"] == 1 and "llm_hedged" not in run.flags
+
+
+def test_no_hedge_when_fast():
+    client = FakeOpenAIClient(responder=lambda m: "ok")
+    run = RunMetrics()
+    resilient_call(call(client), hedge_after=1.0, metrics=run)
+    assert client.calls == 1 and "llm_hedged" not in run.flags
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from core.experience import parse_experience
+from core.fakes import FakeOpenAIClient, fake_response
+from core.metrics import RunMetrics
+from core.pipeline import escalate, pick_candidate
+from core.schema import failing_parts, fatal, get_schema, needs_retry
+
+BUCKETS = ["Programming", "Data Engineering", "Cloud", "Database", "ML/AI", "Misc"]
+JOB = "Job: Data Engineer – Acme (Jan 2020 – Dec 2022)"
+PROJECT = "Project: Lakehouse Migration (2021)"
+EXPERIENCE = "\n".join([
+    "[Programming]", "Python, SQL",
+    f"[{JOB}]", "- Built batch pipelines in Python and SQL on AWS for the analytics team",
+    f"[{PROJECT}]", "- Moved the warehouse to Delta Lake",
+])
+SECTIONS = parse_experience(EXPERIENCE).sections
+BULLET = "Built and operated twenty batch and streaming pipelines in Python and SQL that fed the pricing analytics"
+
+
+def bullets(n):
+    return [BULLET] * n
+
+
+def output(**over):
+    data = {
+        "keywords": {b: [] for b in BUCKETS},
+        "missing_skills": {b: [] for b in BUCKETS},
+        "experience_bullets": {f"<{JOB}>": bullets(7)},
+        "project_bullets": {f"<{PROJECT}>": bullets(5)},
+    }
+    data.update(over)
+    return data
+
+
+@pytest.fixture
+def schema():
+    return get_schema(SECTIONS, BUCKETS)
+
+
+def test_valid_output(schema):
+    assert schema.validate(output()) == []
+
+
+def test_missing_buckets_are_not_fatal(schema):
+    data = output(keywords={"Programming": ["Python"]})
+    data.pop("missing_skills")
+    issues = schema.validate(data)
+    assert issues and not fatal(issues)
+    assert failing_parts(issues) == (True, [])
+
+
+def test_wrong_types_are_fatal(schema):
+    assert fatal(schema.validate(output(keywords=["Python"])))
+    assert fatal(schema.validate(output(keywords={**output()["keywords"], "Cloud": "AWS"})))
+    assert fatal(schema.validate(output(experience_bullets={f"<{JOB}>": [1, 2, 3, 4, 5]})))
+    assert fatal(schema.validate("not json"))
+
+
+def test_missing_section_is_not_fatal_unless_all_are(schema):
+    issues = schema.validate(output(project_bullets={}))
+    assert not fatal(issues)
+    assert failing_parts(issues) == (False, [PROJECT])
+    assert fatal(schema.validate(output(experience_bullets={}, project_bullets={})))
+
+
+def test_counts_and_lengths_are_report_only(schema):
+    issues = schema.validate(output(experience_bullets={f"<{JOB}>": ["too short"] * 12}))
+    assert len(issues) == 2 and not fatal(issues) and not needs_retry(issues)
+    assert issues[0]["message"] == "12 bullets, expected 5–10"
+    assert failing_parts(issues) == (False, [])
+
+
+def test_headers_match_loosely(schema):
+    data = output(experience_bullets={JOB.replace("–", "-"): bullets(7)})
+    assert schema.validate(data) == []
+
+
+def test_pick_candidate_prefers_valid(schema):
+    bad = {"index": 0, "score": 0.9, "raw": "a", "data": output(experience_bullets={f"<{JOB}>": [1]})}
+    soft = {"index": 1, "score": 0.8, "raw": "b", "data": output(project_bullets={})}
+    good = {"index": 2, "score": 0.7, "raw": "c", "data": output()}
+    assert pick_candidate([bad, soft, good], schema) is good
+    assert pick_candidate([bad, soft], schema) is soft
+    assert pick_candidate([bad], schema) is bad
+    assert pick_candidate([bad, good], None) is bad
+
+
+def run_escalate(data, models, responder=fake_response, sections=SECTIONS):
+    client = FakeOpenAIClient(responder=responder)
+    run = RunMetrics()
+    result = escalate(client, data, json.dumps(data), get_schema(SECTIONS, BUCKETS), models,
+                      jd_text="Data engineer, Python", user_prompt="prompt", experience_text=EXPERIENCE,
+                      skill_inventory={"Programming": ["Python", "SQL"]}, buckets=BUCKETS,
+                      sections=sections, use_cache=False, metrics=run)
+    return result, client, run
+
+
+def test_truncated_output_is_kept_on_the_last_model():
+    salvaged = output(project_bullets={})
+    (data, _, issues, tier), client, _ = run_escalate(salvaged, ["only"])
+    assert data is salvaged and tier == 0 and client.calls == 0
+    assert [i["header"] for i in issues] == [PROJECT]
+
+
+def test_missing_section_is_re_requested_from_the_next_model():
+    (data, _, issues, tier), client, run = run_escalate(output(project_bullets={}), ["cheap", "strong"])
+    assert issues == [] and tier == 1
+    assert client.calls == 1 and run.flags["sections_escalated"] == 1
+    assert len(data["project_bullets"]) == 1
+
+
+def test_off_target_counts_do_not_escalate():
+    short = output(experience_bullets={f"<{JOB}>": bullets(4)})
+    (data, _, issues, tier), client, _ = run_escalate(short, ["cheap", "strong"])
+    assert data is short and tier == 0 and client.calls == 0
+    assert [i["message"] for i in issues] == ["4 bullets, expected 5–10"]
+
+
+def test_worse_full_escalation_is_not_kept():
+    salvaged = output(project_bullets={})
+    broken = json.dumps(output(experience_bullets={f"<{JOB}>": [1, 2, 3, 4, 5]}, project_bullets={}))
+    # no section bodies to re-request from, so the whole prompt is retried
+    (data, raw, issues, tier), client, run = run_escalate(salvaged, ["cheap", "strong"],
+                                                          responder=lambda m: broken, sections=None)
+    assert data is salvaged and raw == json.dumps(salvaged) and tier == 1
+    assert client.calls == 1 and run.flags["full_escalations"] == 1
+    assert not fatal(issues)
+
+
+def test_unusable_output_is_dropped():
+    (data, _, issues, _), _, _ = run_escalate(None, ["only"])
+    assert data is None and fatal(issues)
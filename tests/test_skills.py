@@ -0,0 +1,59 @@
+from core.skills import SkillMatcher, match_skills
+
+INVENTORY = {"Programming": ["Python", "SQL"], "Cloud": ["AWS"]}
+
+
+def found(text):
+    return {s for s, _ in SkillMatcher(INVENTORY).scan(text)}
+
+
+def test_prose_is_not_a_skill():
+    text = ("Go the extra mile for customers. Go-getter attitude wanted. "
+            "You write the glue code between teams and shell out ideas. "
+            "We hope you spark joy; the lambda of our culture is ownership.")
+    assert found(text) == set()
+
+
+def test_sentence_start_capital_is_not_canonical_casing():
+    assert "Go" not in found("Go beyond the brief.")
+    assert "AWS Glue" not in found("Glue code is a fact of life.")
+
+
+def test_canonical_casing_mid_sentence():
+    assert {"Go", "AWS Lambda", "Apache Spark"} <= found("Services written in Go, using Lambda functions and Spark jobs.")
+
+
+def test_tech_context():
+    assert found("aws lambda and aws glue") >= {"AWS Lambda", "AWS Glue"}
+    assert "Apache Spark" in found("apache spark pipelines")
+    assert "Go" in found("go/golang microservices")
+    assert "Apache Beam" in found("spark/beam")
+
+
+def test_overlapping_forms_count_once():
+    matcher = SkillMatcher({"Data Engineering": ["Apache Spark"]})
+    assert matcher.scan("We use Apache Spark daily.") == [("Apache Spark", 1)]
+    assert matcher.scan("Apache Spark, plus Spark jobs on AWS Glue") == [("Apache Spark", 2), ("AWS Glue", 1)]
+
+
+def test_list_items():
+    assert {"Go", "Apache Spark", "Shell Scripting"} <= found("Languages: python, go, shell; spark")
+    assert "Go" in found("- go")
+    assert "Go" in found("python, go and rust")
+
+
+def test_uppercase_forms():
+    assert "Machine Learning" in found("ML experience a plus")
+    assert "Machine Learning" not in found("add 5 ml of water")
+
+
+def test_whole_word_only():
+    assert "Go" not in found("Google and Django")
+
+
+def test_missing_skills_exclude_prose_and_owned():
+    jd = "Go the extra mile. Strong Python and Kafka; AWS Lambda experience."
+    result = match_skills(jd, INVENTORY)
+    missing = {s for skills in result["missing_skills"].values() for s in skills}
+    assert missing == {"Apache Kafka", "AWS Lambda"}
+    assert "Python" in result["keywords"]["Programming"]